@@ -1,38 +1,59 @@
 from flask import Flask
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
 import os
 
 from .config import get_config
 from .models import db
-from .routes import init_app as init_routes
-from .error_handlers import init_app as init_error_handlers
 
 def create_app(config_name=None):
-    """Create and configure the Flask application"""
+    """
+    Create and configure the Flask application.
+
+    Importing the package and calling this has no side effects on disk or
+    the database, so it is safe in a pre-fork master; call prepare_app once
+    per deployment to create directories and tables.
+    """
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+
+    from .routes import init_app as init_routes
+    from .error_handlers import init_app as init_error_handlers
+    from .content_store import init_app as init_content_store
+    from .report_queue import init_app as init_report_queue
+    from .payment_events import init_app as init_payment_events
+    from .reconciliation import init_app as init_reconciliation
+    from .bulk_refunds import init_app as init_bulk_refunds
+    from .serialization import init_app as init_serialization
+    from .resumable_upload import init_app as init_resumable_upload
+
     app = Flask(__name__)
     
     # Load configuration
     config = get_config()
     app.config.from_object(config)
     
-    # Ensure required directories exist
-    _create_required_directories(app)
-    
     # Initialize extensions
     CORS(app, origins=app.config['CORS_ORIGINS'])
     JWTManager(app)
+    init_serialization(app)
     db.init_app(app)
     
     # Initialize routes and error handlers
     init_routes(app)
     init_error_handlers(app)
+    init_content_store(app)
+    init_report_queue(app)
+    init_payment_events(app)
+    init_reconciliation(app)
+    init_bulk_refunds(app)
+    init_resumable_upload(app)
     
-    # Create database tables
+    return app
+
+def prepare_app(app):
+    """Create required directories and database tables"""
+    _create_required_directories(app)
     with app.app_context():
         db.create_all()
-    
-    return app
 
 def _create_required_directories(app):
     """Create required directories for the application"""
@@ -45,9 +66,3 @@ def _create_required_directories(app):
     for directory in directories:
         if not os.path.exists(directory):
             os.makedirs(directory)
-
-# Create the application instance
-app = create_app()
-
-if __name__ == '__main__':
-    app.run(debug=app.config['DEBUG'])
\ No newline at end of file
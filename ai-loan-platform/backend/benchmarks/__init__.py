@@ -0,0 +1 @@
+"""Performance benchmarks and synthetic data for the backend services"""
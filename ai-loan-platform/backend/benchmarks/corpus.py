@@ -0,0 +1,64 @@
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from typing import List
+import os
+import random
+
+EMPLOYERS = [
+    'Acme Technologies Pvt Ltd',
+    'Sunrise Retail Private Limited',
+    'Blue River Logistics LLP',
+    'Indus Software Limited'
+]
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June',
+          'July', 'August', 'September', 'October', 'November', 'December']
+
+
+def draw_salary_slip(pdf: canvas.Canvas, employer: str, month: int, year: int,
+                     gross: float, net: float):
+    """Draw one salary slip page onto a canvas"""
+    lines = [
+        employer,
+        f'Pay Slip for the month of {MONTHS[month - 1]} {year}',
+        'Employee Name: Test Employee',
+        'Employee ID: EMP0001',
+        f'Basic Salary: {gross * 0.5:,.2f}',
+        f'House Rent Allowance: {gross * 0.2:,.2f}',
+        f'Special Allowance: {gross * 0.3:,.2f}',
+        f'Gross Earnings: {gross:,.2f}',
+        f'Total Deductions: {gross - net:,.2f}',
+        f'Net Pay: {net:,.2f}'
+    ]
+    for i, line in enumerate(lines):
+        pdf.drawString(50, 800 - i * 18, line)
+    pdf.showPage()
+
+
+def write_salary_slip_bundle(path: str, months: int = 1, employer: str = None,
+                             gross: float = None, seed: int = 0) -> str:
+    """Write a PDF with one salary slip page per month"""
+    rng = random.Random(seed)
+    employer = employer or rng.choice(EMPLOYERS)
+    gross = gross or float(rng.randrange(30000, 200000, 500))
+    net = round(gross * 0.82, 2)
+
+    pdf = canvas.Canvas(path, pagesize=A4)
+    for offset in range(months):
+        month = offset % 12 + 1
+        draw_salary_slip(pdf, employer, month, 2024 + offset // 12, gross, net)
+    pdf.save()
+    return path
+
+
+def build_salary_slip_corpus(directory: str, count: int, months_per_file: int = 1) -> List[str]:
+    """Write `count` synthetic salary slip files and return their paths"""
+    os.makedirs(directory, exist_ok=True)
+    return [
+        write_salary_slip_bundle(
+            os.path.join(directory, f'salary_slip_{i:05d}.pdf'),
+            months=months_per_file,
+            seed=i
+        )
+        for i in range(count)
+    ]
@@ -0,0 +1,242 @@
+"""
+In-process fake of the Razorpay orders and payments API, for tests and for
+load testing the payment flow offline.
+
+Usage:
+    python -m backend.benchmarks.fake_razorpay --port 9000 --latency 0.05
+    RAZORPAY_BASE_URL=http://127.0.0.1:9000 python run.py
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import re
+import threading
+import time
+
+_PAYMENT_PATH = re.compile(r'^/v1/payments/(?P<payment_id>[^/]+)(?P<refund>/refunds?)?$')
+_ORDER_PATH = re.compile(r'^/v1/orders/(?P<order_id>[^/]+)$')
+
+
+class FakeRazorpay:
+    """
+    Fake Razorpay server keeping orders, payments and refunds in memory.
+    `latency` delays every response; `fail_next(n, status)` makes the next n
+    requests fail with a server error, and `slow_next(n, seconds)` processes the
+    next n requests but answers them late, as a provider that times out after
+    acting. Connections are HTTP/1.1 keep-alive and
+    `connections` counts how many clients opened.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 key_secret: str = 'fake_secret'):
+        self.latency = latency
+        self.key_secret = key_secret
+        self.orders: Dict[str, Dict] = {}
+        self.payments: Dict[str, Dict] = {}
+        self.refunds: Dict[str, List[Dict]] = {}
+        self.requests = 0
+        self.connections = 0
+        self._failures = []
+        self._slow = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeRazorpay':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeRazorpay':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, count: int = 1, status: int = 503):
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def slow_next(self, count: int = 1, seconds: float = 2.0):
+        with self._lock:
+            self._slow.extend([seconds] * count)
+
+    def pay(self, order_id: str, method: str = 'upi') -> Dict[str, str]:
+        """
+        Capture a payment for an order, as Checkout would, and return the
+        fields Checkout hands to the client, signed with `key_secret`
+        """
+        with self._lock:
+            order = self.orders[order_id]
+            payment_id = self._new_id('pay')
+            self.payments[payment_id] = {
+                'id': payment_id,
+                'entity': 'payment',
+                'order_id': order_id,
+                'amount': order['amount'],
+                'currency': order['currency'],
+                'status': 'captured',
+                'method': method,
+                'amount_refunded': 0,
+                'notes': order['notes'],
+                'created_at': int(time.time())
+            }
+            order['status'] = 'paid'
+        signature = hmac.new(self.key_secret.encode(), f'{order_id}|{payment_id}'.encode(),
+                             hashlib.sha256).hexdigest()
+        return {
+            'razorpay_order_id': order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': signature
+        }
+
+    def _new_id(self, prefix: str) -> str:
+        return f'{prefix}_{next(self._ids):014d}'
+
+    def _next_failure(self) -> Optional[int]:
+        with self._lock:
+            self.requests += 1
+            return self._failures.pop(0) if self._failures else None
+
+    def _next_delay(self) -> float:
+        with self._lock:
+            return self._slow.pop(0) if self._slow else 0.0
+
+    def _create_order(self, data: Dict) -> Dict:
+        with self._lock:
+            order_id = self._new_id('order')
+            order = {
+                'id': order_id,
+                'entity': 'order',
+                'amount': data['amount'],
+                'currency': data.get('currency', 'INR'),
+                'receipt': data.get('receipt'),
+                'notes': data.get('notes', {}),
+                'status': 'created',
+                'created_at': int(time.time())
+            }
+            self.orders[order_id] = order
+        return order
+
+    def _refund(self, payment_id: str, data: Dict) -> Optional[Dict]:
+        with self._lock:
+            payment = self.payments[payment_id]
+            amount = data.get('amount', payment['amount'] - payment['amount_refunded'])
+            if amount <= 0 or payment['amount_refunded'] + amount > payment['amount']:
+                return None
+            payment['amount_refunded'] += amount
+            payment['status'] = 'refunded'
+            refund = {
+                'id': self._new_id('rfnd'),
+                'entity': 'refund',
+                'payment_id': payment_id,
+                'amount': amount,
+                'notes': data.get('notes', {}),
+                'status': 'processed',
+                'created_at': int(time.time())
+            }
+            self.refunds.setdefault(payment_id, []).append(refund)
+            return refund
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch()
+
+            def do_POST(self):
+                self._dispatch()
+
+            def _dispatch(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if fake.latency:
+                    time.sleep(fake.latency)
+                failure = fake._next_failure()
+                self.delay = fake._next_delay()
+                if failure:
+                    return self._send(failure, {'error': {'code': 'SERVER_ERROR', 'description': 'Injected failure'}})
+
+                data = json.loads(body) if body else {}
+                payment_match = _PAYMENT_PATH.match(self.path.split('?')[0])
+                order_match = _ORDER_PATH.match(self.path.split('?')[0])
+                if self.command == 'POST' and self.path == '/v1/orders':
+                    return self._send(200, fake._create_order(data))
+                if self.command == 'GET' and order_match and order_match['order_id'] in fake.orders:
+                    return self._send(200, fake.orders[order_match['order_id']])
+                if payment_match and payment_match['payment_id'] in fake.payments:
+                    payment_id = payment_match['payment_id']
+                    if self.command == 'GET' and not payment_match['refund']:
+                        return self._send(200, fake.payments[payment_id])
+                    if self.command == 'GET' and payment_match['refund'] == '/refunds':
+                        refunds = fake.refunds.get(payment_id, [])
+                        return self._send(200, {'entity': 'collection', 'count': len(refunds), 'items': refunds})
+                    if self.command == 'POST' and payment_match['refund'] == '/refund':
+                        refund = fake._refund(payment_id, data)
+                        if refund is None:
+                            return self._send(400, {'error': {'code': 'BAD_REQUEST_ERROR',
+                                                              'description': 'The payment has been fully refunded already'}})
+                        return self._send(200, refund)
+                self._send(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'The id provided does not exist'}})
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                if self.delay:
+                    time.sleep(self.delay)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up, e.g. on a read timeout
+                    self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake Razorpay API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--key-secret', default='fake_secret', help='Secret used to sign payments')
+    args = parser.parse_args()
+    fake = FakeRazorpay(args.host, args.port, args.latency, args.key_secret)
+    print(f'Fake Razorpay listening on {fake.url}')
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Payment flow load test against the fake Razorpay server.
+
+Usage:
+    python -m backend.benchmarks.payments --payments 500 --threads 16 --latency 0.02
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import time
+
+from backend.benchmarks.fake_razorpay import FakeRazorpay
+
+
+def run(payments: int, threads: int, latency: float) -> dict:
+    """Create, pay and check `payments` orders concurrently through PaymentGateway"""
+    with FakeRazorpay(latency=latency) as fake:
+        os.environ['RAZORPAY_BASE_URL'] = fake.url
+        os.environ['RAZORPAY_KEY_SECRET'] = fake.key_secret
+        from backend.payment_gateway import PaymentGateway
+        gateway = PaymentGateway()
+
+        def flow(application_id):
+            success, order = gateway.create_order(1, application_id)
+            checkout = fake.pay(order['order_id'])
+            verified, _ = gateway.verify_checkout(checkout)
+            fetched, _ = gateway.get_payment_status(checkout['razorpay_payment_id'])
+            return success and verified and fetched
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            succeeded = sum(executor.map(flow, range(payments)))
+        seconds = time.perf_counter() - start
+
+        result = {
+            'payments': payments,
+            'succeeded': succeeded,
+            'payments_per_second': round(payments / seconds),
+            'connections_opened': fake.connections,
+        }
+        for endpoint, histogram in sorted(gateway.session.histograms.items()):
+            result[f'{endpoint} p50/p99'] = f'<= {histogram.quantile(0.5)}s / <= {histogram.quantile(0.99)}s'
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the payment flow offline')
+    parser.add_argument('--payments', type=int, default=500, help='Number of payments')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake provider latency in seconds')
+    args = parser.parse_args()
+    for key, value in run(args.payments, args.threads, args.latency).items():
+        print(f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
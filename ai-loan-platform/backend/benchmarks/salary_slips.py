@@ -0,0 +1,56 @@
+"""
+Salary slip extraction throughput benchmark.
+
+Usage:
+    python -m backend.benchmarks.salary_slips --slips 200 --months 3 --workers 4
+"""
+import argparse
+import tempfile
+import time
+
+from backend.salary_slip_extractor import SalarySlipExtractor
+from backend.benchmarks.corpus import build_salary_slip_corpus
+
+
+def run(slips: int, months: int, workers: int) -> dict:
+    """Extract a synthetic corpus sequentially and in parallel"""
+    with tempfile.TemporaryDirectory() as directory:
+        paths = build_salary_slip_corpus(directory, slips, months_per_file=months)
+        total_slips = slips * months
+
+        sequential = SalarySlipExtractor(max_workers=1)
+        start = time.perf_counter()
+        for path in paths:
+            sequential.extract(path)
+        sequential_seconds = time.perf_counter() - start
+
+        parallel = SalarySlipExtractor(max_workers=workers)
+        start = time.perf_counter()
+        results = parallel.extract_many(paths)
+        parallel_seconds = time.perf_counter() - start
+
+        extracted = sum(len(found) for found in results.values())
+
+    return {
+        'files': slips,
+        'slips': total_slips,
+        'extracted': extracted,
+        'sequential_slips_per_second': round(total_slips / sequential_seconds, 1),
+        'parallel_slips_per_second': round(total_slips / parallel_seconds, 1),
+        'workers': workers
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark salary slip extraction')
+    parser.add_argument('--slips', type=int, default=200, help='Number of slip files')
+    parser.add_argument('--months', type=int, default=1, help='Slips (pages) per file')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel work split; the shared pool has one process per CPU')
+    args = parser.parse_args()
+
+    for key, value in run(args.slips, args.months, args.workers).items():
+        print(f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Signature verification microbenchmark: per-call key setup against the
+cached HMAC key used by PaymentGateway, for checkout callbacks and a burst
+of webhook deliveries.
+
+Usage:
+    python -m backend.benchmarks.signatures --count 100000
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import timeit
+
+SECRET = 'bench_key_secret'
+
+
+def _uncached_verify(order_id: str, payment_id: str, signature: str) -> bool:
+    # What every callback used to do: read and encode the secret, then key a new HMAC
+    key_secret = os.getenv('RAZORPAY_KEY_SECRET')
+    expected = hmac.new(key_secret.encode(), f'{order_id}|{payment_id}'.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def run(count: int) -> dict:
+    """Time `count` verifications each way and return microseconds per signature"""
+    os.environ['RAZORPAY_KEY_SECRET'] = SECRET
+    os.environ['RAZORPAY_WEBHOOK_SECRET'] = SECRET
+    from backend.payment_gateway import PaymentGateway
+    gateway = PaymentGateway()
+
+    signature = hmac.new(SECRET.encode(), b'order_1|pay_1', hashlib.sha256).hexdigest()
+    body = json.dumps({'event': 'payment.captured', 'payload': {'payment': {'entity': {'id': 'pay_1'}}}}).encode()
+    deliveries = [(body, hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest())] * count
+
+    timings = {
+        'uncached': timeit.timeit(lambda: _uncached_verify('order_1', 'pay_1', signature), number=count),
+        'cached': timeit.timeit(lambda: gateway._verify_signature('order_1', 'pay_1', signature), number=count),
+        'webhook': timeit.timeit(lambda: gateway.verify_webhook_signature(body, deliveries[0][1]), number=count),
+        'webhook batch': timeit.timeit(lambda: gateway.verify_webhook_signatures(deliveries), number=1),
+    }
+    return {name: round(seconds / count * 1e6, 2) for name, seconds in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark payment signature verification')
+    parser.add_argument('--count', type=int, default=100000, help='Signatures per measurement')
+    args = parser.parse_args()
+    for name, microseconds in run(args.count).items():
+        print(f'{name}: {microseconds} us/signature')
+
+
+if __name__ == '__main__':
+    main()
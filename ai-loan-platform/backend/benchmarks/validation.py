@@ -0,0 +1,87 @@
+"""
+Loan application validation throughput benchmark.
+
+Usage:
+    python -m backend.benchmarks.validation --records 50000
+"""
+import argparse
+import random
+import time
+
+from backend.validation import loan_application_validator
+
+VALID_APPLICATION = {
+    'full_name': 'Priya Sharma',
+    'date_of_birth': '1990-04-12',
+    'pan_number': 'ABCDE1234F',
+    'aadhaar_number': '123456789012',
+    'email': 'priya.sharma@example.com',
+    'phone': '+919876543210',
+    'address_line1': '12 MG Road',
+    'city': 'Bengaluru',
+    'state': 'Karnataka',
+    'pincode': '560001',
+    'employment_type': 'salaried',
+    'employer_name': 'Acme Technologies Pvt Ltd',
+    'work_experience': 6,
+    'monthly_income': '85000',
+    'loan_amount': 500000,
+    'loan_purpose': 'Home renovation',
+    'loan_tenure': '36',
+    'existing_loans': 'false'
+}
+
+INVALID_FIELDS = {
+    'pan_number': 'ABC123',
+    'phone': '12345',
+    'date_of_birth': '12/04/1990',
+    'monthly_income': 'lots',
+    'pincode': '5600',
+    'status': 'approved'
+}
+
+
+def build_records(count: int, invalid_ratio: float, seed: int = 7) -> list:
+    """Valid applications with a share of records carrying one bad field"""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        record = dict(VALID_APPLICATION)
+        if rng.random() < invalid_ratio:
+            field = rng.choice(list(INVALID_FIELDS))
+            record[field] = INVALID_FIELDS[field]
+        records.append(record)
+    return records
+
+
+def run(records: int, invalid_ratio: float) -> dict:
+    """Validate records one at a time and as a batch"""
+    data = build_records(records, invalid_ratio)
+
+    start = time.perf_counter()
+    failed = sum(1 for record in data if loan_application_validator.validate(record)[1])
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loan_application_validator.validate_many(data)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'records': records,
+        'invalid': failed,
+        'validations_per_second': round(records / single_seconds),
+        'batch_validations_per_second': round(records / batch_seconds)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark loan application validation')
+    parser.add_argument('--records', type=int, default=50000, help='Number of applications')
+    parser.add_argument('--invalid-ratio', type=float, default=0.2, help='Share of invalid applications')
+    args = parser.parse_args()
+    for key, value in run(args.records, args.invalid_ratio).items():
+        print(f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
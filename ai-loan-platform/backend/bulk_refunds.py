@@ -0,0 +1,311 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import threading
+import time
+
+import click
+import requests
+
+from .models import db, Payment, RefundItem, RefundJob
+from .payment_events import apply_payment_status
+
+logger = logging.getLogger(__name__)
+
+
+def transient_errors() -> Tuple[type, ...]:
+    """Provider errors worth retrying: outages, throttling and timeouts"""
+    # razorpay is imported here so building the app does not load it
+    from razorpay.errors import GatewayError, ServerError
+    return ServerError, GatewayError, requests.RequestException
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the refund threads. `pause` holds every thread
+    back, so one throttled response slows the whole job down.
+    """
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def create_refund_job(payment_ids: Optional[Iterable[str]] = None, query=None,
+                      reason: Optional[str] = None, batch_size: int = 1000) -> RefundJob:
+    """
+    Create a refund job for Razorpay payment ids, or for the payments a
+    `db.select(Payment)` query returns. Payments that are not captured are
+    recorded as skipped so the job shows why they were left out.
+    """
+    if (payment_ids is None) == (query is None):
+        raise ValueError('Pass either payment_ids or query')
+
+    job = RefundJob(reason=reason)
+    db.session.add(job)
+    db.session.flush()
+
+    if query is None:
+        payment_ids = list(dict.fromkeys(payment_ids))
+        query = db.select(Payment).where(Payment.payment_id.in_(payment_ids))
+    rows = db.session.execute(query.with_only_columns(Payment.id, Payment.status, Payment.payment_id)).all()
+    if payment_ids is not None and len(rows) < len(payment_ids):
+        logger.warning('Refund job %s: %d payment ids are unknown', job.id, len(payment_ids) - len(rows))
+
+    items = []
+    for payment_ref, status, payment_id in rows:
+        item = {'job_id': job.id, 'payment_ref': payment_ref, 'status': 'pending', 'error': None}
+        if status != 'captured' or not payment_id:
+            item.update(status='skipped', error=f'Payment is {status}')
+        items.append(item)
+    for offset in range(0, len(items), batch_size):
+        db.session.execute(db.insert(RefundItem), items[offset:offset + batch_size])
+    db.session.commit()
+    return job
+
+
+def job_progress(job: RefundJob, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Item counts per status, refunds per second since the job started, and an ETA"""
+    counts = dict(db.session.execute(
+        db.select(RefundItem.status, db.func.count())
+        .where(RefundItem.job_id == job.id)
+        .group_by(RefundItem.status)
+    ).all())
+    progress = {
+        'job_id': job.id,
+        'status': job.status,
+        'total': sum(counts.values()),
+        **{status: counts.get(status, 0) for status in ('pending', 'processing', 'refunded', 'failed', 'skipped')}
+    }
+    done = progress['refunded'] + progress['failed']
+    remaining = progress['pending'] + progress['processing']
+    elapsed = ((now or datetime.utcnow()) - job.started_at).total_seconds() if job.started_at else 0
+    rate = done / elapsed if elapsed > 0 else 0.0
+    progress['refunds_per_second'] = round(rate, 2)
+    progress['eta_seconds'] = round(remaining / rate) if rate else None
+    return progress
+
+
+class RefundRunner:
+    """
+    Refunds the items of a job on a thread pool, throttled by a token bucket.
+    Items are marked processing and committed before Razorpay is called, and
+    each refund carries its item id in its notes. Items whose outcome is
+    unknown, because a run crashed or a refund call timed out or failed after
+    it was sent, stay processing and are matched against the payment's
+    refunds at Razorpay before they are tried again, so a refund is never
+    issued twice. Database work stays on the calling thread.
+    """
+    def __init__(self, app, gateway, concurrency: int = 4, rate: float = 5.0,
+                 max_attempts: int = 3, throttle_pause: float = 5.0):
+        self.app = app
+        self.client = gateway.client
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.max_attempts = max_attempts
+        self.throttle_pause = throttle_pause
+        self.transient_errors = transient_errors()
+
+    def run(self, job_id: int, stop: Optional[threading.Event] = None,
+            on_progress=None) -> Dict[str, Any]:
+        """
+        Refund pending items until none are left or `stop` is set, calling
+        `on_progress` with the job progress after each batch
+        """
+        stop = stop or threading.Event()
+        with self.app.app_context():
+            job = db.session.get(RefundJob, job_id)
+            if job is None:
+                raise ValueError(f'Refund job {job_id} not found')
+            job.status = 'running'
+            job.started_at = job.started_at or datetime.utcnow()
+            db.session.commit()
+
+            self.recover(job)
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                while not stop.is_set():
+                    items = self.claim(job, self.concurrency * 4)
+                    if not items:
+                        break
+                    self._refund_batch(executor, items)
+                    self.recover(job)
+                    if on_progress:
+                        on_progress(job_progress(job))
+
+            if not RefundItem.query.filter(RefundItem.job_id == job.id,
+                                           RefundItem.status.in_(('pending', 'processing'))).count():
+                job.status = 'completed'
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            return job_progress(job)
+
+    def claim(self, job: RefundJob, limit: int) -> List[Tuple[RefundItem, Payment]]:
+        """Mark up to `limit` pending items as processing, committed, and return them with their payments"""
+        candidates = db.session.query(RefundItem.id).filter_by(
+            job_id=job.id, status='pending'
+        ).order_by(RefundItem.id).limit(limit).all()
+
+        claimed = []
+        for (item_id,) in candidates:
+            result = db.session.execute(
+                db.update(RefundItem)
+                .where(RefundItem.id == item_id, RefundItem.status == 'pending')
+                .values(status='processing', attempts=RefundItem.attempts + 1)
+            )
+            if result.rowcount == 1:
+                claimed.append(item_id)
+        db.session.commit()
+
+        if not claimed:
+            return []
+        return db.session.query(RefundItem, Payment).join(
+            Payment, Payment.id == RefundItem.payment_ref
+        ).filter(RefundItem.id.in_(claimed)).order_by(RefundItem.id).all()
+
+    def recover(self, job: RefundJob):
+        """
+        Settle items left processing by a crash or a failed refund call, using
+        the refunds Razorpay already holds; items without one are retried
+        until they run out of attempts
+        """
+        stranded = db.session.query(RefundItem, Payment).join(
+            Payment, Payment.id == RefundItem.payment_ref
+        ).filter(RefundItem.job_id == job.id, RefundItem.status == 'processing').all()
+        for item, payment in stranded:
+            self.limiter.acquire()
+            try:
+                refunds = self.client.payment.fetch_multiple_refund(payment.payment_id).get('items', [])
+            except self.transient_errors as e:
+                logger.warning('Could not check refunds of %s: %s', payment.payment_id, e)
+                continue
+            refund = next((r for r in refunds if (r.get('notes') or {}).get('refund_item') == str(item.id)), None)
+            if refund is not None:
+                self._record(item, payment, refund)
+            else:
+                self._fail(item, item.error or 'Refund was not created', retry=item.attempts < self.max_attempts)
+        db.session.commit()
+
+    def _refund_batch(self, executor: ThreadPoolExecutor, items: List[Tuple[RefundItem, Payment]]):
+        futures = {}
+        for item, payment in items:
+            if payment.status == 'refunded':
+                # Refunded since the job was created, e.g. by hand
+                item.status = 'skipped'
+                item.error = 'Payment is refunded'
+                item.processed_at = datetime.utcnow()
+                continue
+            data = {'amount': round(payment.amount * 100), 'notes': {'refund_item': str(item.id)}}
+            futures[executor.submit(self._refund, payment.payment_id, data)] = (item, payment)
+        db.session.commit()
+
+        for future in as_completed(futures):
+            item, payment = futures[future]
+            try:
+                self._record(item, payment, future.result())
+            except self.transient_errors as e:
+                # The refund may have been created before the call failed;
+                # recover() checks Razorpay before it is retried
+                logger.warning('Refund item %s failed, checking Razorpay before retrying: %s', item.id, e)
+                self.limiter.pause(self.throttle_pause)
+                item.error = str(e)
+            except Exception as e:
+                self._fail(item, str(e), retry=False)
+            db.session.commit()
+
+    def _refund(self, payment_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self.limiter.acquire()
+        return self.client.payment.refund(payment_id, data)
+
+    def _record(self, item: RefundItem, payment: Payment, refund: Dict[str, Any]):
+        now = datetime.utcnow()
+        item.status = 'refunded'
+        item.refund_id = refund['id']
+        item.error = None
+        item.processed_at = now
+        payment.refund_id = refund['id']
+        payment.amount_refunded = (payment.amount_refunded or 0) + refund['amount'] / 100
+        payment.refunded_at = now
+        apply_payment_status(payment, 'refunded')
+
+    def _fail(self, item: RefundItem, error: str, retry: bool):
+        logger.warning('Refund item %s failed: %s', item.id, error)
+        item.error = error
+        if retry:
+            item.status = 'pending'
+        else:
+            item.status = 'failed'
+            item.processed_at = datetime.utcnow()
+
+
+def init_app(app):
+    """Register the bulk refund commands"""
+    @app.cli.group('refunds')
+    def refunds_group():
+        """Bulk refund jobs"""
+
+    @refunds_group.command('create')
+    @click.option('--payment-ids', type=click.File(), help='File with one Razorpay payment id per line')
+    @click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']),
+                  help='Refund captured payments created on or after this day (UTC)')
+    @click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']),
+                  help='Refund captured payments created before this day (UTC)')
+    @click.option('--reason', help='Why the payments are refunded')
+    def create_command(payment_ids, start, end, reason):
+        """Create a refund job from a list of payment ids or a date window"""
+        if payment_ids:
+            job = create_refund_job([line.strip() for line in payment_ids if line.strip()], reason=reason)
+        elif start and end:
+            job = create_refund_job(query=db.select(Payment).where(
+                Payment.status == 'captured',
+                Payment.created_at >= start,
+                Payment.created_at < end
+            ).order_by(Payment.id), reason=reason)
+        else:
+            raise click.UsageError('Pass --payment-ids or both --from and --to')
+        progress = job_progress(job)
+        click.echo(f"Refund job {job.id}: {progress['pending']} to refund, {progress['skipped']} skipped")
+
+    @refunds_group.command('run')
+    @click.argument('job_id', type=int)
+    @click.option('--concurrency', default=4, help='Refunds in flight at once')
+    @click.option('--rate', default=5.0, help='Refund requests per second')
+    def run_command(job_id, concurrency, rate):
+        """Refund the pending items of a job; rerun to resume after a crash"""
+        from .routes import payment_gateway
+
+        def report(progress):
+            click.echo(f"{progress['refunded']} refunded, {progress['failed']} failed, "
+                       f"{progress['pending']} pending, {progress['refunds_per_second']}/s")
+
+        runner = RefundRunner(app, payment_gateway, concurrency=concurrency, rate=rate)
+        report(runner.run(job_id, on_progress=report))
+
+    @refunds_group.command('status')
+    @click.argument('job_id', type=int)
+    def status_command(job_id):
+        """Show the progress of a refund job"""
+        job = db.session.get(RefundJob, job_id)
+        if job is None:
+            raise click.ClickException(f'Refund job {job_id} not found')
+        for key, value in job_progress(job).items():
+            click.echo(f'{key}: {value}')
@@ -18,10 +18,12 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-here')
     JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours
     
-    # File Upload
+    # File Upload (resumable uploads are staged here too; share it across hosts)
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'pdf', 'jpg', 'jpeg', 'png'}
+    # Document types whose unprocessed image uploads must be retained
+    KEEP_ORIGINAL_DOCUMENT_TYPES = set(filter(None, os.getenv('KEEP_ORIGINAL_DOCUMENT_TYPES', '').split(',')))
     
     # DigiLocker
     DIGILOCKER_BASE_URL = os.getenv('DIGILOCKER_BASE_URL', 'https://api.digitallocker.gov.in/public/oauth2/1/')
@@ -29,6 +31,9 @@ class Config:
     DIGILOCKER_CLIENT_SECRET = os.getenv('DIGILOCKER_CLIENT_SECRET')
     DIGILOCKER_REDIRECT_URI = os.getenv('DIGILOCKER_REDIRECT_URI')
     
+    # OAuth state store (in-memory when unset; use redis:// for multiple workers)
+    STATE_STORE_URL = os.getenv('STATE_STORE_URL')
+    
     # eKYC
     EKYC_BASE_URL = os.getenv('EKYC_BASE_URL')
     EKYC_API_KEY = os.getenv('EKYC_API_KEY')
@@ -36,7 +41,9 @@ class Config:
     # Razorpay
     RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID')
     RAZORPAY_KEY_SECRET = os.getenv('RAZORPAY_KEY_SECRET')
+    RAZORPAY_WEBHOOK_SECRET = os.getenv('RAZORPAY_WEBHOOK_SECRET')
     REPORT_FEE = 120  # ₹120
+    PAYMENT_ORDER_TTL = int(os.getenv('PAYMENT_ORDER_TTL', 1800))  # reuse an open order for 30 minutes
     
     # AI Model
     MODEL_WEIGHTS_PATH = 'models/loan_assessment_model.pkl'
@@ -44,6 +51,15 @@ class Config:
     # Report Generation
     REPORT_FOLDER = 'reports'
     
+    # File storage (local folders when unset; s3://bucket/prefix for shared storage)
+    STORAGE_URL = os.getenv('STORAGE_URL')
+    
+    # Let nginx serve downloads from its internal /uploads and /reports locations
+    X_ACCEL_REDIRECT = os.getenv('X_ACCEL_REDIRECT', 'false').lower() == 'true'
+    
+    # JSON encoding (auto uses orjson when installed)
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+    
     # CORS
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:8000']
     
@@ -0,0 +1,231 @@
+from datetime import date, datetime
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import re
+
+_TITLES = {'mr', 'mrs', 'ms', 'miss', 'dr', 'shri', 'smt', 'kumari', 'sri', 'late'}
+_ADDRESS_ABBREVIATIONS = {
+    'rd': 'road', 'st': 'street', 'ave': 'avenue', 'apt': 'apartment',
+    'apts': 'apartment', 'apartments': 'apartment', 'bldg': 'building',
+    'flr': 'floor', 'fl': 'floor', 'nr': 'near', 'opp': 'opposite',
+    'sec': 'sector', 'ngr': 'nagar', 'mg': 'mahatma gandhi', 'blr': 'bangalore',
+    'bengaluru': 'bangalore', 'bombay': 'mumbai', 'no': '', 'h': '', 'house': ''
+}
+_DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d-%b-%Y', '%d %b %Y', '%Y/%m/%d')
+_NON_WORD_RE = re.compile(r'[^a-z0-9 ]+')
+_PINCODE_RE = re.compile(r'\b(\d{6})\b')
+_PAN_RE = re.compile(r'\b([A-Z]{5}[0-9]{4}[A-Z])\b')
+
+# Where each field can be found in a document's verification details
+_NAME_KEYS = ('name', 'full_name', 'holder_name', 'name_on_card')
+_DOB_KEYS = ('dob', 'date_of_birth', 'birth_date')
+_PAN_KEYS = ('pan', 'pan_number', 'number')
+_INCOME_KEYS = ('net_salary', 'average_salary', 'average_net_salary', 'monthly_credits')
+
+
+def normalize_name(name: Optional[str]) -> List[str]:
+    """Lowercase name tokens without honorifics or punctuation"""
+    if not name:
+        return []
+    tokens = _NON_WORD_RE.sub(' ', name.lower()).split()
+    return [token for token in tokens if token not in _TITLES]
+
+
+def normalize_date(value) -> Optional[str]:
+    """Convert a date in any supported format to ISO format"""
+    if not value:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_address(address) -> Tuple[List[str], Optional[str]]:
+    """Return canonical address tokens and the pincode if present"""
+    if not address:
+        return [], None
+    if isinstance(address, dict):
+        address = ' '.join(str(value) for value in address.values() if value)
+
+    text = str(address).lower()
+    match = _PINCODE_RE.search(text)
+    pincode = match.group(1) if match else None
+
+    tokens = []
+    for token in _NON_WORD_RE.sub(' ', text).split():
+        if token == pincode:
+            continue
+        expanded = _ADDRESS_ABBREVIATIONS.get(token, token)
+        tokens.extend(expanded.split())
+    return tokens, pincode
+
+
+def token_similarity(left: List[str], right: List[str]) -> float:
+    """
+    Order-insensitive fuzzy similarity between two token lists.
+    Each token of the shorter list is matched to its closest token in the
+    longer one; single-letter initials match tokens starting with them.
+    """
+    if not left or not right:
+        return 0.0
+    if len(left) > len(right):
+        left, right = right, left
+
+    right_set = set(right)
+    total = 0.0
+    for token in left:
+        if token in right_set:
+            total += 1.0
+            continue
+        best = 0.0
+        matcher = SequenceMatcher(None, token)
+        for candidate in right:
+            if len(token) == 1 or len(candidate) == 1:
+                if token[0] == candidate[0]:
+                    best = max(best, 0.9)
+                continue
+            matcher.set_seq2(candidate)
+            if matcher.real_quick_ratio() <= best or matcher.quick_ratio() <= best:
+                continue
+            best = max(best, matcher.ratio())
+        total += best
+
+    # Penalise tokens in the longer list that had nothing to pair with
+    coverage = len(left) / len(right)
+    return round((total / len(left)) * (0.8 + 0.2 * coverage), 4)
+
+
+class ConsistencyEngine:
+    """
+    Reconcile identity, address and income details across a user's documents
+    and their loan application. Normalized fields are cached on each
+    UserDocument keyed by a hash of its verification details, so repeated
+    checks only normalize documents that changed.
+    """
+    def __init__(self, name_threshold: float = 0.85, address_threshold: float = 0.75,
+                 income_tolerance: float = 0.2):
+        self.name_threshold = name_threshold
+        self.address_threshold = address_threshold
+        self.income_tolerance = income_tolerance
+
+    def normalize_document(self, document) -> Dict:
+        """
+        Return normalized fields for a document, reusing the cached copy if
+        its verification details are unchanged
+        """
+        details = document.verification_details or {}
+        source_hash = hashlib.sha1(
+            json.dumps(details, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        cached = document.normalized_fields
+        if cached and cached.get('source_hash') == source_hash:
+            return cached['fields']
+
+        fields = self._normalize_details(document.document_type, details)
+        document.normalized_fields = {'source_hash': source_hash, 'fields': fields}
+        return fields
+
+    def normalize_application(self, application) -> Dict:
+        """
+        Normalize the comparable fields of a loan application
+        """
+        address_tokens, _ = normalize_address(' '.join(filter(None, [
+            application.address_line1, application.address_line2,
+            application.city, application.state
+        ])))
+        return {
+            'name': normalize_name(application.full_name),
+            'dob': normalize_date(application.date_of_birth),
+            'address': address_tokens,
+            'pincode': application.pincode,
+            'pan': (application.pan_number or '').upper() or None,
+            'income': application.monthly_income
+        }
+
+    def reconcile(self, application, documents: Iterable) -> Dict:
+        """
+        Compare an application with a user's documents and record the result
+        on the application. Returns the per-field scores and overall score.
+        """
+        expected = self.normalize_application(application)
+        scores = {'name': [], 'dob': [], 'address': [], 'pan': [], 'income': []}
+        sources = {}
+
+        for document in documents:
+            fields = self.normalize_document(document)
+            for field, score in self._compare(expected, fields).items():
+                scores[field].append(score)
+                sources.setdefault(field, []).append(document.document_type)
+
+        field_scores = {
+            field: round(min(values), 4) for field, values in scores.items() if values
+        }
+        identity_scores = [field_scores[f] for f in ('name', 'dob', 'address', 'pan') if f in field_scores]
+        overall = round(sum(identity_scores) / len(identity_scores), 4) if identity_scores else 0.0
+
+        name_ok = field_scores.get('name', 0.0) >= self.name_threshold
+        application.address_verified = name_ok and field_scores.get('address', 0.0) >= self.address_threshold
+        application.income_verified = name_ok and field_scores.get('income', 0.0) >= 1 - self.income_tolerance
+        application.consistency_score = overall
+        application.consistency_details = {
+            'field_scores': field_scores,
+            'sources': sources,
+            'checked_at': datetime.utcnow().isoformat()
+        }
+
+        return {
+            'consistency_score': overall,
+            'field_scores': field_scores,
+            'address_verified': application.address_verified,
+            'income_verified': application.income_verified
+        }
+
+    def _normalize_details(self, document_type: Optional[str], details: Dict) -> Dict:
+        """Extract and normalize comparable fields from verification details"""
+        address_tokens, pincode = normalize_address(details.get('address'))
+        pan = _first(details, _PAN_KEYS) if document_type == 'pan' else details.get('pan_number')
+        pan_match = _PAN_RE.search(str(pan).upper()) if pan else None
+        income = _first(details, _INCOME_KEYS) if document_type in ('salary_slip', 'bank_statement') else None
+
+        return {
+            'name': normalize_name(_first(details, _NAME_KEYS)),
+            'dob': normalize_date(_first(details, _DOB_KEYS)),
+            'address': address_tokens,
+            'pincode': pincode,
+            'pan': pan_match.group(1) if pan_match else None,
+            'income': float(income) if isinstance(income, (int, float)) else None
+        }
+
+    def _compare(self, expected: Dict, fields: Dict) -> Dict[str, float]:
+        """Score each field present on both sides"""
+        scores = {}
+        if expected['name'] and fields['name']:
+            scores['name'] = token_similarity(expected['name'], fields['name'])
+        if expected['dob'] and fields['dob']:
+            scores['dob'] = 1.0 if expected['dob'] == fields['dob'] else 0.0
+        if expected['address'] and fields['address']:
+            score = token_similarity(expected['address'], fields['address'])
+            if expected['pincode'] and fields['pincode'] and expected['pincode'] != fields['pincode']:
+                score = min(score, 0.5)
+            scores['address'] = score
+        if expected['pan'] and fields['pan']:
+            scores['pan'] = 1.0 if expected['pan'] == fields['pan'] else 0.0
+        if expected['income'] and fields['income']:
+            low, high = sorted((float(expected['income']), fields['income']))
+            scores['income'] = round(low / high, 4) if high else 0.0
+        return scores
+
+
+def _first(details: Dict, keys: Tuple[str, ...]):
+    for key in keys:
+        if details.get(key):
+            return details[key]
+    return None
@@ -0,0 +1,196 @@
+from typing import Dict, Iterator, List, Optional
+import hashlib
+import logging
+import os
+import re
+import time
+
+import click
+
+from .models import db, UserDocument
+from .storage import LocalStorage, Storage, get_storage
+
+logger = logging.getLogger(__name__)
+
+_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ContentStore:
+    """
+    Content-addressed file storage keyed by SHA-256.
+    Identical content is stored once; a blob is referenced by every
+    UserDocument whose file, thumbnail or original path is its key.
+    Blobs live at ab/cd/<hash>
+    in the underlying storage, so no directory holds more than a few
+    thousand entries and a lookup is a single key computation.
+    """
+    def __init__(self, storage: Storage):
+        self.storage = storage
+
+    def put_file(self, source_path: str, content_hash: str) -> str:
+        """Move a finished file into the store and return its key.
+        If the content is already stored the source file is discarded and
+        the blob is touched, so garbage collection treats it as new until
+        the document referencing it is committed."""
+        key = self.locate(content_hash)
+        try:
+            self.storage.touch(key)
+        except FileNotFoundError:
+            self.storage.put(key, source_path, move=True)
+        else:
+            os.unlink(source_path)
+        return key
+
+    def locate(self, content_hash: str) -> str:
+        """Return the storage key of content"""
+        if not _HASH_RE.match(content_hash):
+            raise ValueError(f'Invalid content hash: {content_hash}')
+        return f'{content_hash[:2]}/{content_hash[2:4]}/{content_hash}'
+
+    def hash_of(self, key: str) -> Optional[str]:
+        """Return the hash of the content stored under a key, or None for keys outside the store"""
+        content_hash = key.rsplit('/', 1)[-1]
+        if _HASH_RE.match(content_hash) and key == self.locate(content_hash):
+            return content_hash
+        return None
+
+    def exists(self, content_hash: str) -> bool:
+        return self.storage.exists(self.locate(content_hash))
+
+    def delete(self, content_hash: str):
+        self.storage.delete(self.locate(content_hash))
+
+    def iter_hashes(self, older_than: Optional[float] = None) -> Iterator[str]:
+        """Yield stored hashes, optionally only those stored before a timestamp"""
+        for key, modified in self.storage.list():
+            parts = key.split('/')
+            if len(parts) != 3 or not _HASH_RE.match(parts[2]) or key != self.locate(parts[2]):
+                continue
+            if older_than is not None and modified >= older_than:
+                continue
+            yield parts[2]
+
+
+class LocalContentStore(ContentStore):
+    """
+    Content store in a local directory
+    """
+    def __init__(self, root: str):
+        super().__init__(LocalStorage(root))
+
+
+_REFERENCE_COLUMNS = (UserDocument.file_path, UserDocument.thumbnail_path, UserDocument.original_path)
+
+
+def reference_count(store: ContentStore, content_hash: str) -> int:
+    """Number of documents referencing stored content"""
+    key = store.locate(content_hash)
+    return UserDocument.query.filter(db.or_(*(column == key for column in _REFERENCE_COLUMNS))).count()
+
+
+def collect_garbage(store: ContentStore, grace_period: int = 3600, batch_size: int = 500) -> List[str]:
+    """
+    Delete stored content that no UserDocument references.
+    Blobs newer than `grace_period` seconds are skipped so uploads whose
+    document row is not yet committed are never collected.
+    Returns the deleted hashes.
+    """
+    deleted = []
+    batch = []
+    for content_hash in store.iter_hashes(older_than=time.time() - grace_period):
+        batch.append(content_hash)
+        if len(batch) >= batch_size:
+            deleted.extend(_collect_batch(store, batch))
+            batch = []
+    if batch:
+        deleted.extend(_collect_batch(store, batch))
+    return deleted
+
+
+def migrate_legacy_paths(store: ContentStore, batch_size: int = 500) -> Dict[str, int]:
+    """
+    Rewrite UserDocument paths saved before uploads were addressed by storage
+    key (filesystem paths such as uploads/ab/cd/<hash> or
+    uploads/12_statement.pdf) to content store keys, copying files that are
+    not in the store yet. Legacy files are left in place; rows whose file is
+    gone are logged and left unchanged. Safe to rerun.
+    Returns counts of migrated and missing paths.
+    """
+    counts = {'migrated': 0, 'missing': 0}
+    keys = {}
+    for column in _REFERENCE_COLUMNS:
+        last_id = 0
+        while True:
+            rows = db.session.query(UserDocument.id, column).filter(
+                UserDocument.id > last_id, column.isnot(None), column != ''
+            ).order_by(UserDocument.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for document_id, path in rows:
+                if store.hash_of(path) is not None:
+                    continue
+                if path not in keys:
+                    keys[path] = _store_legacy_file(store, path)
+                if keys[path] is None:
+                    logger.warning('Document %s: legacy file %s not found', document_id, path)
+                    counts['missing'] += 1
+                    continue
+                values = {column.key: keys[path]}
+                if column is UserDocument.file_path:
+                    values['content_hash'] = db.func.coalesce(UserDocument.content_hash, store.hash_of(keys[path]))
+                db.session.execute(db.update(UserDocument).where(UserDocument.id == document_id).values(values))
+                counts['migrated'] += 1
+            db.session.commit()
+    return counts
+
+
+def get_content_store(app) -> ContentStore:
+    """Return the content store configured for an app"""
+    store = app.extensions.get('content_store')
+    if store is None:
+        store = ContentStore(get_storage(app, 'uploads'))
+        app.extensions['content_store'] = store
+    return store
+
+
+def init_app(app):
+    """Register the content store garbage collection command"""
+    @app.cli.command('collect-garbage')
+    @click.option('--grace-period', default=3600, help='Skip content stored within this many seconds')
+    def collect_garbage_command(grace_period):
+        """Delete stored documents no longer referenced"""
+        deleted = collect_garbage(get_content_store(app), grace_period=grace_period)
+        click.echo(f'Deleted {len(deleted)} unreferenced files')
+
+    @app.cli.command('migrate-document-paths')
+    def migrate_document_paths_command():
+        """Rewrite document file paths from before storage keys to content store keys"""
+        counts = migrate_legacy_paths(get_content_store(app))
+        click.echo(f"Migrated {counts['migrated']} paths, {counts['missing']} files missing")
+
+
+def _collect_batch(store: ContentStore, hashes: List[str]) -> List[str]:
+    keys = {store.locate(content_hash): content_hash for content_hash in hashes}
+    referenced = set()
+    for column in _REFERENCE_COLUMNS:
+        referenced.update(key for (key,) in db.session.query(column).filter(column.in_(keys)).distinct())
+    orphaned = [content_hash for key, content_hash in keys.items() if key not in referenced]
+    for content_hash in orphaned:
+        store.delete(content_hash)
+    return orphaned
+
+
+def _store_legacy_file(store: ContentStore, path: str) -> Optional[str]:
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    key = store.locate(digest.hexdigest())
+    try:
+        store.storage.touch(key)
+    except FileNotFoundError:
+        store.storage.put(key, path)
+    return key
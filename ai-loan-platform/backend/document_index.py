@@ -0,0 +1,135 @@
+from math import cos, pi
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from PIL import Image, ImageOps
+from sqlalchemy import or_
+
+from .models import db, DocumentFingerprint, UserDocument
+
+# pHash is computed from the 8x8 low-frequency DCT block of a 32x32 image
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+_DCT_COSINES = [
+    [cos((2 * x + 1) * u * pi / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(_DCT_KEEP)
+]
+
+# The 64-bit pHash is split into 4 bands of 16 bits. Two hashes within
+# Hamming distance 3 must agree exactly on at least one band, so indexed
+# band lookups find every near duplicate without scanning the table.
+BAND_COUNT = 4
+BAND_BITS = 64 // BAND_COUNT
+_BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    Compute a 64-bit DCT perceptual hash of an image.
+    Re-encoded, resized or lightly edited copies hash within a few bits.
+    """
+    image = ImageOps.exif_transpose(image).convert('L')
+    # reducing_gap box-filters large photos first, keeping this in milliseconds
+    image = image.resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS, reducing_gap=2.0)
+    pixels = list(image.getdata())
+    rows = [pixels[y * _DCT_SIZE:(y + 1) * _DCT_SIZE] for y in range(_DCT_SIZE)]
+
+    # Separable 2D DCT restricted to the low-frequency block
+    row_coefficients = [
+        [sum(p * c for p, c in zip(row, _DCT_COSINES[u])) for u in range(_DCT_KEEP)]
+        for row in rows
+    ]
+    coefficients = [
+        sum(row_coefficients[y][u] * _DCT_COSINES[v][y] for y in range(_DCT_SIZE))
+        for v in range(_DCT_KEEP)
+        for u in range(_DCT_KEEP)
+    ]
+
+    # Skip the DC term when choosing the threshold
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    value = 0
+    for coefficient in coefficients:
+        value = (value << 1) | (coefficient > median)
+    return value
+
+
+def hash_bands(phash: int) -> List[int]:
+    """Split a 64-bit hash into its LSH bands"""
+    return [(phash >> (BAND_BITS * i)) & _BAND_MASK for i in range(BAND_COUNT)]
+
+
+def hamming_distance(left: int, right: int) -> int:
+    return bin(left ^ right).count('1')
+
+
+class DocumentIndex:
+    """
+    Content and perceptual hash index over uploaded documents.
+    Exact reuse is found through the indexed UserDocument.content_hash column;
+    near-duplicate images through band lookups on DocumentFingerprint.
+    """
+    IMAGE_MIME_TYPES = {'image/jpeg', 'image/jpg', 'image/png'}
+
+    def __init__(self, max_distance: int = BAND_COUNT - 1, max_matches: int = 20):
+        self.max_distance = max_distance
+        self.max_matches = max_matches
+
+    def image_hash(self, source: Union[str, BinaryIO], mime_type: Optional[str]) -> Optional[int]:
+        """
+        Perceptual hash of an uploaded image given as a path or binary
+        stream, or None for other files
+        """
+        if mime_type not in self.IMAGE_MIME_TYPES:
+            return None
+        try:
+            with Image.open(source) as image:
+                image.draft('L', (_DCT_SIZE * 4, _DCT_SIZE * 4))  # fast JPEG downscale on decode
+                return perceptual_hash(image)
+        except Exception:
+            return None
+
+    def find_reuse(self, user_id: int, content_hash: str, phash: Optional[int] = None) -> Dict:
+        """
+        Find other users' documents with identical or near-identical content
+        """
+        exact = [
+            document_id for (document_id,) in db.session.query(UserDocument.id)
+            .filter(UserDocument.content_hash == content_hash, UserDocument.user_id != user_id)
+            .limit(self.max_matches)
+        ]
+
+        near = []
+        if phash is not None:
+            band_filters = [
+                getattr(DocumentFingerprint, f'band{i}') == band
+                for i, band in enumerate(hash_bands(phash))
+            ]
+            candidates = (
+                db.session.query(DocumentFingerprint.document_id, DocumentFingerprint.phash)
+                .filter(or_(*band_filters), DocumentFingerprint.user_id != user_id)
+            )
+            for document_id, candidate in candidates:
+                distance = hamming_distance(phash, int(candidate, 16))
+                if distance <= self.max_distance and document_id not in exact:
+                    near.append({'document_id': document_id, 'distance': distance})
+            near = sorted(near, key=lambda match: match['distance'])[:self.max_matches]
+
+        return {
+            'reuse_detected': bool(exact or near),
+            'exact_matches': exact,
+            'near_matches': near
+        }
+
+    def register(self, document: UserDocument, phash: Optional[int] = None):
+        """
+        Add a document's perceptual hash to the near-duplicate index.
+        The document must already have an id.
+        """
+        if phash is None:
+            return
+        bands = hash_bands(phash)
+        db.session.add(DocumentFingerprint(
+            document_id=document.id,
+            user_id=document.user_id,
+            phash=f'{phash:016x}',
+            **{f'band{i}': band for i, band in enumerate(bands)}
+        ))
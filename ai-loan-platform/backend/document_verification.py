@@ -6,27 +6,41 @@ import hashlib
 import base64
 import json
 
+from .statement_parser import BankStatementParser
+from .salary_slip_extractor import SalarySlipExtractor
+from .state_store import StateStore, create_state_store
+
 class DocumentVerification:
-    def __init__(self):
+    STATE_TTL = 600  # seconds a DigiLocker consent link stays valid
+
+    def __init__(self, state_store: Optional[StateStore] = None):
         # DigiLocker configuration
         self.digilocker_base_url = os.getenv('DIGILOCKER_BASE_URL', 'https://api.digitallocker.gov.in/public/oauth2/1/')
         self.digilocker_client_id = os.getenv('DIGILOCKER_CLIENT_ID')
         self.digilocker_client_secret = os.getenv('DIGILOCKER_CLIENT_SECRET')
         self.digilocker_redirect_uri = os.getenv('DIGILOCKER_REDIRECT_URI')
+        self.state_store = state_store or create_state_store()
 
         # eKYC configuration
         self.ekyc_base_url = os.getenv('EKYC_BASE_URL')
         self.ekyc_api_key = os.getenv('EKYC_API_KEY')
 
-    def generate_digilocker_auth_url(self) -> str:
+        # Document parsers
+        self.statement_parser = BankStatementParser()
+        self.salary_slip_extractor = SalarySlipExtractor()
+
+    def generate_digilocker_auth_url(self, user_id: Optional[int] = None) -> str:
         """
         Generate DigiLocker authorization URL for user consent
         """
+        state = self._generate_state_token()
+        self.state_store.put(state, {'user_id': user_id}, self.STATE_TTL)
+        
         params = {
             'response_type': 'code',
             'client_id': self.digilocker_client_id,
             'redirect_uri': self.digilocker_redirect_uri,
-            'state': self._generate_state_token(),
+            'state': state,
             'scope': 'aadhaar_pht pan_pht driving'
         }
         
@@ -35,11 +49,17 @@ class DocumentVerification:
         
         return auth_url
 
-    def handle_digilocker_callback(self, auth_code: str) -> Tuple[bool, Dict]:
+    def handle_digilocker_callback(self, auth_code: str, state: Optional[str] = None,
+                                   user_id: Optional[int] = None) -> Tuple[bool, Dict]:
         """
         Handle DigiLocker callback and fetch user documents
         """
         try:
+            # State tokens are single use and bound to the requesting user
+            issued = self.state_store.pop(state) if state else None
+            if issued is None or issued.get('user_id') != user_id:
+                return False, {'error': 'Invalid or expired state'}
+            
             # Exchange auth code for access token
             token_data = self._get_digilocker_token(auth_code)
             if not token_data.get('access_token'):
@@ -138,22 +158,12 @@ class DocumentVerification:
         Verify and analyze bank statement
         """
         try:
-            # Implement bank statement analysis logic here
-            # This could include:
-            # - Verifying file authenticity
-            # - Extracting transaction data
-            # - Analyzing income patterns
-            # - Checking for bounced checks
-            # For now, return a mock analysis
-            
-            return True, {
-                'verified': True,
-                'average_balance': 50000,
-                'monthly_credits': 75000,
-                'salary_credits_found': True,
-                'regular_income': True
-            }
-            
+            transactions = self.statement_parser.parse(file_path)
+            analysis = self.statement_parser.analyze(transactions)
+            analysis['verified'] = True
+
+            return True, analysis
+
         except Exception as e:
             return False, {'error': str(e)}
 
@@ -162,20 +172,12 @@ class DocumentVerification:
         Verify and analyze salary slip
         """
         try:
-            # Implement salary slip analysis logic here
-            # This could include:
-            # - OCR to extract text
-            # - Verifying employer details
-            # - Extracting salary components
-            # For now, return a mock analysis
-            
-            return True, {
-                'verified': True,
-                'gross_salary': 60000,
-                'net_salary': 48000,
-                'employer_verified': True
-            }
-            
+            slips = self.salary_slip_extractor.extract(file_path)
+            analysis = self.salary_slip_extractor.summarize(slips)
+            analysis['verified'] = True
+
+            return True, analysis
+
         except Exception as e:
             return False, {'error': str(e)}
 
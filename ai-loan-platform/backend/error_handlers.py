@@ -8,20 +8,25 @@ import os
 # Initialize blueprint
 errors = Blueprint('errors', __name__)
 
+class DeferredFileHandler(logging.FileHandler):
+    """File handler that creates its directory and opens the file on first record"""
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
 # Configure logging
 def setup_logging(app):
     """Configure application logging"""
-    log_folder = 'logs'
-    if not os.path.exists(log_folder):
-        os.makedirs(log_folder)
-    
-    log_file = os.path.join(log_folder, 'app.log')
+    log_file = os.path.join('logs', 'app.log')
     
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    file_handler = logging.FileHandler(log_file)
+    file_handler = DeferredFileHandler(log_file)
     file_handler.setFormatter(formatter)
     
     app.logger.addHandler(file_handler)
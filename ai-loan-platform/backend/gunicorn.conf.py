@@ -0,0 +1,28 @@
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Import the app and warm services once in the master; workers fork from it
+preload_app = True
+wsgi_app = 'backend.wsgi:app'
+
+
+def on_starting(server):
+    """Refuse to start several workers that would each keep their own OAuth state"""
+    from backend.state_store import require_shared_store
+
+    require_shared_store(server.cfg.workers)
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master and export payment metrics"""
+    from backend.models import db
+    from backend.payment_metrics import start_export
+    from backend.wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # The monitoring collector runs in its own process and reads these files
+    start_export()
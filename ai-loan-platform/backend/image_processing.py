@@ -0,0 +1,132 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from PIL import Image, ImageOps
+
+from .content_store import get_content_store
+from .models import db, UserDocument
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_MIME_TYPE = 'image/jpeg'
+
+
+class ImageProcessor:
+    """
+    Post-upload normalization of ID photos.
+    Images are downscaled to `max_dimension`, rotated upright from their EXIF
+    orientation, re-encoded as progressive JPEG without metadata, and given a
+    thumbnail. JPEGs are decoded at reduced scale via draft mode, so a 12 MP
+    photo is never fully decoded. Work runs on a thread pool, as Pillow
+    releases the GIL while decoding and encoding.
+    """
+    IMAGE_MIME_TYPES = {'image/jpeg', 'image/jpg', 'image/png'}
+
+    def __init__(self, max_dimension: int = 2048, quality: int = 82,
+                 thumbnail_size: int = 320, max_workers: int = 2):
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.thumbnail_size = thumbnail_size
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def submit(self, app, document_id: int) -> Future:
+        """
+        Process a document in the background
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='image-processing')
+            return self._executor.submit(self.process_document, app, document_id)
+
+    def process_document(self, app, document_id: int) -> bool:
+        """
+        Replace a stored image with its normalized version and add a thumbnail.
+        The original stays referenced only for document types listed in
+        KEEP_ORIGINAL_DOCUMENT_TYPES; otherwise it is left to garbage collection.
+        """
+        with app.app_context():
+            document = db.session.get(UserDocument, document_id)
+            if document is None or document.mime_type not in self.IMAGE_MIME_TYPES:
+                return False
+
+            store = get_content_store(app)
+            try:
+                with store.storage.local_path(document.file_path) as source, \
+                        tempfile.TemporaryDirectory() as work_dir:
+                    result = self.normalize(source, work_dir)
+                    image_key = store.put_file(result['image_path'], result['image_hash'])
+                    thumbnail_key = store.put_file(result['thumbnail_path'], result['thumbnail_hash'])
+            except Exception:
+                logger.exception('Image processing failed for document %s', document_id)
+                return False
+
+            if document.document_type in app.config.get('KEEP_ORIGINAL_DOCUMENT_TYPES', ()):
+                document.original_path = document.file_path
+            document.file_path = image_key
+            document.thumbnail_path = thumbnail_key
+            document.file_size = result['image_size']
+            document.mime_type = PROCESSED_MIME_TYPE
+            document.file_name = os.path.splitext(document.file_name or 'document')[0] + '.jpg'
+            db.session.commit()
+            return True
+
+    def normalize(self, source_path: str, output_dir: str) -> Dict:
+        """
+        Write a normalized JPEG and a thumbnail of an image into `output_dir`
+        """
+        with Image.open(source_path) as image:
+            # Decode JPEGs at the smallest scale that still covers max_dimension
+            image.draft('RGB', (self.max_dimension, self.max_dimension))
+            image = ImageOps.exif_transpose(image)
+            image = _to_rgb(image)
+            image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS, reducing_gap=3.0)
+
+            image_path = os.path.join(output_dir, 'image.jpg')
+            # Saving without exif= drops all metadata, including GPS tags
+            image.save(image_path, 'JPEG', quality=self.quality, optimize=True, progressive=True)
+
+            image.thumbnail((self.thumbnail_size, self.thumbnail_size), Image.LANCZOS, reducing_gap=2.0)
+            thumbnail_path = os.path.join(output_dir, 'thumbnail.jpg')
+            image.save(thumbnail_path, 'JPEG', quality=75, optimize=True)
+
+        return {
+            'image_path': image_path,
+            'image_hash': _file_hash(image_path),
+            'image_size': os.path.getsize(image_path),
+            'thumbnail_path': thumbnail_path,
+            'thumbnail_hash': _file_hash(thumbnail_path)
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Flatten transparency onto white and convert to RGB"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,7 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from .pii import mask_pii
+
 db = SQLAlchemy()
 
 class User(db.Model):
@@ -75,6 +78,8 @@ class LoanApplication(db.Model):
     pan_verified = db.Column(db.Boolean, default=False)
     income_verified = db.Column(db.Boolean, default=False)
     address_verified = db.Column(db.Boolean, default=False)
+    consistency_score = db.Column(db.Float)  # 0-1 match across documents
+    consistency_details = db.Column(db.JSON)
     
     # AI Assessment Results
     credit_score = db.Column(db.Integer)
@@ -94,6 +99,7 @@ class LoanApplication(db.Model):
     # Report Details
     report_generated = db.Column(db.Boolean, default=False)
     report_path = db.Column(db.String(255))
+    report_status = db.Column(db.String(20))  # pending, generating, completed, failed
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -106,16 +112,48 @@ class UserDocument(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     document_type = db.Column(db.String(50))  # aadhaar, pan, bank_statement, salary_slip
-    file_path = db.Column(db.String(255))
+    file_path = db.Column(db.String(255), index=True)
     file_name = db.Column(db.String(255))
     file_size = db.Column(db.Integer)
     mime_type = db.Column(db.String(100))
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the uploaded file
+    thumbnail_path = db.Column(db.String(255), index=True)
+    original_path = db.Column(db.String(255), index=True)  # kept only when policy requires
+    perceptual_hash = db.Column(db.String(16))  # 64-bit image pHash, hex
+    fraud_flags = db.Column(db.JSON)  # reuse matches found at upload
     is_verified = db.Column(db.Boolean, default=False)
     verification_method = db.Column(db.String(50))  # digilocker, manual_upload, ekyc
     verification_details = db.Column(db.JSON)
+    normalized_fields = db.Column(db.JSON)  # cached tokens for consistency checks
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     verified_at = db.Column(db.DateTime)
 
+class UploadSession(db.Model):
+    """Resumable upload session; chunks are staged until finalized"""
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    document_type = db.Column(db.String(50))
+    file_name = db.Column(db.String(255))
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received_size = db.Column(db.BigInteger, default=0)
+    staging_path = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='open')  # open, finalizing, completed, aborted, expired
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime)
+
+class DocumentFingerprint(db.Model):
+    """Perceptual hash bands for near-duplicate document lookup"""
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('user_document.id'), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    phash = db.Column(db.String(16), nullable=False)
+    band0 = db.Column(db.Integer, index=True)
+    band1 = db.Column(db.Integer, index=True)
+    band2 = db.Column(db.Integer, index=True)
+    band3 = db.Column(db.Integer, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Payment(db.Model):
     """Payment model for tracking report fee payments"""
     id = db.Column(db.Integer, primary_key=True)
@@ -128,9 +166,71 @@ class Payment(db.Model):
     status = db.Column(db.String(50))  # created, authorized, captured, failed
     payment_method = db.Column(db.String(50))
     payment_details = db.Column(db.JSON)
+    idempotency_key = db.Column(db.String(64))  # Idempotency-Key of the create-order request
+    refund_id = db.Column(db.String(100))
+    amount_refunded = db.Column(db.Float, default=0)
+    refunded_at = db.Column(db.DateTime)
+    receipt_path = db.Column(db.String(255))  # rendered receipt in report storage
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_payment_idempotency_key'),
+        db.Index('ix_payment_application_status', 'application_id', 'status'),
+    )
+
+class PaymentEvent(db.Model):
+    """Inbox of Razorpay webhook events, deduplicated by event id"""
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(64), unique=True, nullable=False)
+    event = db.Column(db.String(50), nullable=False)  # payment.captured, payment.failed, ...
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False, index=True)  # pending, processed, ignored, failed
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+
+class ReportJob(db.Model):
+    """Queued report generation; claimed and run by the report worker"""
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, db.ForeignKey('loan_application.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, completed, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    report_path = db.Column(db.String(255))
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_report_job_status_available', 'status', 'available_at'),)
+
+class RefundJob(db.Model):
+    """Bulk refund run; its items are refunded by the refund runner"""
+    id = db.Column(db.Integer, primary_key=True)
+    reason = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, completed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class RefundItem(db.Model):
+    """One payment to refund in a bulk refund job"""
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('refund_job.id'), nullable=False)
+    payment_ref = db.Column(db.Integer, db.ForeignKey('payment.id'), nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, processing, refunded, failed, skipped
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    refund_id = db.Column(db.String(100))
+    error = db.Column(db.Text)
+    processed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint('job_id', 'payment_ref', name='uq_refund_item_payment'),
+        db.Index('ix_refund_item_job_status', 'job_id', 'status'),
+    )
+
 class AuditLog(db.Model):
     """Audit log for tracking important actions"""
     id = db.Column(db.Integer, primary_key=True)
@@ -140,4 +240,9 @@ class AuditLog(db.Model):
     details = db.Column(db.JSON)
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.String(255))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @validates('details')
+    def _mask_details(self, key, details):
+        # Audit details are masked as they are written, so stored logs never hold raw PII
+        return mask_pii(details)
\ No newline at end of file
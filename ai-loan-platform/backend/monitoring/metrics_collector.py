@@ -7,8 +7,9 @@ import logging
 from pathlib import Path
 import threading
 import queue
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from .config_loader import load_monitoring_config
+from ..payment_metrics import PaymentMetrics
 
 @dataclass
 class SystemMetrics:
@@ -40,6 +41,7 @@ class CustomMetrics:
     average_processing_time: float
     active_users: int
     error_rate: float
+    payments: Dict[str, Any] = field(default_factory=dict)  # PaymentGateway funnel metrics
 
 class MetricsCollector:
     def __init__(self, config_path: Optional[str] = None):
@@ -103,16 +105,19 @@ class MetricsCollector:
 
     def collect_custom_metrics(self) -> CustomMetrics:
         """Collect custom business metrics"""
-        # This would typically integrate with your application's metrics
-        # For demonstration, using placeholder values
+        # Payment metrics are recorded by PaymentGateway in each app worker
+        # and exported to files this process merges; the loan figures are
+        # still placeholders
         try:
+            payments = PaymentMetrics.load().snapshot()
             return CustomMetrics(
                 timestamp=datetime.now().isoformat(),
                 loan_applications_count=0,
                 approval_rate=0.0,
                 average_processing_time=0.0,
                 active_users=0,
-                error_rate=0.0
+                error_rate=payments['provider_error_rate'],
+                payments=payments
             )
         except Exception as e:
             self.logger.error(f"Error collecting custom metrics: {str(e)}")
@@ -158,6 +163,7 @@ class MetricsCollector:
                 
                 # Check thresholds
                 self._check_thresholds(system_metrics, app_metrics)
+                self._check_payment_thresholds(custom_metrics)
                 
                 # Wait for next collection interval
                 time.sleep(self.config['monitoring']['interval'])
@@ -194,6 +200,28 @@ class MetricsCollector:
         elif system_metrics.disk_percent > thresholds['disk']['warning']:
             self.logger.warning(f"Disk usage high: {system_metrics.disk_percent}%")
 
+    def _check_payment_thresholds(self, custom_metrics: CustomMetrics):
+        """Check provider error rate and payment latency against thresholds"""
+        thresholds = self.config['monitoring']['thresholds']
+        
+        error_rate = thresholds.get('error_rate')
+        if error_rate:
+            if custom_metrics.error_rate > error_rate['critical']:
+                self.logger.critical(f"Payment provider error rate critical: {custom_metrics.error_rate:.2%}")
+            elif custom_metrics.error_rate > error_rate['warning']:
+                self.logger.warning(f"Payment provider error rate high: {custom_metrics.error_rate:.2%}")
+        
+        response_time = thresholds.get('api_response_time')
+        if response_time:
+            for operation, stats in custom_metrics.payments.get('operations', {}).items():
+                p99 = stats.get('p99')
+                if p99 is None:
+                    continue
+                if p99 > response_time['critical']:
+                    self.logger.critical(f"Payment {operation} p99 latency critical: <= {p99}s")
+                elif p99 > response_time['warning']:
+                    self.logger.warning(f"Payment {operation} p99 latency high: <= {p99}s")
+
     def start_collecting(self):
         """Start metrics collection"""
         self.collector_thread = threading.Thread(target=self.collect_metrics)
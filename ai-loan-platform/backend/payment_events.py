@@ -0,0 +1,265 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import threading
+
+import click
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, LoanApplication, Payment, PaymentEvent
+from .report_queue import enqueue_report
+
+logger = logging.getLogger(__name__)
+
+# Webhook events and the payment status they report
+EVENT_STATUS = {
+    'payment.authorized': 'authorized',
+    'payment.captured': 'captured',
+    'order.paid': 'captured',
+    'payment.failed': 'failed',
+    'refund.processed': 'refunded',
+}
+
+# Allowed payment status changes; anything else is a replay or arrived out of order.
+# authorized -> failed is only taken for the authorized payment itself, see
+# apply_payment_status.
+PAYMENT_TRANSITIONS = {
+    None: {'created', 'authorized', 'captured', 'failed'},
+    'created': {'authorized', 'captured', 'failed'},
+    'authorized': {'captured', 'failed', 'refunded'},
+    'failed': {'authorized', 'captured'},  # a later attempt on the same order succeeded
+    'captured': {'refunded'},
+    'refunded': set(),
+}
+
+# Payment statuses that pay for the report
+PAID_STATUSES = {'authorized', 'captured'}
+
+
+def record_event(body: bytes, payload: Dict[str, Any], event_id: Optional[str] = None) -> bool:
+    """
+    Add a webhook event to the inbox. Returns False if it was already
+    received; Razorpay redelivers events until it gets a 2xx response.
+    """
+    event_id = event_id or hashlib.sha256(body).hexdigest()
+    if PaymentEvent.query.filter_by(event_id=event_id).first() is not None:
+        return False
+    db.session.add(PaymentEvent(event_id=event_id, event=payload.get('event', ''), payload=payload))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # The same event was delivered concurrently
+        db.session.rollback()
+        return False
+    return True
+
+
+def apply_payment_status(payment: Payment, status: str, payment_id: Optional[str] = None,
+                         method: Optional[str] = None, details: Optional[Dict] = None) -> bool:
+    """
+    Move a payment, and its application, to `status` if the transition is
+    allowed. Returns False for replays and stale updates, which leave state
+    unchanged, so callers can apply the same update any number of times.
+    """
+    if status not in PAYMENT_TRANSITIONS.get(payment.status, set()):
+        return False
+    if (payment_id and payment.payment_id and payment_id != payment.payment_id
+            and payment.status in PAID_STATUSES):
+        # A late event for another attempt on the same order
+        return False
+
+    payment.status = status
+    if payment_id:
+        payment.payment_id = payment_id
+    if method:
+        payment.payment_method = method
+    if details is not None:
+        payment.payment_details = details
+
+    application = db.session.get(LoanApplication, payment.application_id)
+    if application is None:
+        return True
+    if status in PAID_STATUSES:
+        if application.payment_status != 'completed':
+            application.payment_status = 'completed'
+            application.payment_id = payment.payment_id
+            application.payment_amount = payment.amount
+            application.payment_date = datetime.utcnow()
+        if not application.report_generated and application.report_status is None:
+            enqueue_report(application)
+    elif status == 'failed' and application.payment_status != 'completed':
+        application.payment_status = 'failed'
+    elif status == 'refunded':
+        application.payment_status = 'refunded'
+    return True
+
+
+def parse_event(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Return the status an event reports and its payment entity.
+    Raises ValueError for events without one.
+    """
+    status = EVENT_STATUS[payload['event']]
+    entities = payload.get('payload') or {}
+    payment = (entities.get('payment') or {}).get('entity')
+    if not payment:
+        raise ValueError('Event has no payment entity')
+    if not payment.get('order_id') and not payment.get('id'):
+        raise ValueError('Payment entity has no order or payment id')
+    return status, payment
+
+
+class PaymentEventProcessor:
+    """
+    Applies inbox events to Payment and LoanApplication in batches.
+    A batch is claimed with conditional updates in the same transaction that
+    applies it, so a crashed worker leaves its events pending and concurrent
+    workers never apply an event twice. Payments and applications are loaded
+    with one query each. Replayed or out-of-order events are absorbed by
+    PAYMENT_TRANSITIONS, so processing is idempotent. Each event is applied
+    in its own savepoint; one that raises is marked failed and the rest of
+    the batch is still committed.
+    """
+    def __init__(self, app, batch_size: int = 100):
+        self.app = app
+        self.batch_size = batch_size
+
+    def claim(self, limit: int) -> List[PaymentEvent]:
+        """Mark up to `limit` pending events as processing, uncommitted, and return them"""
+        candidates = db.session.query(PaymentEvent.id).filter_by(
+            status='pending'
+        ).order_by(PaymentEvent.id).limit(limit).all()
+
+        claimed = []
+        for (event_id,) in candidates:
+            result = db.session.execute(
+                db.update(PaymentEvent)
+                .where(PaymentEvent.id == event_id, PaymentEvent.status == 'pending')
+                .values(status='processing', attempts=PaymentEvent.attempts + 1)
+            )
+            if result.rowcount == 1:
+                claimed.append(event_id)
+
+        if not claimed:
+            return []
+        return PaymentEvent.query.filter(PaymentEvent.id.in_(claimed)).order_by(PaymentEvent.id).all()
+
+    def process_batch(self) -> int:
+        """
+        Apply one batch of events. Returns the number of events handled.
+        """
+        with self.app.app_context():
+            events = self.claim(self.batch_size)
+            if not events:
+                db.session.rollback()
+                return 0
+
+            parsed = {}
+            for event in events:
+                if event.event not in EVENT_STATUS:
+                    event.status = 'ignored'
+                    continue
+                try:
+                    parsed[event.id] = parse_event(event.payload)
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning('Payment event %s is malformed: %s', event.event_id, e)
+                    event.status = 'failed'
+                    event.error = str(e)
+
+            payments = self._load_payments([entity for _, entity in parsed.values()])
+            now = datetime.utcnow()
+            for event in events:
+                if event.id not in parsed:
+                    event.processed_at = now
+                    continue
+                status, entity = parsed[event.id]
+                try:
+                    with db.session.begin_nested():
+                        payment = payments.get(entity.get('order_id')) or payments.get(entity.get('id'))
+                        created = payment is None
+                        if created:
+                            payment = self._payment_from_notes(entity)
+                            if payment is None:
+                                raise LookupError('Unknown order')
+                        apply_payment_status(payment, status, entity.get('id'), entity.get('method'), entity)
+                except Exception as e:
+                    if not isinstance(e, LookupError):
+                        logger.exception('Payment event %s could not be applied', event.event_id)
+                    event.status = 'failed'
+                    event.error = str(e)
+                else:
+                    if created:
+                        payments[payment.order_id] = payment
+                    event.status = 'processed'
+                event.processed_at = now
+
+            db.session.commit()
+            return len(events)
+
+    def run(self, poll_interval: float = 1.0, stop: Optional[threading.Event] = None):
+        """Process events until `stop` is set, sleeping while the inbox is empty"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                processed = self.process_batch()
+            except Exception:
+                # e.g. the database is unavailable; the uncommitted claim is
+                # rolled back with the app context, so the events stay pending
+                logger.exception('Payment event batch failed')
+                processed = 0
+            if not processed:
+                stop.wait(poll_interval)
+
+    def _load_payments(self, entities: List[Dict[str, Any]]) -> Dict[str, Payment]:
+        """Payments for a batch keyed by order id and by payment id"""
+        order_ids = {entity['order_id'] for entity in entities if entity.get('order_id')}
+        payment_ids = {entity['id'] for entity in entities if entity.get('id')}
+        if not order_ids and not payment_ids:
+            return {}
+        payments = Payment.query.filter(
+            db.or_(Payment.order_id.in_(order_ids), Payment.payment_id.in_(payment_ids))
+        ).all()
+
+        by_key = {}
+        for payment in payments:
+            by_key[payment.order_id] = payment
+            if payment.payment_id:
+                by_key[payment.payment_id] = payment
+        if payments:
+            # Load the applications the batch will touch in one query
+            LoanApplication.query.filter(
+                LoanApplication.id.in_({payment.application_id for payment in payments})
+            ).all()
+        return by_key
+
+    def _payment_from_notes(self, entity: Dict[str, Any]) -> Optional[Payment]:
+        """Create the Payment for an order placed before payments were recorded"""
+        notes = entity.get('notes') or {}
+        if not entity.get('order_id') or not notes.get('application_id') or not notes.get('user_id'):
+            return None
+        payment = Payment(
+            user_id=int(notes['user_id']),
+            application_id=int(notes['application_id']),
+            order_id=entity['order_id'],
+            amount=entity.get('amount', 0) / 100,
+            currency=entity.get('currency', 'INR'),
+            status='created'
+        )
+        db.session.add(payment)
+        return payment
+
+
+def init_app(app):
+    """Register the payment event worker command"""
+    @app.cli.command('payment-events')
+    @click.option('--batch-size', default=100, help='Events applied per transaction')
+    @click.option('--poll-interval', default=1.0, help='Seconds to wait when the inbox is empty')
+    @click.option('--once', is_flag=True, help='Process one batch and exit')
+    def payment_events_command(batch_size, poll_interval, once):
+        """Apply received Razorpay webhook events"""
+        processor = PaymentEventProcessor(app, batch_size=batch_size)
+        if once:
+            click.echo(f'Processed {processor.process_batch()} payment events')
+        else:
+            processor.run(poll_interval=poll_interval)
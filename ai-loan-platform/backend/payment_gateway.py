@@ -1,19 +1,131 @@
-import razorpay
 import os
-from typing import Dict, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import hmac
 import hashlib
 import json
+import threading
+import time
 from datetime import datetime
 
+from jinja2 import Environment
+
+from .payment_metrics import payment_metrics
+from .razorpay_client import create_client, get_session
+
+# Compiled once; receipts are rendered once per payment and then served from storage
+RECEIPT_TEMPLATE = Environment(autoescape=True).from_string('''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Receipt {{ receipt_number }}</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; color: #222; max-width: 640px; margin: 40px auto; }
+h1 { font-size: 20px; } table { width: 100%; border-collapse: collapse; }
+td { padding: 8px 0; border-bottom: 1px solid #eee; } td.value { text-align: right; }
+</style>
+</head>
+<body>
+<h1>Payment Receipt</h1>
+<table>
+<tr><td>Receipt number</td><td class="value">{{ receipt_number }}</td></tr>
+<tr><td>Date</td><td class="value">{{ date }}</td></tr>
+<tr><td>Description</td><td class="value">{{ description }}</td></tr>
+<tr><td>Application</td><td class="value">{{ customer_details.application_id }}</td></tr>
+<tr><td>Payment ID</td><td class="value">{{ payment_id }}</td></tr>
+<tr><td>Order ID</td><td class="value">{{ order_id }}</td></tr>
+<tr><td>Payment method</td><td class="value">{{ payment_method }}</td></tr>
+<tr><td>Status</td><td class="value">{{ status }}</td></tr>
+<tr><td><strong>Amount</strong></td><td class="value"><strong>&#8377;{{ '%.2f' | format(amount) }}</strong></td></tr>
+</table>
+</body>
+</html>
+''')
+
+class PaymentConfigurationError(RuntimeError):
+    """Raised when the gateway is created without the secrets it needs"""
+    pass
+
+class PaymentStatusCache:
+    """
+    Short-TTL cache of Razorpay payment entities with single-flight fetches:
+    concurrent lookups of the same payment share one upstream call. Payments
+    in a terminal status are kept until evicted, as they no longer change.
+    Errors are not cached.
+    """
+    # Razorpay payment statuses that never change again
+    TERMINAL_STATUSES = frozenset({'failed', 'refunded'})
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[str, Tuple[Optional[float], Dict]]' = OrderedDict()
+        self._inflight: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, payment_id: str, fetch: Callable[[str], Dict]) -> Dict:
+        with self._lock:
+            entry = self._entries.get(payment_id)
+            if entry is not None and (entry[0] is None or entry[0] > self.clock()):
+                self._entries.move_to_end(payment_id)
+                return entry[1]
+            call = self._inflight.get(payment_id)
+            leader = call is None
+            if leader:
+                call = self._inflight[payment_id] = {'done': threading.Event()}
+
+        if not leader:
+            call['done'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['payment']
+
+        try:
+            payment = fetch(payment_id)
+        except Exception as e:
+            call['error'] = e
+            raise
+        else:
+            call['payment'] = payment
+            expires_at = None if payment.get('status') in self.TERMINAL_STATUSES else self.clock() + self.ttl
+            with self._lock:
+                self._entries[payment_id] = (expires_at, payment)
+                self._entries.move_to_end(payment_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                self._inflight.pop(payment_id, None)
+            call['done'].set()
+        return payment
+
+    def invalidate(self, payment_id: str):
+        with self._lock:
+            self._entries.pop(payment_id, None)
+
 class PaymentGateway:
     def __init__(self):
-        self.client = razorpay.Client(
-            auth=(
-                os.getenv('RAZORPAY_KEY_ID'),
-                os.getenv('RAZORPAY_KEY_SECRET')
-            )
+        key_secret = os.getenv('RAZORPAY_KEY_SECRET')
+        if not key_secret:
+            raise PaymentConfigurationError('RAZORPAY_KEY_SECRET is not set; payment signatures cannot be verified')
+        # Keyed HMAC state is built once and copied per message
+        self._checkout_hmac = hmac.new(key_secret.encode(), digestmod=hashlib.sha256)
+        # Shared keep-alive session with timeouts, GET retries and latency histograms
+        self.session = get_session(
+            timeout=(float(os.getenv('RAZORPAY_CONNECT_TIMEOUT', 3.05)),
+                     float(os.getenv('RAZORPAY_READ_TIMEOUT', 10))),
+            max_retries=int(os.getenv('RAZORPAY_MAX_RETRIES', 2))
+        )
+        self.client = create_client(
+            os.getenv('RAZORPAY_KEY_ID'),
+            key_secret,
+            base_url=os.getenv('RAZORPAY_BASE_URL'),
+            session=self.session
         )
+        self.webhook_secret = os.getenv('RAZORPAY_WEBHOOK_SECRET')
+        self.status_cache = PaymentStatusCache(ttl=float(os.getenv('PAYMENT_STATUS_CACHE_TTL', 5)))
         self.report_fee = 120  # ₹120 fixed fee for the report
 
     def create_order(self, user_id: int, application_id: int) -> Tuple[bool, Dict]:
@@ -32,7 +144,8 @@ class PaymentGateway:
                 }
             }
             
-            order = self.client.order.create(data=order_data)
+            with payment_metrics.timed('create_order'):
+                order = self.client.order.create(data=order_data)
             
             return True, {
                 'order_id': order['id'],
@@ -48,6 +161,7 @@ class PaymentGateway:
         """
         Verify payment signature and update payment status
         """
+        start = time.perf_counter()
         try:
             # Extract payment details
             razorpay_order_id = payment_data.get('razorpay_order_id')
@@ -60,17 +174,20 @@ class PaymentGateway:
                 razorpay_payment_id,
                 razorpay_signature
             ):
+                _observe('verify_payment', start, 'declined')
                 return False, {'error': 'Invalid payment signature'}
             
             # Fetch payment details from Razorpay
-            payment = self.client.payment.fetch(razorpay_payment_id)
+            payment = self._fetch_payment(razorpay_payment_id)
             
             if payment['status'] != 'captured':
+                _observe('verify_payment', start, 'declined')
                 return False, {'error': 'Payment not captured'}
             
             # Extract application details from order notes
             application_id = payment.get('notes', {}).get('application_id')
             
+            _observe('verify_payment', start)
             return True, {
                 'payment_id': razorpay_payment_id,
                 'order_id': razorpay_order_id,
@@ -82,22 +199,61 @@ class PaymentGateway:
             }
             
         except Exception as e:
+            _observe('verify_payment', start, 'error')
             return False, {'error': str(e)}
 
+    def verify_checkout(self, payment_data: Dict) -> Tuple[bool, Dict]:
+        """
+        Verify the signature returned to the client by Checkout without calling
+        Razorpay; the final payment status arrives through the webhook
+        """
+        start = time.perf_counter()
+        order_id = payment_data.get('razorpay_order_id')
+        payment_id = payment_data.get('razorpay_payment_id')
+        signature = payment_data.get('razorpay_signature')
+        if not (order_id and payment_id and signature):
+            _observe('verify_payment', start, 'declined')
+            return False, {'error': 'Missing payment details'}
+        if not self._verify_signature(order_id, payment_id, signature):
+            _observe('verify_payment', start, 'declined')
+            return False, {'error': 'Invalid payment signature'}
+        _observe('verify_payment', start)
+        return True, {'order_id': order_id, 'payment_id': payment_id}
+
+    @property
+    def webhook_secret(self) -> Optional[str]:
+        return self._webhook_secret
+
+    @webhook_secret.setter
+    def webhook_secret(self, secret: Optional[str]):
+        self._webhook_secret = secret
+        self._webhook_hmac = hmac.new(secret.encode(), digestmod=hashlib.sha256) if secret else None
+
+    def verify_webhook_signature(self, body: bytes, signature: str) -> bool:
+        """
+        Verify the X-Razorpay-Signature of a webhook request body
+        """
+        if self._webhook_hmac is None or not isinstance(signature, str):
+            return False
+        return _signature_matches(self._webhook_hmac, body, signature)
+
+    def verify_webhook_signatures(self, deliveries: Iterable[Tuple[bytes, str]]) -> List[bool]:
+        """
+        Verify a burst of (body, signature) webhook deliveries, in order
+        """
+        if self._webhook_hmac is None:
+            return [False for _ in deliveries]
+        template = self._webhook_hmac
+        return [isinstance(signature, str) and _signature_matches(template, body, signature)
+                for body, signature in deliveries]
+
     def _verify_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
         """
         Verify Razorpay payment signature
         """
-        key_secret = os.getenv('RAZORPAY_KEY_SECRET')
-        msg = f'{order_id}|{payment_id}'
-        
-        generated_signature = hmac.new(
-            key_secret.encode(),
-            msg.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        return hmac.compare_digest(generated_signature, signature)
+        if not isinstance(signature, str):
+            return False
+        return _signature_matches(self._checkout_hmac, f'{order_id}|{payment_id}'.encode(), signature)
 
     def refund_payment(self, payment_id: str, amount: int = None) -> Tuple[bool, Dict]:
         """
@@ -108,7 +264,9 @@ class PaymentGateway:
             if amount:
                 refund_data['amount'] = amount * 100  # Convert to paise
             
-            refund = self.client.payment.refund(payment_id, refund_data)
+            with payment_metrics.timed('refund'):
+                refund = self.client.payment.refund(payment_id, refund_data)
+            self.status_cache.invalidate(payment_id)
             
             return True, {
                 'refund_id': refund['id'],
@@ -123,10 +281,11 @@ class PaymentGateway:
 
     def get_payment_status(self, payment_id: str) -> Tuple[bool, Dict]:
         """
-        Get current status of a payment
+        Get current status of a payment; repeated lookups within
+        PAYMENT_STATUS_CACHE_TTL seconds share one Razorpay call
         """
         try:
-            payment = self.client.payment.fetch(payment_id)
+            payment = self.status_cache.get(payment_id, self._fetch_payment)
             
             return True, {
                 'payment_id': payment['id'],
@@ -140,20 +299,39 @@ class PaymentGateway:
         except Exception as e:
             return False, {'error': str(e)}
 
+    def _fetch_payment(self, payment_id: str) -> Dict:
+        with payment_metrics.timed('fetch'):
+            return self.client.payment.fetch(payment_id)
+
     def generate_payment_receipt(self, payment_data: Dict) -> Dict:
         """
         Generate payment receipt data
         """
         return {
             'receipt_number': f"RCP-{payment_data['payment_id'][-8:]}",
-            'date': datetime.now().strftime('%Y-%m-%d'),
+            'date': payment_data.get('date') or datetime.now().strftime('%Y-%m-%d'),
             'amount': payment_data['amount'],
             'payment_id': payment_data['payment_id'],
             'order_id': payment_data['order_id'],
             'payment_method': payment_data.get('payment_method', 'Online'),
             'description': 'Loan Assessment Report Fee',
-            'status': 'Paid',
+            'status': 'Refunded' if payment_data.get('status') == 'refunded' else 'Paid',
             'customer_details': {
                 'application_id': payment_data.get('application_id')
             }
-        }
\ No newline at end of file
+        }
+
+    def render_payment_receipt(self, receipt: Dict) -> bytes:
+        """
+        Render receipt data from generate_payment_receipt as an HTML document
+        """
+        return RECEIPT_TEMPLATE.render(**receipt).encode('utf-8')
+
+def _observe(operation: str, start: float, outcome: str = 'ok'):
+    payment_metrics.observe(operation, time.perf_counter() - start, outcome)
+
+def _signature_matches(template, message: bytes, signature: str) -> bool:
+    """Compare `signature` with the HMAC of `message` under the template's key"""
+    mac = template.copy()
+    mac.update(message)
+    return hmac.compare_digest(mac.hexdigest().encode(), signature.encode())
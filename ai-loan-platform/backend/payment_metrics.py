@@ -0,0 +1,164 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence
+import atexit
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .razorpay_client import DEFAULT_BUCKETS, LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Operations PaymentGateway reports, in funnel order
+OPERATIONS = ('create_order', 'verify_payment', 'fetch', 'refund')
+
+# Outcomes of an operation: it worked, the provider or input said no, or it raised
+OUTCOMES = ('ok', 'declined', 'error')
+
+# Where each worker process writes its counts for the monitoring collector
+DEFAULT_EXPORT_DIR = 'logs/metrics/payments'
+
+
+class PaymentMetrics:
+    """
+    Process-wide payment funnel metrics: a latency histogram and outcome
+    counters per operation. Recording costs a bisect and a lock, so it is
+    done on every call. Each app worker exports its counts to a file of its
+    own; the monitoring collector, a separate process, merges the files.
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = {operation: LatencyHistogram(buckets) for operation in OPERATIONS}
+        self._outcomes = {operation: dict.fromkeys(OUTCOMES, 0) for operation in OPERATIONS}
+        self._lock = threading.Lock()
+
+    def observe(self, operation: str, seconds: float, outcome: str = 'ok'):
+        self.histograms[operation].observe(seconds, error=outcome == 'error')
+        with self._lock:
+            self._outcomes[operation][outcome] += 1
+
+    @contextmanager
+    def timed(self, operation: str) -> Iterator[None]:
+        """Time the block; it counts as an error if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.observe(operation, time.perf_counter() - start, 'error')
+            raise
+        self.observe(operation, time.perf_counter() - start)
+
+    def state(self) -> Dict[str, Any]:
+        """Raw counts, for export to another process"""
+        with self._lock:
+            outcomes = {operation: dict(counts) for operation, counts in self._outcomes.items()}
+        return {
+            'buckets': list(self.buckets),
+            'histograms': {operation: histogram.state() for operation, histogram in self.histograms.items()},
+            'outcomes': outcomes,
+        }
+
+    def merge(self, state: Dict[str, Any]):
+        """Add counts exported by state()"""
+        if tuple(state['buckets']) != self.buckets:
+            raise ValueError('Histogram buckets differ')
+        for operation, histogram_state in state['histograms'].items():
+            self.histograms[operation].merge(histogram_state)
+        with self._lock:
+            for operation, counts in state['outcomes'].items():
+                for outcome, count in counts.items():
+                    self._outcomes[operation][outcome] += count
+
+    def export(self, directory: Optional[str] = None) -> str:
+        """Atomically write this process's counts to payments-<pid>.json and return the path"""
+        directory = directory or export_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'payments-{os.getpid()}.json')
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.payments-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.state(), f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, directory: Optional[str] = None) -> 'PaymentMetrics':
+        """
+        Merge the counts every worker exported. Files of exited workers are
+        kept, so totals stay cumulative across worker restarts.
+        """
+        metrics = cls()
+        for path in sorted(glob.glob(os.path.join(directory or export_dir(), 'payments-*.json'))):
+            try:
+                with open(path) as f:
+                    metrics.merge(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning('Skipping payment metrics file %s: %s', path, e)
+        return metrics
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Per-operation histograms, outcomes and p50/p99 bounds, with the
+        capture rate (verified / created orders) and the provider error rate
+        """
+        with self._lock:
+            outcomes = {operation: dict(counts) for operation, counts in self._outcomes.items()}
+        operations = {}
+        for operation, histogram in self.histograms.items():
+            operations[operation] = {
+                **histogram.snapshot(),
+                'outcomes': outcomes[operation],
+                'p50': histogram.quantile(0.5),
+                'p99': histogram.quantile(0.99),
+            }
+
+        created = outcomes['create_order']['ok']
+        calls = sum(operations[operation]['count'] for operation in OPERATIONS)
+        errors = sum(operations[operation]['errors'] for operation in OPERATIONS)
+        return {
+            'operations': operations,
+            'capture_rate': outcomes['verify_payment']['ok'] / created if created else 0.0,
+            'provider_error_rate': errors / calls if calls else 0.0,
+        }
+
+
+payment_metrics = PaymentMetrics()
+
+
+def export_dir() -> str:
+    """Directory shared by the app workers and the monitoring collector"""
+    return os.getenv('PAYMENT_METRICS_DIR', DEFAULT_EXPORT_DIR)
+
+
+def start_export(interval: float = 10.0, directory: Optional[str] = None) -> threading.Thread:
+    """
+    Export this process's payment metrics every `interval` seconds and at
+    exit. Call once per worker process, after the fork.
+    """
+    stop = threading.Event()
+
+    def export():
+        try:
+            payment_metrics.export(directory)
+        except OSError as e:
+            logger.warning('Could not export payment metrics: %s', e)
+
+    def run():
+        while not stop.wait(interval):
+            export()
+
+    def final_export():
+        stop.set()
+        export()
+
+    thread = threading.Thread(target=run, name='payment-metrics-export', daemon=True)
+    thread.start()
+    atexit.register(final_export)
+    return thread
@@ -0,0 +1,47 @@
+from typing import Any, Callable, Dict
+
+
+def mask_aadhaar(aadhaar: str) -> str:
+    """Mask Aadhaar number for display"""
+    return 'XXXX-XXXX-' + str(aadhaar)[-4:]
+
+
+def mask_pan(pan: str) -> str:
+    """Mask PAN number for display"""
+    pan = str(pan)
+    return pan[:2] + '*' * max(len(pan) - 6, 0) + pan[-4:]
+
+
+# Declared PII fields and how to mask them; all maskers are idempotent
+PII_FIELDS: Dict[str, Callable[[Any], str]] = {
+    'aadhaar_number': mask_aadhaar,
+    'aadhaar': mask_aadhaar,
+    'pan_number': mask_pan,
+    'pan': mask_pan,
+}
+
+
+def mask_fields(record: Dict[str, Any], fields: Dict[str, Callable] = PII_FIELDS) -> Dict[str, Any]:
+    """Mask declared fields of a flat dict in place and return it"""
+    for name, mask in fields.items():
+        value = record.get(name)
+        if value:
+            record[name] = mask(value)
+    return record
+
+
+def mask_pii(value: Any, fields: Dict[str, Callable] = PII_FIELDS) -> Any:
+    """Copy of a nested dict/list structure with declared fields masked, in one pass"""
+    if isinstance(value, dict):
+        masked = {}
+        for key, item in value.items():
+            mask = fields.get(key)
+            if mask is not None and item and not isinstance(item, (dict, list)):
+                masked[key] = mask(item)
+            else:
+                masked[key] = mask_pii(item, fields)
+        return masked
+    if isinstance(value, list):
+        return [mask_pii(item, fields) for item in value]
+    return value
+
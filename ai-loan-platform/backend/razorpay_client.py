@@ -0,0 +1,155 @@
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import re
+import threading
+import time
+
+import razorpay
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Razorpay entity ids (pay_..., order_..., rfnd_...) in a request path
+_ENTITY_ID_RE = re.compile(r'/[a-z]+_[A-Za-z0-9]+')
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram; cheap to update from many threads
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            if error:
+                self._errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, or None if empty"""
+        with self._lock:
+            counts = list(self._counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def state(self) -> Dict:
+        """Raw per-bucket counts, sum and errors, for export and merge"""
+        with self._lock:
+            return {'counts': list(self._counts), 'sum': self._sum, 'errors': self._errors}
+
+    def merge(self, state: Dict):
+        """Add the counts of another histogram's state() with the same buckets"""
+        if len(state['counts']) != len(self._counts):
+            raise ValueError('Histogram buckets differ')
+        with self._lock:
+            self._counts = [mine + theirs for mine, theirs in zip(self._counts, state['counts'])]
+            self._sum += state['sum']
+            self._errors += state['errors']
+
+    def snapshot(self) -> Dict:
+        """Counts per bucket (cumulative, Prometheus style), total, sum and errors"""
+        with self._lock:
+            counts = list(self._counts)
+            total_seconds = self._sum
+            errors = self._errors
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            running += count
+            cumulative['+Inf' if bound == float('inf') else bound] = running
+        return {'count': running, 'sum': total_seconds, 'errors': errors, 'buckets': cumulative}
+
+
+class RazorpaySession(requests.Session):
+    """
+    Keep-alive session for Razorpay API calls.
+    Every request gets a (connect, read) timeout unless one is given, idempotent
+    GETs are retried with backoff on connection errors, 429 and 5xx, and each
+    call's latency is recorded per endpoint, e.g. 'GET /v1/payments/{id}'.
+    Read timeouts are not retried: a stalled provider would only stall the
+    caller for longer.
+    """
+    def __init__(self, timeout: Tuple[float, float] = (3.05, 10.0), max_retries: int = 2,
+                 backoff_factor: float = 0.2, pool_maxsize: int = 10):
+        super().__init__()
+        self.timeout = timeout
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._histograms_lock = threading.Lock()
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=False,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=2, pool_maxsize=pool_maxsize)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        histogram = self.histogram(f'{method.upper()} {_ENTITY_ID_RE.sub("/{id}", urlsplit(url).path)}')
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            histogram.observe(time.perf_counter() - start, error=True)
+            raise
+        histogram.observe(time.perf_counter() - start, error=response.status_code >= 500)
+        return response
+
+    def histogram(self, endpoint: str) -> LatencyHistogram:
+        histogram = self.histograms.get(endpoint)
+        if histogram is None:
+            with self._histograms_lock:
+                histogram = self.histograms.setdefault(endpoint, LatencyHistogram())
+        return histogram
+
+    def latency_snapshot(self) -> Dict[str, Dict]:
+        return {endpoint: histogram.snapshot() for endpoint, histogram in list(self.histograms.items())}
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(**session_kwargs) -> RazorpaySession:
+    """
+    Process-wide Razorpay session. Connections are only opened on first use,
+    so a session created in a pre-fork master carries no sockets into workers.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = RazorpaySession(**session_kwargs)
+    return _session
+
+
+def create_client(key_id: Optional[str], key_secret: Optional[str], base_url: Optional[str] = None,
+                  session: Optional[requests.Session] = None) -> razorpay.Client:
+    """Razorpay client using the shared session; `base_url` points it at a fake server"""
+    options = {'base_url': base_url.rstrip('/')} if base_url else {}
+    return razorpay.Client(session=session or get_session(), auth=(key_id, key_secret), **options)
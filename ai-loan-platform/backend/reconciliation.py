@@ -0,0 +1,203 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List
+import csv
+import json
+import os
+import tempfile
+
+import click
+
+from .models import db, Payment
+from .storage import Storage, get_storage
+
+# Local payment statuses that mean Razorpay holds the money
+SETTLED_STATUSES = {'authorized', 'captured', 'refunded'}
+
+REPORT_FIELDS = ['kind', 'payment_id', 'order_id', 'local_status', 'provider_status',
+                 'local_amount', 'provider_amount']
+
+
+def iter_provider_payments(client, start: datetime, end: datetime,
+                           page_size: int = 100) -> Iterator[Dict[str, Any]]:
+    """Page through Razorpay payments created in [start, end); naive datetimes are UTC"""
+    skip = 0
+    while True:
+        page = client.payment.all({
+            'from': _epoch(start),
+            'to': _epoch(end) - 1,
+            'count': page_size,
+            'skip': skip
+        })
+        items = page.get('items', [])
+        yield from items
+        if len(items) < page_size:
+            return
+        skip += page_size
+
+
+def _epoch(moment: datetime) -> int:
+    # timestamp() reads naive datetimes as server local time
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def iter_fixture(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read provider payments from an export: JSON lines of payment entities,
+    or a CSV with id, order_id, amount (paise) and status columns
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                row['amount'] = int(row['amount'])
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _local_payments(start: datetime, end: datetime, key, batch_size: int) -> Iterator[Payment]:
+    """Payments in the window ordered by `key`, streamed in batches"""
+    query = db.select(Payment).where(
+        key.isnot(None),
+        Payment.created_at >= start,
+        Payment.created_at < end
+    ).order_by(_binary_order(key, db.session.get_bind().dialect.name)).execution_options(yield_per=batch_size)
+    return iter(db.session.execute(query).scalars())
+
+
+def _binary_order(key, dialect: str):
+    """
+    Order by code point, as Python compares the provider ids. A locale
+    collation such as en_US.UTF-8 sorts case and '_' differently, which
+    would throw the merge-join out of step.
+    """
+    if dialect == 'postgresql':
+        return key.collate('C')
+    if dialect in ('mysql', 'mariadb'):
+        return key.collate('utf8mb4_bin')
+    # SQLite compares with BINARY unless told otherwise
+    return key
+
+
+def _merge_join(provider: List[Dict[str, Any]], local: Iterator[Payment], provider_key: str,
+                local_key: str, on_match, on_local_only) -> List[Dict[str, Any]]:
+    """
+    Walk two streams sorted on the same key, calling `on_match` for pairs and
+    `on_local_only` for local rows; returns the provider records left over
+    """
+    unmatched = []
+    remote = iter(provider)
+    record = next(remote, None)
+    for payment in local:
+        value = getattr(payment, local_key)
+        while record is not None and record[provider_key] < value:
+            unmatched.append(record)
+            record = next(remote, None)
+        if record is not None and record[provider_key] == value:
+            on_match(payment, record)
+            record = next(remote, None)
+        else:
+            on_local_only(payment)
+    if record is not None:
+        unmatched.append(record)
+        unmatched.extend(remote)
+    return unmatched
+
+
+def reconcile(provider_payments: Iterable[Dict[str, Any]], start: datetime, end: datetime,
+              batch_size: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Compare provider payments against Payment rows created in [start, end)
+    and return the mismatches.
+
+    Provider records are sorted in memory; local rows are streamed in
+    payment_id order and merge-joined against them, so the database sees one
+    ordered range scan instead of a query per payment. Provider payments our
+    callback never saw (no local payment_id) get a second merge on order_id.
+    """
+    mismatches = []
+
+    def row(kind, payment=None, record=None):
+        return {
+            'kind': kind,
+            'payment_id': record['id'] if record else payment.payment_id,
+            'order_id': record.get('order_id') if record else payment.order_id,
+            'local_status': payment.status if payment else None,
+            'provider_status': record.get('status') if record else None,
+            'local_amount': payment.amount if payment else None,
+            'provider_amount': record['amount'] / 100 if record else None,
+        }
+
+    def compare(payment, record):
+        if record['status'] == 'failed' and payment.status not in SETTLED_STATUSES:
+            return
+        if _provider_status(record) != payment.status:
+            mismatches.append(row('status_mismatch', payment, record))
+        elif abs(record['amount'] / 100 - payment.amount) >= 0.005:
+            mismatches.append(row('amount_mismatch', payment, record))
+
+    def local_only(payment):
+        if payment.status in SETTLED_STATUSES:
+            mismatches.append(row('missing_at_provider', payment))
+
+    provider = sorted((r for r in provider_payments if r.get('id')), key=lambda r: r['id'])
+    unmatched = _merge_join(provider, _local_payments(start, end, Payment.payment_id, batch_size),
+                            'id', 'payment_id', compare, local_only)
+
+    by_order = sorted((r for r in unmatched if r.get('order_id')), key=lambda r: r['order_id'])
+    orphans = [r for r in unmatched if not r.get('order_id')]
+    unclaimed_orders = _local_payments(start, end, Payment.order_id, batch_size)
+    orphans += _merge_join(by_order, (p for p in unclaimed_orders if p.payment_id is None),
+                           'order_id', 'order_id', compare, lambda payment: None)
+
+    for record in orphans:
+        if record.get('status') in ('captured', 'refunded'):
+            mismatches.append(row('missing_locally', record=record))
+    return mismatches
+
+
+def _provider_status(record: Dict[str, Any]) -> str:
+    # A partially refunded payment is still 'captured' at Razorpay
+    if record['status'] == 'captured' and record.get('amount_refunded'):
+        return 'refunded'
+    return record['status']
+
+
+def write_report(mismatches: List[Dict[str, Any]], storage: Storage, key: str) -> str:
+    """Store mismatches as CSV under `key` and return the key"""
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(mismatches)
+        storage.put(key, path, move=True)
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+    return key
+
+
+def init_app(app):
+    """Register the payment reconciliation command"""
+    @app.cli.command('reconcile-payments')
+    @click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']), required=True,
+                  help='First day of the window (UTC)')
+    @click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']), required=True,
+                  help='Day after the window (UTC)')
+    @click.option('--fixture', type=click.Path(exists=True, dir_okay=False),
+                  help='Read provider payments from an export instead of the API')
+    def reconcile_payments_command(start, end, fixture):
+        """Compare payments with Razorpay and store a mismatch report"""
+        if fixture:
+            provider_payments = iter_fixture(fixture)
+        else:
+            from .routes import payment_gateway
+            provider_payments = iter_provider_payments(payment_gateway.client, start, end)
+        mismatches = reconcile(provider_payments, start, end)
+        key = f'reconciliation/reconciliation_{start:%Y%m%d}_{end:%Y%m%d}.csv'
+        write_report(mismatches, get_storage(app, 'reports'), key)
+        click.echo(f'{len(mismatches)} mismatches written to {key}')
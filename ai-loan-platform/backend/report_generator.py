@@ -4,28 +4,32 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.pdfgen import canvas
-from typing import Dict, List
+from typing import Dict, List, Optional
 import os
+import tempfile
 from datetime import datetime
 import json
 
+from .storage import LocalStorage, Storage
+
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, storage: Optional[Storage] = None):
         self.styles = getSampleStyleSheet()
         self.report_folder = "reports"
-        
-        # Create reports directory if it doesn't exist
-        if not os.path.exists(self.report_folder):
-            os.makedirs(self.report_folder)
+        self.storage = storage or LocalStorage(self.report_folder)
 
-    def generate_report(self, application_data: Dict, assessment_data: Dict) -> str:
+    def generate_report(self, application_data: Dict, assessment_data: Dict,
+                        storage: Optional[Storage] = None) -> str:
         """
         Generate a detailed PDF report for the loan assessment
-        Returns the path to the generated PDF file
+        Returns the storage key of the generated PDF file
         """
+        storage = storage or self.storage
+        
         # Create filename
         filename = f"loan_report_{application_data['id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        filepath = os.path.join(self.report_folder, filename)
+        fd, filepath = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
         
         # Create PDF document
         doc = SimpleDocTemplate(
@@ -58,10 +62,15 @@ class ReportGenerator:
         # Add disclaimer
         self._add_disclaimer(story)
         
-        # Build PDF
-        doc.build(story)
+        # Build PDF, then hand it to storage
+        try:
+            doc.build(story)
+            storage.put(filename, filepath, move=True)
+        finally:
+            if os.path.exists(filepath):
+                os.unlink(filepath)
         
-        return filepath
+        return filename
 
     def _add_header(self, story: List):
         """Add report header"""
@@ -0,0 +1,225 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import threading
+
+import click
+
+from .models import db, LoanApplication, ReportJob
+from .storage import create_storage
+
+logger = logging.getLogger(__name__)
+
+# Per-process generator, built once in each pool worker
+_generator = None
+
+
+def enqueue_report(application: LoanApplication) -> ReportJob:
+    """
+    Queue report generation for an application. The job is added to the
+    current session, so it is committed together with the caller's changes.
+    """
+    job = ReportJob(application_id=application.id)
+    db.session.add(job)
+    application.report_status = 'pending'
+    return job
+
+
+def application_data(application: LoanApplication) -> Dict[str, Any]:
+    """
+    Set column values of an application as a plain, picklable dict; unset
+    columns are left out so the assessment falls back to its defaults
+    """
+    data = {}
+    for column in LoanApplication.__table__.columns:
+        value = getattr(application, column.key)
+        if value is not None:
+            data[column.key] = value
+    return data
+
+
+def render_report(data: Dict[str, Any], storage_url: Optional[str], report_folder: str) -> str:
+    """
+    Build the assessment and PDF for an application in a pool worker.
+    Returns the storage key of the report.
+    """
+    global _generator
+    from .loan_assessment import LoanAssessment
+    from .report_generator import ReportGenerator
+
+    if _generator is None:
+        _generator = ReportGenerator(create_storage(storage_url, report_folder, 'reports'))
+    assessment = LoanAssessment().generate_report_data(data)
+    return _generator.generate_report(data, assessment)
+
+
+class ReportWorker:
+    """
+    Runs queued report jobs on a process pool, as reportlab is CPU-bound.
+    Jobs are claimed from the report_job table with a conditional update, so
+    several workers can share the queue; a job left running longer than
+    `stale_after` seconds by a crashed worker is put back. Failed jobs are
+    retried with a linear backoff up to `max_attempts`.
+    """
+    def __init__(self, app, processes: Optional[int] = None, max_attempts: int = 3,
+                 retry_delay: int = 30, stale_after: int = 600,
+                 storage_url: Optional[str] = None, report_folder: Optional[str] = None,
+                 executor: Optional[Executor] = None):
+        self.app = app
+        self.processes = processes or os.cpu_count() or 1
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.stale_after = stale_after
+        self.storage_url = storage_url if storage_url is not None else app.config.get('STORAGE_URL')
+        self.report_folder = report_folder or app.config['REPORT_FOLDER']
+        self._executor = executor
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        return self._executor
+
+    def claim(self, limit: int, now: Optional[datetime] = None) -> List[ReportJob]:
+        """
+        Mark up to `limit` due jobs as running and return them
+        """
+        now = now or datetime.utcnow()
+        candidates = db.session.query(ReportJob.id).filter(
+            ReportJob.status == 'pending',
+            ReportJob.available_at <= now
+        ).order_by(ReportJob.id).limit(limit).all()
+
+        claimed = []
+        for (job_id,) in candidates:
+            result = db.session.execute(
+                db.update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status == 'pending')
+                .values(status='running', started_at=now, attempts=ReportJob.attempts + 1)
+            )
+            if result.rowcount == 1:
+                claimed.append(job_id)
+        db.session.commit()
+
+        if not claimed:
+            return []
+        jobs = ReportJob.query.filter(ReportJob.id.in_(claimed)).order_by(ReportJob.id).all()
+        LoanApplication.query.filter(
+            LoanApplication.id.in_([job.application_id for job in jobs])
+        ).update({'report_status': 'generating'}, synchronize_session=False)
+        db.session.commit()
+        return jobs
+
+    def requeue_stale(self, now: Optional[datetime] = None) -> int:
+        """Put back jobs whose worker stopped before finishing them"""
+        now = now or datetime.utcnow()
+        count = ReportJob.query.filter(
+            ReportJob.status == 'running',
+            ReportJob.started_at < now - timedelta(seconds=self.stale_after)
+        ).update({'status': 'pending', 'available_at': now}, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def run_once(self) -> int:
+        """
+        Claim a batch of jobs, render them on the pool and record the results.
+        Returns the number of jobs processed.
+        """
+        with self.app.app_context():
+            self.requeue_stale()
+            jobs = self.claim(self.processes * 2)
+            if not jobs:
+                return 0
+
+            futures = {}
+            broken = False
+            for job in jobs:
+                application = db.session.get(LoanApplication, job.application_id)
+                if application is None:
+                    self._fail(job, 'Application not found', retry=False)
+                    continue
+                try:
+                    future = self.executor.submit(render_report, application_data(application),
+                                                  self.storage_url, self.report_folder)
+                except BrokenProcessPool as e:
+                    broken = True
+                    self._fail(job, f'Report pool broken: {e}')
+                    continue
+                futures[future] = job
+
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    self._complete(job, future.result())
+                except BrokenProcessPool as e:
+                    # A pool process died, e.g. killed for memory; the job itself may be fine
+                    broken = True
+                    self._fail(job, f'Report pool broken: {e}')
+                except Exception as e:
+                    logger.exception('Report generation failed for application %s', job.application_id)
+                    self._fail(job, str(e))
+
+            if broken:
+                logger.error('Report process pool broke; starting a new one')
+                self.shutdown(wait=False)
+            return len(jobs)
+
+    def run(self, poll_interval: float = 1.0, stop: Optional[threading.Event] = None):
+        """Process jobs until `stop` is set, sleeping while the queue is empty"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if not self.run_once():
+                stop.wait(poll_interval)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _complete(self, job: ReportJob, report_path: str):
+        now = datetime.utcnow()
+        job.status = 'completed'
+        job.report_path = report_path
+        job.finished_at = now
+        application = db.session.get(LoanApplication, job.application_id)
+        application.report_generated = True
+        application.report_path = report_path
+        application.report_status = 'completed'
+        db.session.commit()
+
+    def _fail(self, job: ReportJob, error: str, retry: bool = True):
+        now = datetime.utcnow()
+        job.last_error = error
+        if retry and job.attempts < self.max_attempts:
+            job.status = 'pending'
+            job.available_at = now + timedelta(seconds=self.retry_delay * job.attempts)
+            status = 'pending'
+        else:
+            job.status = 'failed'
+            job.finished_at = now
+            status = 'failed'
+        application = db.session.get(LoanApplication, job.application_id)
+        if application is not None:
+            application.report_status = status
+        db.session.commit()
+
+
+def init_app(app):
+    """Register the report worker command"""
+    @app.cli.command('report-worker')
+    @click.option('--processes', type=int, default=None, help='Report processes (default: CPU count)')
+    @click.option('--poll-interval', default=1.0, help='Seconds to wait when the queue is empty')
+    @click.option('--once', is_flag=True, help='Process one batch and exit')
+    def report_worker_command(processes, poll_interval, once):
+        """Generate queued loan reports"""
+        worker = ReportWorker(app, processes=processes)
+        try:
+            if once:
+                click.echo(f'Processed {worker.run_once()} report jobs')
+            else:
+                worker.run(poll_interval=poll_interval)
+        finally:
+            worker.shutdown()
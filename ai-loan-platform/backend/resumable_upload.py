@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, Optional
+import fcntl
+import hashlib
+import os
+import uuid
+
+import click
+import magic
+from werkzeug.utils import secure_filename
+
+from .error_handlers import ValidationError
+from .models import db, UploadSession
+from .utils import UPLOAD_CHUNK_SIZE, allowed_file, is_safe_mime_type
+
+STAGING_DIRECTORY = '.staging'
+
+
+class UploadOffsetError(Exception):
+    """Raised when a chunk does not start at the session's received offset"""
+    def __init__(self, expected_offset: int):
+        super().__init__(f'Expected chunk at offset {expected_offset}')
+        self.expected_offset = expected_offset
+
+
+class UploadConflictError(Exception):
+    """Raised when another request is already completing the upload"""
+
+
+class ResumableUploadManager:
+    """
+    Resumable uploads: create a session, append chunks at explicit offsets,
+    then finalize. Chunks are appended to a single staging file, so finalizing
+    needs no reassembly; the file is hashed in fixed-size reads and moved into
+    the upload folder with an atomic rename. Session state lives in the
+    database and staged data under UPLOAD_FOLDER, so any worker can accept
+    the next chunk as long as every worker sees the same UPLOAD_FOLDER
+    (a shared volume when workers run on several hosts).
+    """
+    def __init__(self, max_chunk_size: int = 8 * 1024 * 1024,
+                 max_file_size: int = 100 * 1024 * 1024,
+                 session_ttl: timedelta = timedelta(hours=24)):
+        self.max_chunk_size = max_chunk_size
+        self.max_file_size = max_file_size
+        self.session_ttl = session_ttl
+
+    def create_session(self, user_id: int, document_type: str, file_name: str,
+                       total_size: int, upload_folder: str, allowed_extensions: set) -> UploadSession:
+        """
+        Start a new upload session
+        """
+        if not file_name or not allowed_file(file_name, allowed_extensions):
+            raise ValidationError('File type not allowed')
+        if not isinstance(total_size, int) or not 0 < total_size <= self.max_file_size:
+            raise ValidationError(f'total_size must be between 1 and {self.max_file_size} bytes')
+
+        staging_folder = os.path.join(upload_folder, STAGING_DIRECTORY)
+        os.makedirs(staging_folder, exist_ok=True)
+
+        upload_id = uuid.uuid4().hex
+        staging_path = os.path.join(staging_folder, f'{upload_id}.part')
+        open(staging_path, 'wb').close()
+
+        session = UploadSession(
+            id=upload_id,
+            user_id=user_id,
+            document_type=document_type,
+            file_name=secure_filename(file_name),
+            total_size=total_size,
+            received_size=0,
+            staging_path=staging_path,
+            status='open',
+            expires_at=datetime.utcnow() + self.session_ttl
+        )
+        db.session.add(session)
+        db.session.commit()
+        return session
+
+    def write_chunk(self, session: UploadSession, offset: int, stream: BinaryIO,
+                    length: int) -> UploadSession:
+        """
+        Append a chunk of `length` bytes read from `stream` at `offset`
+        """
+        if length <= 0 or length > self.max_chunk_size:
+            raise ValidationError(f'Chunks must be between 1 and {self.max_chunk_size} bytes')
+
+        with open(session.staging_path, 'r+b') as f:
+            # Hold the staging file while the offset is checked, the bytes are
+            # written and the offset is advanced, so a concurrent request for
+            # the same offset waits and is then refused without writing
+            fcntl.flock(f, fcntl.LOCK_EX)
+            db.session.refresh(session)
+            self._ensure_open(session)
+            if offset != session.received_size:
+                raise UploadOffsetError(session.received_size)
+            if offset + length > session.total_size:
+                raise ValidationError('Chunk exceeds declared file size')
+
+            f.seek(offset)
+            remaining = length
+            first = offset == 0
+            while remaining:
+                chunk = stream.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ValidationError('Chunk shorter than Content-Range')
+                if first:
+                    # Reject disallowed content on the first bytes received
+                    if not is_safe_mime_type(magic.from_buffer(chunk, mime=True)):
+                        self.abort(session)
+                        raise ValidationError('File type not allowed')
+                    first = False
+                f.write(chunk)
+                remaining -= len(chunk)
+            f.flush()
+
+            UploadSession.query.filter_by(
+                id=session.id, received_size=offset
+            ).update({'received_size': offset + length})
+            db.session.commit()
+
+        db.session.refresh(session)
+        return session
+
+    def finalize(self, session: UploadSession, upload_folder: str,
+                 content_store=None) -> Dict[str, Any]:
+        """
+        Move a fully received upload into the upload folder, or into
+        `content_store` under its content hash when one is given.
+        Returns the same details as utils.stream_uploaded_file.
+        """
+        self._ensure_open(session)
+        if session.received_size != session.total_size:
+            raise ValidationError(
+                f'Upload incomplete: {session.received_size} of {session.total_size} bytes received'
+            )
+
+        # Claim completion, so a concurrent request cannot move the staged
+        # file while this one reads it
+        claimed = UploadSession.query.filter_by(
+            id=session.id, status='open'
+        ).update({'status': 'finalizing'})
+        db.session.commit()
+        if not claimed:
+            raise UploadConflictError(f'Upload {session.id} is already being completed')
+
+        try:
+            digest = hashlib.sha256()
+            with open(session.staging_path, 'rb') as f:
+                mime_type = magic.from_buffer(f.read(UPLOAD_CHUNK_SIZE), mime=True)
+                f.seek(0)
+                for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+
+            content_hash = digest.hexdigest()
+            if content_store is not None:
+                file_path = content_store.put_file(session.staging_path, content_hash)
+            else:
+                file_path = os.path.join(upload_folder, session.file_name)
+                os.replace(session.staging_path, file_path)
+        except BaseException:
+            # Let the client retry completion
+            session.status = 'open'
+            db.session.commit()
+            raise
+
+        session.status = 'completed'
+        db.session.commit()
+
+        return {
+            'file_path': file_path,
+            'file_name': session.file_name,
+            'file_size': session.total_size,
+            'mime_type': mime_type,
+            'content_hash': content_hash
+        }
+
+    def abort(self, session: UploadSession):
+        """
+        Discard a session and its staged data
+        """
+        if os.path.exists(session.staging_path):
+            os.unlink(session.staging_path)
+        session.status = 'aborted'
+        db.session.commit()
+
+    def expire_sessions(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete staged data for sessions past their expiry; returns the count
+        """
+        now = now or datetime.utcnow()
+        expired = UploadSession.query.filter(
+            UploadSession.status == 'open',
+            UploadSession.expires_at < now
+        ).all()
+        for session in expired:
+            if os.path.exists(session.staging_path):
+                os.unlink(session.staging_path)
+            session.status = 'expired'
+        db.session.commit()
+        return len(expired)
+
+    def _ensure_open(self, session: UploadSession):
+        if session.status != 'open' or session.expires_at < datetime.utcnow():
+            raise ValidationError(f'Upload session is {session.status if session.status != "open" else "expired"}')
+
+
+def init_app(app):
+    """Register the upload session cleanup command"""
+    @app.cli.command('expire-uploads')
+    def expire_uploads_command():
+        """Delete staged data of upload sessions past their expiry"""
+        expired = ResumableUploadManager().expire_sessions()
+        click.echo(f'Expired {expired} upload sessions')
+
+
+def parse_content_range(header: Optional[str]) -> Optional[Dict[str, int]]:
+    """Parse 'bytes start-end/total' into offset, length and total"""
+    if not header or not header.startswith('bytes '):
+        return None
+    try:
+        byte_range, total = header[6:].split('/')
+        start, end = (int(part) for part in byte_range.split('-'))
+        total = int(total)
+    except ValueError:
+        return None
+    if start < 0 or end < start:
+        return None
+    return {'offset': start, 'length': end - start + 1, 'total': total}
@@ -1,14 +1,20 @@
+from contextlib import closing
+import io
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
-import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 
-from .models import db, User, LoanApplication, UserDocument, Payment, AuditLog
-from .loan_assessment import LoanAssessment
-from .document_verification import DocumentVerification
-from .payment_gateway import PaymentGateway
-from .report_generator import ReportGenerator
+from .models import db, User, LoanApplication, UserDocument, Payment, AuditLog, UploadSession
+from .services import LazyService
+from .content_store import get_content_store
+from .storage import get_storage
+from .utils import send_stored_file, stream_uploaded_file
+from .validation import loan_application_validator
+from .serialization import serialize_application
+from .error_handlers import ValidationError
+from .resumable_upload import UploadConflictError, UploadOffsetError, parse_content_range
+from .payment_events import PAID_STATUSES, apply_payment_status, record_event
 
 # Initialize blueprints
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -16,11 +22,15 @@ loan_bp = Blueprint('loan', __name__, url_prefix='/api/loan')
 document_bp = Blueprint('document', __name__, url_prefix='/api/document')
 payment_bp = Blueprint('payment', __name__, url_prefix='/api/payment')
 
-# Initialize services
-loan_assessor = LoanAssessment()
-doc_verifier = DocumentVerification()
-payment_gateway = PaymentGateway()
-report_generator = ReportGenerator()
+DOCUMENT_TYPES = {'aadhaar', 'pan', 'bank_statement', 'salary_slip'}
+
+# Services are created on first use so importing routes stays cheap
+doc_verifier = LazyService('.document_verification', 'DocumentVerification')
+payment_gateway = LazyService('.payment_gateway', 'PaymentGateway')
+consistency_engine = LazyService('.consistency', 'ConsistencyEngine')
+document_index = LazyService('.document_index', 'DocumentIndex')
+upload_manager = LazyService('.resumable_upload', 'ResumableUploadManager')
+image_processor = LazyService('.image_processing', 'ImageProcessor')
 
 # Authentication routes
 @auth_bp.route('/register', methods=['POST'])
@@ -58,13 +68,18 @@ def login():
 @jwt_required()
 def submit_application():
     user_id = get_jwt_identity()
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    
+    # Only schema fields reach the model, already coerced to column types
+    values, errors = loan_application_validator.validate(data)
+    if errors:
+        raise ValidationError('Invalid loan application', errors)
     
     application = LoanApplication(
         user_id=user_id,
         status='submitted',
         submitted_at=datetime.utcnow(),
-        **data
+        **values
     )
     
     db.session.add(application)
@@ -96,25 +111,52 @@ def get_application(application_id):
         user_id=user_id
     ).first_or_404()
     
-    return jsonify({
-        'id': application.id,
-        'status': application.status,
-        'approved_amount': application.approved_amount,
-        'interest_rate': application.interest_rate,
-        'monthly_emi': application.monthly_emi,
-        'documents_verified': {
-            'aadhaar': application.aadhaar_verified,
-            'pan': application.pan_verified,
-            'income': application.income_verified,
-            'address': application.address_verified
-        }
-    }), 200
+    return jsonify(serialize_application(application)), 200
+
+@loan_bp.route('/application/<int:application_id>/consistency-check', methods=['POST'])
+@jwt_required()
+def check_application_consistency(application_id):
+    user_id = get_jwt_identity()
+    application = LoanApplication.query.filter_by(
+        id=application_id,
+        user_id=user_id
+    ).first_or_404()
+    
+    documents = UserDocument.query.filter_by(user_id=user_id).all()
+    result = consistency_engine.reconcile(application, documents)
+    
+    db.session.commit()
+    
+    return jsonify(result), 200
+
+@loan_bp.route('/application/<int:application_id>/report', methods=['GET'])
+@jwt_required()
+def download_report(application_id):
+    user_id = get_jwt_identity()
+    application = LoanApplication.query.filter_by(
+        id=application_id,
+        user_id=user_id
+    ).first_or_404()
+    
+    if application.report_status in ('pending', 'generating'):
+        return jsonify({'report_status': application.report_status}), 202
+    if not application.report_generated or not application.report_path:
+        return jsonify({'error': 'Report not available'}), 404
+    
+    return send_stored_file(
+        get_storage(current_app, 'reports'),
+        application.report_path,
+        application.report_path.rsplit('/', 1)[-1],
+        'application/pdf',
+        accel_prefix=_accel_prefix('reports')
+    )
 
 # Document verification routes
 @document_bp.route('/digilocker/auth', methods=['GET'])
 @jwt_required()
 def get_digilocker_auth_url():
-    auth_url = doc_verifier.generate_digilocker_auth_url()
+    user_id = get_jwt_identity()
+    auth_url = doc_verifier.generate_digilocker_auth_url(user_id)
     return jsonify({'auth_url': auth_url}), 200
 
 @document_bp.route('/digilocker/callback', methods=['GET'])
@@ -122,8 +164,9 @@ def get_digilocker_auth_url():
 def handle_digilocker_callback():
     user_id = get_jwt_identity()
     auth_code = request.args.get('code')
+    state = request.args.get('state')
     
-    success, documents = doc_verifier.handle_digilocker_callback(auth_code)
+    success, documents = doc_verifier.handle_digilocker_callback(auth_code, state, user_id)
     
     if not success:
         return jsonify({'error': 'Failed to fetch documents'}), 400
@@ -161,29 +204,211 @@ def upload_document():
     if not doc_type:
         return jsonify({'error': 'Document type not specified'}), 400
     
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    if doc_type not in DOCUMENT_TYPES:
+        return jsonify({'error': 'Invalid document type'}), 400
+    
+    # Stream file to disk; type is sniffed and hash computed on the way,
+    # then stored under its hash so identical content is kept once
+    upload = stream_uploaded_file(
+        file,
+        current_app.config['UPLOAD_FOLDER'],
+        current_app.config['ALLOWED_EXTENSIONS'],
+        content_store=get_content_store(current_app)
+    )
     
-    # Save file
-    file.save(file_path)
+    return _create_document_record(user_id, doc_type, upload)
+
+@document_bp.route('/uploads', methods=['POST'])
+@jwt_required()
+def create_upload_session():
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    doc_type = data.get('document_type')
+    
+    if doc_type not in DOCUMENT_TYPES:
+        return jsonify({'error': 'Invalid document type'}), 400
+    
+    session = upload_manager.create_session(
+        user_id,
+        doc_type,
+        data.get('file_name'),
+        data.get('total_size'),
+        current_app.config['UPLOAD_FOLDER'],
+        current_app.config['ALLOWED_EXTENSIONS']
+    )
+    
+    return jsonify({
+        'upload_id': session.id,
+        'received_size': 0,
+        'max_chunk_size': upload_manager.max_chunk_size,
+        'expires_at': session.expires_at.isoformat()
+    }), 201
+
+@document_bp.route('/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload_session(upload_id):
+    session = _get_upload_session(upload_id)
+    
+    return jsonify({
+        'upload_id': session.id,
+        'status': session.status,
+        'received_size': session.received_size,
+        'total_size': session.total_size
+    }), 200
+
+@document_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    session = _get_upload_session(upload_id)
+    content_range = parse_content_range(request.headers.get('Content-Range'))
+    
+    if not content_range or content_range['total'] != session.total_size:
+        return jsonify({'error': 'Valid Content-Range header required'}), 400
+    
+    try:
+        session = upload_manager.write_chunk(
+            session,
+            content_range['offset'],
+            request.stream,
+            content_range['length']
+        )
+    except UploadOffsetError as e:
+        return jsonify({
+            'error': str(e),
+            'received_size': e.expected_offset
+        }), 409
+    
+    return jsonify({
+        'upload_id': session.id,
+        'received_size': session.received_size,
+        'total_size': session.total_size
+    }), 200
+
+@document_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload(upload_id):
+    user_id = get_jwt_identity()
+    session = _get_upload_session(upload_id)
+    
+    try:
+        upload = upload_manager.finalize(
+            session,
+            current_app.config['UPLOAD_FOLDER'],
+            content_store=get_content_store(current_app)
+        )
+    except UploadConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    return _create_document_record(user_id, session.document_type, upload)
+
+@document_bp.route('/<int:document_id>/download', methods=['GET'])
+@jwt_required()
+def download_document(document_id):
+    user_id = get_jwt_identity()
+    document = UserDocument.query.filter_by(
+        id=document_id,
+        user_id=user_id
+    ).first_or_404()
+    
+    # DigiLocker documents are stored as verified data, not as files
+    if not document.file_path:
+        return jsonify({'error': 'Document has no file'}), 404
+    
+    # Stored content never changes, so the hash in its key is a strong ETag.
+    # content_hash stays the hash of the upload, which differs once an image
+    # has been normalized.
+    store = get_content_store(current_app)
+    return send_stored_file(
+        store.storage,
+        document.file_path,
+        document.file_name,
+        document.mime_type,
+        etag=store.hash_of(document.file_path),
+        accel_prefix=_accel_prefix('uploads')
+    )
+
+@document_bp.route('/<int:document_id>/thumbnail', methods=['GET'])
+@jwt_required()
+def download_thumbnail(document_id):
+    user_id = get_jwt_identity()
+    document = UserDocument.query.filter_by(
+        id=document_id,
+        user_id=user_id
+    ).first_or_404()
+    
+    if not document.thumbnail_path:
+        return jsonify({'error': 'Thumbnail not available'}), 404
+    
+    store = get_content_store(current_app)
+    return send_stored_file(
+        store.storage,
+        document.thumbnail_path,
+        'thumbnail.jpg',
+        'image/jpeg',
+        etag=store.hash_of(document.thumbnail_path),
+        accel_prefix=_accel_prefix('uploads')
+    )
+
+def _order_response(payment):
+    """create-order response for a stored order"""
+    return {
+        'order_id': payment.order_id,
+        'amount': payment.amount,
+        'currency': payment.currency,
+        'receipt': f'REPORT-{payment.application_id}'
+    }
+
+def _accel_prefix(storage_name):
+    """nginx internal location for a storage when X-Accel-Redirect is enabled"""
+    return f'/{storage_name}/' if current_app.config.get('X_ACCEL_REDIRECT') else None
+
+def _get_upload_session(upload_id):
+    """Load an upload session owned by the current user"""
+    return UploadSession.query.filter_by(
+        id=upload_id,
+        user_id=get_jwt_identity()
+    ).first_or_404()
+
+def _create_document_record(user_id, doc_type, upload):
+    """Create a UserDocument for a stored upload and check it for reuse"""
+    file_path = upload['file_path']
+    content_hash = upload['content_hash']
+    
+    # Check for the same content uploaded by other accounts
+    phash = None
+    if upload['mime_type'] in document_index.IMAGE_MIME_TYPES:
+        storage = get_content_store(current_app).storage
+        with closing(storage.open(file_path)) as f:
+            phash = document_index.image_hash(f, upload['mime_type'])
+    reuse = document_index.find_reuse(user_id, content_hash, phash)
     
     # Create document record
     document = UserDocument(
         user_id=user_id,
         document_type=doc_type,
         file_path=file_path,
-        file_name=filename,
-        file_size=os.path.getsize(file_path),
-        mime_type=file.content_type,
+        file_name=upload['file_name'],
+        file_size=upload['file_size'],
+        mime_type=upload['mime_type'],
+        content_hash=content_hash,
+        perceptual_hash=f'{phash:016x}' if phash is not None else None,
+        fraud_flags=reuse if reuse['reuse_detected'] else None,
         verification_method='manual_upload'
     )
     
     db.session.add(document)
+    db.session.flush()
+    document_index.register(document, phash)
     db.session.commit()
     
+    # Downscale, strip metadata and thumbnail photos off the request path
+    if document.mime_type in image_processor.IMAGE_MIME_TYPES:
+        image_processor.submit(current_app._get_current_object(), document.id)
+    
     return jsonify({
         'message': 'Document uploaded successfully',
-        'document_id': document.id
+        'document_id': document.id,
+        'reuse_detected': reuse['reuse_detected']
     }), 201
 
 # Payment routes
@@ -192,12 +417,57 @@ def upload_document():
 def create_payment_order():
     user_id = get_jwt_identity()
     application_id = request.json.get('application_id')
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 64:
+        return jsonify({'error': 'Idempotency-Key must be 1 to 64 characters'}), 400
+    
+    application = LoanApplication.query.filter_by(
+        id=application_id,
+        user_id=user_id
+    ).first_or_404()
     
-    success, order_data = payment_gateway.create_order(user_id, application_id)
+    # A repeated request returns the order it created
+    if idempotency_key:
+        payment = Payment.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+        if payment is not None:
+            if payment.application_id != application.id:
+                return jsonify({'error': 'Idempotency-Key was used for another application'}), 422
+            return jsonify(_order_response(payment)), 200
+    
+    # Reuse an order that is still open instead of creating another
+    payment = Payment.query.filter(
+        Payment.application_id == application.id,
+        Payment.user_id == user_id,
+        Payment.status == 'created',
+        Payment.created_at >= datetime.utcnow() - timedelta(seconds=current_app.config['PAYMENT_ORDER_TTL'])
+    ).order_by(Payment.created_at.desc()).first()
+    if payment is not None:
+        return jsonify(_order_response(payment)), 200
+    
+    success, order_data = payment_gateway.create_order(user_id, application.id)
     
     if not success:
         return jsonify({'error': 'Failed to create payment order'}), 400
     
+    db.session.add(Payment(
+        user_id=user_id,
+        application_id=application.id,
+        order_id=order_data['order_id'],
+        amount=order_data['amount'],
+        currency=order_data['currency'],
+        status='created',
+        idempotency_key=idempotency_key
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request with the same key won
+        db.session.rollback()
+        payment = Payment.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+        if payment is None:
+            raise
+        return jsonify(_order_response(payment)), 200
+    
     return jsonify(order_data), 200
 
 @payment_bp.route('/verify', methods=['POST'])
@@ -206,34 +476,87 @@ def verify_payment():
     user_id = get_jwt_identity()
     payment_data = request.json
     
-    success, verification_data = payment_gateway.verify_payment(payment_data)
+    # Only the Checkout signature is checked here; Razorpay confirms the
+    # final status through the webhook
+    success, verification_data = payment_gateway.verify_checkout(payment_data)
     
     if not success:
         return jsonify({'error': 'Payment verification failed'}), 400
     
-    # Update application payment status
-    application = LoanApplication.query.get(verification_data['application_id'])
-    application.payment_status = 'completed'
-    application.payment_id = verification_data['payment_id']
-    application.payment_amount = verification_data['amount']
-    application.payment_date = datetime.utcnow()
-    
-    # Generate report
-    report_path = report_generator.generate_report(
-        application_data=application.__dict__,
-        assessment_data=loan_assessor.generate_report_data(application.__dict__)
-    )
+    payment = Payment.query.filter_by(
+        order_id=verification_data['order_id'],
+        user_id=user_id
+    ).first()
+    if payment is None:
+        return jsonify({'error': 'Payment order not found'}), 404
     
-    application.report_generated = True
-    application.report_path = report_path
+    # Marks the application paid and queues its report
+    apply_payment_status(payment, 'authorized', verification_data['payment_id'])
+    application = db.session.get(LoanApplication, payment.application_id)
     
     db.session.commit()
     
     return jsonify({
-        'message': 'Payment verified and report generated',
-        'payment_id': verification_data['payment_id']
+        'message': 'Payment verified, report generation queued',
+        'payment_id': verification_data['payment_id'],
+        'report_status': application.report_status
     }), 200
 
+@payment_bp.route('/<payment_id>/receipt', methods=['GET'])
+@jwt_required()
+def download_receipt(payment_id):
+    user_id = get_jwt_identity()
+    payment = Payment.query.filter_by(
+        payment_id=payment_id,
+        user_id=user_id
+    ).first_or_404()
+    
+    if payment.status not in PAID_STATUSES | {'refunded'}:
+        return jsonify({'error': 'Receipt not available'}), 404
+    
+    # Rendered on first request, then streamed from storage. The key names
+    # the status shown on the receipt, so a refund renders a new receipt.
+    storage = get_storage(current_app, 'reports')
+    key = f"receipts/{payment.payment_id}-{'refunded' if payment.status == 'refunded' else 'paid'}.html"
+    if payment.receipt_path != key:
+        receipt = payment_gateway.generate_payment_receipt({
+            'payment_id': payment.payment_id,
+            'order_id': payment.order_id,
+            'amount': payment.amount,
+            'payment_method': payment.payment_method or 'Online',
+            'application_id': payment.application_id,
+            'date': payment.created_at.strftime('%Y-%m-%d'),
+            'status': payment.status
+        })
+        storage.put(key, io.BytesIO(payment_gateway.render_payment_receipt(receipt)))
+        stale_path, payment.receipt_path = payment.receipt_path, key
+        db.session.commit()
+        if stale_path:
+            storage.delete(stale_path)
+    
+    return send_stored_file(
+        storage,
+        payment.receipt_path,
+        f'receipt_{payment.payment_id}.html',
+        'text/html',
+        accel_prefix=_accel_prefix('reports')
+    )
+
+@payment_bp.route('/webhook', methods=['POST'])
+def payment_webhook():
+    body = request.get_data()
+    if not payment_gateway.verify_webhook_signature(body, request.headers.get('X-Razorpay-Signature')):
+        return jsonify({'error': 'Invalid webhook signature'}), 400
+    
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or 'event' not in payload:
+        return jsonify({'error': 'Invalid webhook payload'}), 400
+    
+    # Applied by the payment-events worker; duplicates are acknowledged
+    record_event(body, payload, request.headers.get('X-Razorpay-Event-Id'))
+    
+    return jsonify({'status': 'received'}), 200
+
 def init_app(app):
     """Initialize routes with the Flask app"""
     app.register_blueprint(auth_bp)
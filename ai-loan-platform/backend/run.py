@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from backend import create_app
+from backend import create_app, prepare_app
 
 # Load environment variables
 load_dotenv()
@@ -9,6 +9,8 @@ load_dotenv()
 app = create_app()
 
 if __name__ == '__main__':
+    prepare_app(app)
+
     # Get port from environment or use default
     port = int(os.getenv('PORT', 5000))
     
@@ -0,0 +1,291 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+import io
+import os
+import re
+import threading
+
+from PIL import Image, ImageFilter, ImageOps
+from PyPDF2 import PdfReader
+
+_AMOUNT = r'(?:Rs\.?|INR|₹)?\s*([\d,]+(?:\.\d{1,2})?)'
+_GROSS_RE = re.compile(
+    rf'(?:Gross\s+(?:Salary|Earnings|Pay)|Total\s+Earnings)\s*[:\-]?\s*{_AMOUNT}',
+    re.IGNORECASE
+)
+_NET_RE = re.compile(
+    rf'(?:Net\s+(?:Salary|Pay(?:able)?|Amount)|Take\s*Home(?:\s+Pay)?)\s*[:\-]?\s*{_AMOUNT}',
+    re.IGNORECASE
+)
+_EMPLOYER_LABEL_RE = re.compile(
+    r'(?:Employer|Company|Organi[sz]ation)(?:\s+Name)?\s*[:\-]\s*(.+)',
+    re.IGNORECASE
+)
+_EMPLOYER_SUFFIX_RE = re.compile(
+    r'^(.*\b(?:Pvt\.?\s*Ltd\.?|Private\s+Limited|Limited|Ltd\.?|LLP|Inc\.?|Corporation|Corp\.?))\s*$',
+    re.IGNORECASE
+)
+_PERIOD_RE = re.compile(
+    r'(?:month\s+of|for|period|month)\s*[:\-]?\s*'
+    r'(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|'
+    r'Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)[\s,\-]*(\d{4})',
+    re.IGNORECASE
+)
+_MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+
+# Pages with less text than this are treated as scanned images
+MIN_TEXT_LENGTH = 40
+
+# Worker processes are started once per process and shared by every extractor
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+class SalarySlipExtractionError(ValueError):
+    """Raised when no salary slip can be extracted from a file"""
+
+
+class SalarySlipExtractor:
+    """
+    Extract salary details from salary slip PDFs and images.
+    The PDF text layer is used when present; scanned pages and image uploads
+    are preprocessed with Pillow and passed to OCR. Bundles with many pages
+    are split into `max_workers` page ranges and processed on a process pool
+    that is started on first use and kept for later calls, so a request
+    does not pay for spawning workers and importing PyPDF2 and Pillow in them.
+    """
+    SUPPORTED_EXTENSIONS = {'pdf', 'jpg', 'jpeg', 'png'}
+
+    def __init__(self, max_workers: Optional[int] = None, parallel_page_threshold: int = 8):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_page_threshold = parallel_page_threshold
+
+    def extract(self, file_path: str) -> List[Dict]:
+        """
+        Extract every salary slip found in a file, one entry per slip
+        """
+        extension = _extension(file_path)
+        if extension not in self.SUPPORTED_EXTENSIONS:
+            raise SalarySlipExtractionError(f'Unsupported salary slip format: {extension or "unknown"}')
+
+        if extension != 'pdf':
+            with Image.open(file_path) as image:
+                return _merge_pages([_ocr_image(image)])
+
+        page_count = _page_count(file_path)
+        if page_count < self.parallel_page_threshold or self.max_workers == 1:
+            pages = _extract_page_texts(file_path, 0, page_count)
+        else:
+            ranges = _split_range(page_count, self.max_workers)
+            chunks = _map(_extract_page_texts, *zip(*((file_path, start, stop) for start, stop in ranges)))
+            pages = [text for chunk in chunks for text in chunk]
+
+        return _merge_pages(pages)
+
+    def extract_many(self, file_paths: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        Extract slips from many files in parallel.
+        Files that fail to parse map to an empty list.
+        """
+        file_paths = list(file_paths)
+        results = _map(_extract_file, file_paths, chunksize=max(1, len(file_paths) // (self.max_workers * 4)))
+        return dict(zip(file_paths, results))
+
+    def summarize(self, slips: List[Dict]) -> Dict:
+        """
+        Summarize extracted slips into salary verification details
+        """
+        complete = [slip for slip in slips if slip['gross_salary'] and slip['net_salary']]
+        if not complete:
+            raise SalarySlipExtractionError('No salary figures found in salary slip')
+
+        latest = complete[-1]
+        employers = {slip['employer_name'] for slip in complete if slip['employer_name']}
+
+        return {
+            'gross_salary': latest['gross_salary'],
+            'net_salary': latest['net_salary'],
+            'employer_name': latest['employer_name'],
+            'employer_verified': len(employers) == 1 and all(
+                slip['net_salary'] <= slip['gross_salary'] for slip in complete
+            ),
+            'average_net_salary': round(sum(slip['net_salary'] for slip in complete) / len(complete), 2),
+            'slip_count': len(complete),
+            'pay_periods': [slip['pay_period'] for slip in complete if slip['pay_period']]
+        }
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared extraction pool, starting it on first use. A pool
+    inherited through fork is not reused, so building the app in a
+    pre-fork master is safe.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_pool(wait: bool = True):
+    """Stop the shared extraction pool; the next extraction starts a new one"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None and _pool_pid == os.getpid():
+        pool.shutdown(wait=wait)
+
+
+def parse_salary_text(text: str) -> Dict:
+    """Pull salary fields out of the text of a single slip"""
+    return {
+        'gross_salary': _find_amount(_GROSS_RE, text),
+        'net_salary': _find_amount(_NET_RE, text),
+        'employer_name': _find_employer(text),
+        'pay_period': _find_period(text)
+    }
+
+
+def preprocess_image(image: Image.Image) -> Image.Image:
+    """Prepare a phone photo or scan for OCR"""
+    image = ImageOps.exif_transpose(image)
+    image = ImageOps.grayscale(image)
+
+    # OCR engines work best with text around 30px high
+    if max(image.size) < 2000:
+        scale = 2000 / max(image.size)
+        image = image.resize((int(image.width * scale), int(image.height * scale)), Image.LANCZOS)
+
+    image = ImageOps.autocontrast(image, cutoff=1)
+    image = image.filter(ImageFilter.MedianFilter(3))
+    return image.point(lambda value: 255 if value > 160 else 0)
+
+
+def _ocr_image(image: Image.Image) -> str:
+    """Run OCR on a preprocessed image"""
+    try:
+        import pytesseract
+    except ImportError:
+        raise SalarySlipExtractionError('OCR is not available for scanned salary slips')
+    return pytesseract.image_to_string(preprocess_image(image))
+
+
+def _extract_file(file_path: str) -> List[Dict]:
+    """Process pool entry point for whole files"""
+    try:
+        return SalarySlipExtractor(max_workers=1).extract(file_path)
+    except Exception:
+        return []
+
+
+def _extract_page_texts(file_path: str, start: int, stop: int) -> List[str]:
+    """Process pool entry point returning the text of a page range"""
+    reader = PdfReader(file_path)
+    texts = []
+    for page in reader.pages[start:stop]:
+        text = page.extract_text() or ''
+        if len(text.strip()) < MIN_TEXT_LENGTH:
+            text = _ocr_page_images(page) or text
+        texts.append(text)
+    return texts
+
+
+def _ocr_page_images(page) -> str:
+    """OCR the images embedded in a scanned PDF page"""
+    texts = []
+    try:
+        images = page.images
+    except Exception:
+        return ''
+    for embedded in images:
+        with Image.open(io.BytesIO(embedded.data)) as image:
+            texts.append(_ocr_image(image))
+    return '\n'.join(texts)
+
+
+def _map(fn, *iterables, chunksize: int = 1) -> List:
+    pool = get_pool()
+    try:
+        return list(pool.map(fn, *iterables, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        global _pool
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise
+
+
+def _merge_pages(pages: List[str]) -> List[Dict]:
+    """Group page texts into slips; pages without figures continue the previous slip"""
+    slips = []
+    buffer = ''
+    for text in pages:
+        fields = parse_salary_text(text)
+        if fields['gross_salary'] is None and fields['net_salary'] is None and slips:
+            buffer = f'{buffer}\n{text}'
+            slips[-1] = _fill_missing(slips[-1], parse_salary_text(buffer))
+            continue
+        buffer = text
+        slips.append(fields)
+    return slips
+
+
+def _fill_missing(slip: Dict, fields: Dict) -> Dict:
+    return {key: slip[key] if slip[key] is not None else fields[key] for key in slip}
+
+
+def _find_amount(pattern: re.Pattern, text: str) -> Optional[float]:
+    match = pattern.search(text)
+    if not match:
+        return None
+    try:
+        return float(match.group(1).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _find_employer(text: str) -> Optional[str]:
+    match = _EMPLOYER_LABEL_RE.search(text)
+    if match:
+        return match.group(1).strip()
+    for line in text.splitlines()[:10]:
+        match = _EMPLOYER_SUFFIX_RE.match(line.strip())
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def _find_period(text: str) -> Optional[str]:
+    match = _PERIOD_RE.search(text)
+    if not match:
+        return None
+    month = _MONTHS.index(match.group(1)[:3].lower()) + 1
+    return f'{match.group(2)}-{month:02d}'
+
+
+def _page_count(file_path: str) -> int:
+    try:
+        return len(PdfReader(file_path).pages)
+    except Exception as e:
+        raise SalarySlipExtractionError(f'Unreadable salary slip PDF: {e}')
+
+
+def _split_range(count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split range(count) into at most `parts` contiguous chunks"""
+    parts = max(1, min(parts, count))
+    size, extra = divmod(count, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extension(file_path: str) -> str:
+    return os.path.splitext(file_path)[1].lower().lstrip('.')
@@ -0,0 +1,164 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+import json
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+from .models import LoanApplication, Payment, UserDocument
+from .pii import mask_fields
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def serialize_application(application: LoanApplication) -> Dict[str, Any]:
+    """Public representation of a loan application; PAN and Aadhaar are masked and the name omitted"""
+    data = {
+        'id': application.id,
+        'status': application.status,
+        'pan_number': application.pan_number,
+        'aadhaar_number': application.aadhaar_number,
+        'loan_amount': application.loan_amount,
+        'loan_tenure': application.loan_tenure,
+        'loan_purpose': application.loan_purpose,
+        'credit_score': application.credit_score,
+        'risk_assessment': application.risk_assessment,
+        'approved_amount': application.approved_amount,
+        'interest_rate': application.interest_rate,
+        'monthly_emi': application.monthly_emi,
+        'consistency_score': application.consistency_score,
+        'documents_verified': {
+            'aadhaar': application.aadhaar_verified,
+            'pan': application.pan_verified,
+            'income': application.income_verified,
+            'address': application.address_verified
+        },
+        'payment_status': application.payment_status,
+        'report_generated': application.report_generated,
+        'report_status': application.report_status,
+        'created_at': application.created_at,
+        'submitted_at': application.submitted_at,
+        'processed_at': application.processed_at
+    }
+    return mask_fields(data)
+
+
+def serialize_document(document: UserDocument) -> Dict[str, Any]:
+    """Public representation of an uploaded document; storage paths are omitted"""
+    return {
+        'id': document.id,
+        'document_type': document.document_type,
+        'file_name': document.file_name,
+        'file_size': document.file_size,
+        'mime_type': document.mime_type,
+        'has_thumbnail': document.thumbnail_path is not None,
+        'is_verified': document.is_verified,
+        'verification_method': document.verification_method,
+        'reuse_detected': bool(document.fraud_flags),
+        'uploaded_at': document.uploaded_at,
+        'verified_at': document.verified_at
+    }
+
+
+def serialize_payment(payment: Payment) -> Dict[str, Any]:
+    """Public representation of a payment"""
+    return {
+        'id': payment.id,
+        'application_id': payment.application_id,
+        'order_id': payment.order_id,
+        'payment_id': payment.payment_id,
+        'amount': payment.amount,
+        'currency': payment.currency,
+        'status': payment.status,
+        'payment_method': payment.payment_method,
+        'created_at': payment.created_at,
+        'updated_at': payment.updated_at
+    }
+
+
+SERIALIZERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {
+    LoanApplication: serialize_application,
+    UserDocument: serialize_document,
+    Payment: serialize_payment,
+}
+
+
+def _default(obj: Any) -> Any:
+    """Encode values the JSON libraries do not handle natively"""
+    serializer = SERIALIZERS.get(type(obj))
+    if serializer is not None:
+        return serializer(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson. datetime and date are encoded natively
+    as ISO 8601; responses are built from the encoded bytes directly.
+    """
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.option),
+            mimetype='application/json'
+        )
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """
+    Fallback provider using the json module, encoding dates as ISO 8601
+    like OrjsonProvider rather than Flask's HTTP date format
+    """
+    sort_keys = False
+
+    @staticmethod
+    def default(obj: Any) -> Any:
+        try:
+            return _default(obj)
+        except TypeError:
+            return DefaultJSONProvider.default(obj)
+
+
+def json_dumps(obj: Any) -> str:
+    """Encode a value with the fastest available backend, e.g. for JSON columns"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=OrjsonProvider.option).decode()
+    return json.dumps(obj, default=_default)
+
+
+def json_loads(s) -> Any:
+    return orjson.loads(s) if orjson is not None else json.loads(s)
+
+
+def init_app(app, provider: Optional[str] = None):
+    """
+    Install the JSON provider (JSON_PROVIDER: 'auto', 'orjson' or 'stdlib')
+    and use the same encoder for database JSON columns. Call before
+    db.init_app so the engine picks up the serializer.
+    """
+    provider = provider or app.config.get('JSON_PROVIDER', 'auto')
+    if provider == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER is orjson but orjson is not installed')
+    use_orjson = orjson is not None and provider in ('auto', 'orjson')
+    app.json = OrjsonProvider(app) if use_orjson else StdlibJSONProvider(app)
+
+    engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    engine_options.setdefault('json_serializer', json_dumps)
+    engine_options.setdefault('json_deserializer', json_loads)
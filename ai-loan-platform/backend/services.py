@@ -0,0 +1,46 @@
+from importlib import import_module
+from typing import Any, List
+import threading
+
+
+class LazyService:
+    """
+    Module-level service singleton that imports its module and constructs
+    the instance on first attribute access. Route modules can declare
+    services without pulling reportlab, razorpay or Pillow in at import time.
+    """
+    def __init__(self, module: str, name: str, *args: Any, **kwargs: Any):
+        self._module = module
+        self._name = name
+        self._args = args
+        self._kwargs = kwargs
+        self._instance = None
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get(self) -> Any:
+        """Return the service, creating it if needed"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    factory = getattr(import_module(self._module, __package__), self._name)
+                    self._instance = factory(*self._args, **self._kwargs)
+                instance = self._instance
+        return instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._instance is not None else 'deferred'
+        return f'<LazyService {self._module}.{self._name} ({state})>'
+
+
+_registry: List[LazyService] = []
+
+
+def warm_services():
+    """Create every declared service, e.g. in a pre-fork master process"""
+    for service in list(_registry):
+        service.get()
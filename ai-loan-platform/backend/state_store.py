@@ -0,0 +1,139 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set, Tuple
+import json
+import os
+import threading
+import time
+
+SHARED_URL_SCHEMES = ('redis://', 'rediss://', 'unix://')
+
+
+class StateStoreConfigurationError(RuntimeError):
+    """Raised when several worker processes would each keep their own OAuth state"""
+
+
+class StateStore(ABC):
+    """
+    Interface for short-lived, single-use values such as OAuth state tokens
+    """
+    @abstractmethod
+    def put(self, key: str, value: Any, ttl: int):
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop(self, key: str) -> Optional[Any]:
+        """Return and delete a value, or None if it is missing or expired"""
+        raise NotImplementedError
+
+
+class InMemoryStateStore(StateStore):
+    """
+    Process-local state store with expiry driven by a timing wheel.
+    Each key is placed in the wheel slot covering its expiry time; expiring a
+    slot removes all its keys at once, so cleanup is O(expired) and never scans
+    live entries. The store holds at most `max_entries` keys, evicting the
+    soonest-to-expire slot when full.
+    """
+    def __init__(self, max_ttl: int = 600, resolution: int = 10, max_entries: int = 100000):
+        self.resolution = resolution
+        self.max_entries = max_entries
+        self._slot_count = max_ttl // resolution + 2
+        self._wheel: List[Set[str]] = [set() for _ in range(self._slot_count)]
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._max_ttl = max_ttl
+        self._cursor = self._tick(time.monotonic())
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: Any, ttl: int):
+        ttl = min(ttl, self._max_ttl)
+        now = time.monotonic()
+        expires_at = now + ttl
+        with self._lock:
+            self._advance(now)
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._wheel[self._tick(previous[0]) % self._slot_count].discard(key)
+            elif len(self._entries) >= self.max_entries:
+                self._evict_oldest()
+            self._entries[key] = (expires_at, value)
+            self._wheel[self._tick(expires_at) % self._slot_count].add(key)
+
+    def pop(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            self._wheel[self._tick(expires_at) % self._slot_count].discard(key)
+            return value if expires_at > now else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _tick(self, timestamp: float) -> int:
+        return int(timestamp // self.resolution)
+
+    def _advance(self, now: float):
+        """Expire every slot whose time has fully passed"""
+        current = self._tick(now)
+        steps = min(current - self._cursor, self._slot_count)
+        for offset in range(steps):
+            self._expire_slot((self._cursor + offset) % self._slot_count)
+        self._cursor = current
+
+    def _expire_slot(self, index: int):
+        for key in self._wheel[index]:
+            self._entries.pop(key, None)
+        self._wheel[index] = set()
+
+    def _evict_oldest(self):
+        for offset in range(self._slot_count):
+            index = (self._cursor + offset) % self._slot_count
+            if self._wheel[index]:
+                self._expire_slot(index)
+                return
+
+
+class RedisStateStore(StateStore):
+    """
+    Redis-backed state store shared by all workers.
+    Redis handles expiry; GETDEL makes consumption atomic.
+    """
+    def __init__(self, client, prefix: str = 'oauth_state:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisStateStore':
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def put(self, key: str, value: Any, ttl: int):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def pop(self, key: str) -> Optional[Any]:
+        raw = self.client.getdel(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+
+def create_state_store(url: Optional[str] = None) -> StateStore:
+    """Build the configured state store; defaults to in-memory"""
+    url = url or os.getenv('STATE_STORE_URL')
+    if url and url.startswith(SHARED_URL_SCHEMES):
+        return RedisStateStore.from_url(url)
+    return InMemoryStateStore()
+
+
+def require_shared_store(workers: int, url: Optional[str] = None):
+    """
+    Refuse to serve with several worker processes and an in-memory store:
+    a state issued by one worker would be unknown to the others, so most
+    DigiLocker callbacks would be rejected
+    """
+    url = url or os.getenv('STATE_STORE_URL')
+    if workers > 1 and not (url and url.startswith(SHARED_URL_SCHEMES)):
+        raise StateStoreConfigurationError(
+            f'{workers} workers need a shared OAuth state store; set STATE_STORE_URL to a redis:// URL'
+        )
@@ -0,0 +1,348 @@
+from array import array
+from datetime import date
+from itertools import compress
+from typing import Dict, Iterator, List, Optional, Tuple
+import csv
+import io
+import os
+import re
+
+from PyPDF2 import PdfReader
+
+# Transaction flags stored per row in TransactionColumns.flags
+FLAG_CREDIT = 1
+FLAG_SALARY = 2
+FLAG_BOUNCE = 4
+
+_MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+_DATE_PATTERN = (
+    r'(?:\d{4}-\d{2}-\d{2}'
+    r'|\d{1,2}[/-](?:\d{1,2}|[A-Za-z]{3})[/-]\d{2,4}'
+    r'|\d{1,2} [A-Za-z]{3} \d{4})'
+)
+_ISO_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})')
+_DMY_DATE_RE = re.compile(r'^(\d{1,2})[/\- ](\d{1,2}|[A-Za-z]{3})[/\- ](\d{2,4})')
+_AMOUNT_PATTERN = r'-?[\d,]+\.\d{2}(?:\s?(?:Cr|CR|Dr|DR))?'
+_PDF_LINE_RE = re.compile(
+    rf'^(?P<date>{_DATE_PATTERN})\s+(?P<description>.*?)\s+'
+    rf'(?P<amounts>(?:{_AMOUNT_PATTERN}\s+)*{_AMOUNT_PATTERN})\s*$'
+)
+_AMOUNT_RE = re.compile(_AMOUNT_PATTERN)
+_SALARY_RE = re.compile(r'\b(?:SALARY|SAL|PAYROLL|SALARIES)\b', re.IGNORECASE)
+_BOUNCE_RE = re.compile(
+    r'\b(?:BOUNCE[D]?|RETURN(?:ED)?|RTN|INSUFFICIENT|DISHONOU?RED|UNPAID)\b',
+    re.IGNORECASE
+)
+_CREDIT_HINT_RE = re.compile(r'\b(?:CR|CREDIT|DEPOSIT|SALARY|REFUND|INTEREST)\b', re.IGNORECASE)
+
+# Column header aliases used by common Indian bank CSV exports
+_CSV_COLUMNS = {
+    'date': ('date', 'txn date', 'transaction date', 'value date', 'tran date'),
+    'description': ('description', 'narration', 'particulars', 'remarks', 'details'),
+    'debit': ('debit', 'withdrawal', 'withdrawal amt', 'withdrawal amount', 'debit amount', 'dr'),
+    'credit': ('credit', 'deposit', 'deposit amt', 'deposit amount', 'credit amount', 'cr'),
+    'amount': ('amount', 'transaction amount'),
+    'balance': ('balance', 'closing balance', 'running balance', 'balance amt')
+}
+
+
+class StatementParseError(ValueError):
+    """Raised when a bank statement cannot be parsed"""
+
+
+class TransactionColumns:
+    """
+    Compact columnar storage for parsed transactions.
+    Descriptions are classified while parsing and only their flags are kept,
+    so a row costs 21 bytes regardless of the statement layout.
+    """
+    __slots__ = ('days', 'amounts', 'balances', 'flags')
+
+    def __init__(self):
+        self.days = array('l')       # proleptic Gregorian ordinals
+        self.amounts = array('d')    # signed: credits positive, debits negative
+        self.balances = array('d')
+        self.flags = array('B')
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def append(self, day: int, amount: float, balance: float, description: str):
+        flags = FLAG_CREDIT if amount > 0 else 0
+        if flags and _SALARY_RE.search(description):
+            flags |= FLAG_SALARY
+        if _BOUNCE_RE.search(description):
+            flags |= FLAG_BOUNCE
+
+        self.days.append(day)
+        self.amounts.append(amount)
+        self.balances.append(balance)
+        self.flags.append(flags)
+
+    def mask(self, flag: int) -> List[bool]:
+        """Return a boolean selector for rows carrying the given flag"""
+        return [bool(f & flag) for f in self.flags]
+
+
+class BankStatementParser:
+    """
+    Streaming parser for PDF and CSV bank statements.
+    PDFs are read one page at a time and CSVs one row at a time, so memory
+    stays proportional to the number of transactions, not the file size.
+    """
+    SUPPORTED_EXTENSIONS = {'pdf', 'csv'}
+    MAX_PREAMBLE_LINES = 30
+
+    def __init__(self, salary_min_amount: float = 5000):
+        self.salary_min_amount = salary_min_amount
+
+    def parse(self, file_path: str) -> TransactionColumns:
+        """
+        Parse a statement file into columnar transactions
+        """
+        extension = os.path.splitext(file_path)[1].lower().lstrip('.')
+        if extension not in self.SUPPORTED_EXTENSIONS:
+            raise StatementParseError(f'Unsupported statement format: {extension or "unknown"}')
+
+        if extension == 'csv':
+            with open(file_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+                rows = self._iter_csv_rows(f)
+                return self._collect(rows)
+
+        with open(file_path, 'rb') as f:
+            return self._collect(self._iter_pdf_rows(f))
+
+    def analyze(self, columns: TransactionColumns) -> Dict:
+        """
+        Compute statement analytics from columnar transactions
+        """
+        if not len(columns):
+            raise StatementParseError('No transactions found in statement')
+
+        days = columns.days
+        amounts = columns.amounts
+        credit_mask = columns.mask(FLAG_CREDIT)
+        salary_mask = [
+            is_salary and amount >= self.salary_min_amount
+            for is_salary, amount in zip(columns.mask(FLAG_SALARY), amounts)
+        ]
+
+        month_keys = array('l', (self._month_key(day) for day in days))
+        months = sorted(set(month_keys))
+
+        monthly_credits = dict.fromkeys(months, 0.0)
+        for month, amount in zip(compress(month_keys, credit_mask), compress(amounts, credit_mask)):
+            monthly_credits[month] += amount
+
+        salary_months = sorted(set(compress(month_keys, salary_mask)))
+        total_credits = sum(monthly_credits.values())
+
+        return {
+            'transaction_count': len(columns),
+            'period_start': date.fromordinal(min(days)).isoformat(),
+            'period_end': date.fromordinal(max(days)).isoformat(),
+            'months_covered': len(months),
+            'average_balance': round(self._average_daily_balance(columns), 2),
+            'monthly_credits': round(total_credits / len(months), 2),
+            'monthly_credit_breakdown': {
+                self._format_month(month): round(total, 2)
+                for month, total in monthly_credits.items()
+            },
+            'total_credits': round(total_credits, 2),
+            'total_debits': round(-sum(compress(amounts, (not c for c in credit_mask))), 2),
+            'salary_credits_found': bool(salary_months),
+            'salary_months': len(salary_months),
+            'average_salary': round(
+                sum(compress(amounts, salary_mask)) / max(1, sum(salary_mask)), 2
+            ),
+            'regular_income': self._is_regular(salary_months, months),
+            'bounce_count': sum(columns.mask(FLAG_BOUNCE))
+        }
+
+    def _collect(self, rows: Iterator[Tuple[int, Optional[float], Optional[float], str]]) -> TransactionColumns:
+        """Fill columns from (day, signed_amount, balance, description) rows"""
+        columns = TransactionColumns()
+        previous_balance = None
+
+        for day, amount, balance, description in rows:
+            if amount is None:
+                # Only the balance is known; derive the movement from it
+                if balance is None or previous_balance is None:
+                    previous_balance = balance
+                    continue
+                amount = balance - previous_balance
+            if balance is None:
+                balance = (previous_balance or 0.0) + amount
+
+            columns.append(day, amount, balance, description)
+            previous_balance = balance
+
+        return columns
+
+    def _iter_csv_rows(self, stream: io.TextIOBase) -> Iterator[Tuple[int, Optional[float], Optional[float], str]]:
+        """Yield transaction rows from a CSV statement"""
+        reader = csv.reader(stream)
+        index = None
+
+        for record in reader:
+            if index is None:
+                # Exports often start with account details before the header
+                index = self._match_csv_header(record)
+                if index is None and reader.line_num >= self.MAX_PREAMBLE_LINES:
+                    raise StatementParseError('Unrecognized statement CSV header')
+                continue
+
+            try:
+                day = _parse_date(record[index['date']])
+            except (IndexError, ValueError):
+                continue  # opening/closing summary lines
+
+            description = record[index['description']] if 'description' in index else ''
+            balance = _cell_amount(record, index.get('balance'))
+
+            if 'amount' in index:
+                amount = _cell_amount(record, index['amount'])
+            else:
+                credit = _cell_amount(record, index.get('credit')) or 0.0
+                debit = _cell_amount(record, index.get('debit')) or 0.0
+                amount = (credit - abs(debit)) if (credit or debit) else None
+
+            yield day, amount, balance, description
+
+        if index is None:
+            raise StatementParseError('Unrecognized statement CSV header')
+
+    def _match_csv_header(self, header: List[str]) -> Optional[Dict[str, int]]:
+        """Map known column names to their positions, or None if not a header"""
+        normalized = [cell.strip().lower().rstrip('.') for cell in header]
+        index = {}
+        for column, aliases in _CSV_COLUMNS.items():
+            for position, name in enumerate(normalized):
+                if name in aliases or name.split(' (')[0] in aliases:
+                    index.setdefault(column, position)
+                    break
+
+        if 'date' not in index or not ({'amount', 'credit', 'debit', 'balance'} & index.keys()):
+            return None
+        return index
+
+    def _iter_pdf_rows(self, stream) -> Iterator[Tuple[int, Optional[float], Optional[float], str]]:
+        """Yield transaction rows from the text layer of a PDF statement"""
+        try:
+            reader = PdfReader(stream)
+            pages = reader.pages
+        except Exception as e:
+            raise StatementParseError(f'Unreadable PDF statement: {e}')
+
+        previous_balance = None
+        for page in pages:
+            text = page.extract_text() or ''
+            for line in text.splitlines():
+                match = _PDF_LINE_RE.match(line.strip())
+                if not match:
+                    continue
+                try:
+                    day = _parse_date(match.group('date'))
+                except ValueError:
+                    continue
+
+                description = match.group('description')
+                values = _AMOUNT_RE.findall(match.group('amounts'))
+                balance = _parse_amount(values[-1])
+                if len(values) == 1:
+                    # Balance-only line, e.g. "Opening Balance"
+                    previous_balance = balance
+                    continue
+
+                amount = abs(_parse_amount(values[-2]))
+                marker = values[-2][-2:].upper()
+                if marker == 'CR' or (marker != 'DR' and self._is_credit(
+                        previous_balance, balance, amount, description)):
+                    signed = amount
+                else:
+                    signed = -amount
+
+                yield day, signed, balance, description
+                previous_balance = balance
+
+    def _is_credit(self, previous_balance: Optional[float], balance: float,
+                   amount: float, description: str) -> bool:
+        """Infer transaction direction from the running balance"""
+        if previous_balance is not None:
+            return abs((previous_balance + amount) - balance) <= abs((previous_balance - amount) - balance)
+        return bool(_CREDIT_HINT_RE.search(description))
+
+    def _average_daily_balance(self, columns: TransactionColumns) -> float:
+        """Average of end-of-day balances across the statement period"""
+        closing = {}
+        for day, balance in zip(columns.days, columns.balances):
+            closing[day] = balance
+
+        ordered_days = sorted(closing)
+        total = 0.0
+        for current, following in zip(ordered_days, ordered_days[1:]):
+            total += closing[current] * (following - current)
+        total += closing[ordered_days[-1]]
+
+        return total / (ordered_days[-1] - ordered_days[0] + 1)
+
+    def _is_regular(self, salary_months: List[int], months: List[int]) -> bool:
+        """Salary credited in at least three months and most months of the period"""
+        return len(salary_months) >= min(3, len(months)) and len(salary_months) >= 0.75 * len(months)
+
+    @staticmethod
+    def _month_key(day: int) -> int:
+        d = date.fromordinal(day)
+        return d.year * 12 + d.month - 1
+
+    @staticmethod
+    def _format_month(key: int) -> str:
+        return f'{key // 12:04d}-{key % 12 + 1:02d}'
+
+
+def _parse_date(value: str) -> int:
+    """Parse common statement date formats into an ordinal"""
+    value = value.strip()
+    match = _ISO_DATE_RE.match(value)
+    if match:
+        year, month, day = (int(part) for part in match.groups())
+        return date(year, month, day).toordinal()
+
+    match = _DMY_DATE_RE.match(value)
+    if not match:
+        raise ValueError(f'Invalid date: {value}')
+
+    day, month, year = match.groups()
+    month = int(month) if month.isdigit() else _MONTHS.get(month.lower())
+    if month is None:
+        raise ValueError(f'Invalid month: {value}')
+    year = int(year)
+    if year < 100:
+        year += 2000
+    return date(year, month, int(day)).toordinal()
+
+
+def _parse_amount(value: str) -> float:
+    """Parse an amount such as '1,23,456.00 Cr'"""
+    value = value.strip()
+    if value[-2:].upper() in ('CR', 'DR'):
+        value = value[:-2].strip()
+    return float(value.replace(',', ''))
+
+
+def _cell_amount(record: List[str], position: Optional[int]) -> Optional[float]:
+    """Read an amount cell, treating blanks as missing"""
+    if position is None or position >= len(record):
+        return None
+    value = record[position].strip()
+    if not value or value == '-':
+        return None
+    try:
+        amount = _parse_amount(value)
+    except ValueError:
+        return None
+    return -abs(amount) if value[-2:].upper() == 'DR' else amount
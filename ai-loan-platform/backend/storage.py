@@ -0,0 +1,275 @@
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+from urllib.parse import urlparse
+import os
+import shutil
+import tempfile
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Object headers S3Storage.touch keeps when it copies an object onto itself
+COPIED_HEADERS = (
+    'ContentType', 'ContentEncoding', 'ContentDisposition', 'ContentLanguage', 'CacheControl'
+)
+
+
+class Storage(ABC):
+    """
+    Interface for file storage addressed by relative keys such as
+    'ab/cd/<hash>' or 'loan_report_1.pdf'
+    """
+    @abstractmethod
+    def put(self, key: str, source: Union[str, BinaryIO], move: bool = False):
+        """Store a local file path or readable binary stream under `key`.
+        With `move`, a source path is consumed."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """Return the whole object; only for small objects"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Return a readable binary stream for the object"""
+        raise NotImplementedError
+
+    def stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the object in chunks without loading it whole"""
+        with closing(self.open(key)) as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Delete an object; missing objects are ignored"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def touch(self, key: str):
+        """Set the object's modified time to now; raises FileNotFoundError if it is missing"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def presign(self, key: str, expires_in: int = 300) -> Optional[str]:
+        """Time-limited URL for direct download, or None if unsupported"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list(self, prefix: str = '') -> Iterator[Tuple[str, float]]:
+        """Yield (key, modified timestamp) for objects under `prefix`"""
+        raise NotImplementedError
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """Path of a local copy of the object, valid inside the block"""
+        suffix = os.path.splitext(key)[1]
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self.stream(key):
+                    f.write(chunk)
+            yield path
+        finally:
+            os.unlink(path)
+
+
+class LocalStorage(Storage):
+    """
+    Storage in a directory on the local filesystem
+    """
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        """Filesystem path for a key; rejects keys escaping the root"""
+        root = os.path.abspath(self.root)
+        path = os.path.abspath(os.path.join(root, key))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f'Invalid storage key: {key}')
+        return path
+
+    def put(self, key: str, source: Union[str, BinaryIO], move: bool = False):
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if isinstance(source, str) and move and os.stat(source).st_dev == os.stat(directory).st_dev:
+            # A rename on one filesystem is atomic
+            os.replace(source, path)
+            return
+
+        # Otherwise copy next to the target and rename, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.put-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(source, str):
+                    with open(source, 'rb') as src:
+                        shutil.copyfileobj(src, f, STREAM_CHUNK_SIZE)
+                else:
+                    shutil.copyfileobj(source, f, STREAM_CHUNK_SIZE)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        if isinstance(source, str) and move:
+            os.unlink(source)
+
+    def get(self, key: str) -> bytes:
+        with open(self.path(key), 'rb') as f:
+            return f.read()
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), 'rb')
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, key: str):
+        os.utime(self.path(key))
+
+    def presign(self, key: str, expires_in: int = 300) -> Optional[str]:
+        return None
+
+    def list(self, prefix: str = '') -> Iterator[Tuple[str, float]]:
+        root = os.path.abspath(self.root)
+        start = os.path.join(root, prefix) if prefix else root
+        for directory, _, files in os.walk(start):
+            for name in files:
+                path = os.path.join(directory, name)
+                yield os.path.relpath(path, root).replace(os.sep, '/'), os.path.getmtime(path)
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        yield self.path(key)
+
+
+class S3Storage(Storage):
+    """
+    Storage in an S3-compatible bucket (AWS S3, MinIO).
+    Uploads use the transfer manager, so large files go up in multipart
+    chunks; downloads stream from the response body.
+    """
+    def __init__(self, bucket: str, prefix: str = '', client=None, **client_kwargs):
+        if client is None:
+            import boto3
+            client = boto3.client('s3', **client_kwargs)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'S3Storage':
+        """Build from 's3://bucket/prefix'; S3_ENDPOINT_URL selects MinIO etc."""
+        parsed = urlparse(url)
+        if os.getenv('S3_ENDPOINT_URL'):
+            kwargs.setdefault('endpoint_url', os.getenv('S3_ENDPOINT_URL'))
+        return cls(parsed.netloc, parsed.path, **kwargs)
+
+    def put(self, key: str, source: Union[str, BinaryIO], move: bool = False):
+        if isinstance(source, str):
+            self.client.upload_file(source, self.bucket, self.prefix + key)
+            if move:
+                os.unlink(source)
+        else:
+            self.client.upload_fileobj(source, self.bucket, self.prefix + key)
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body']
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> int:
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return head['ContentLength']
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def touch(self, key: str):
+        # S3 has no utime; copying an object onto itself resets LastModified.
+        # REPLACE is required for a self-copy and drops whatever is not passed
+        # again, so carry over the object's content headers and metadata.
+        from botocore.exceptions import ClientError
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        headers = {name: head[name] for name in COPIED_HEADERS if head.get(name)}
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=self.prefix + key,
+                CopySource={'Bucket': self.bucket, 'Key': self.prefix + key},
+                MetadataDirective='REPLACE',
+                Metadata=head.get('Metadata', {}),
+                **headers
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def presign(self, key: str, expires_in: int = 300) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self.prefix + key},
+            ExpiresIn=expires_in
+        )
+
+    def list(self, prefix: str = '') -> Iterator[Tuple[str, float]]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for item in page.get('Contents', []):
+                yield item['Key'][len(self.prefix):], item['LastModified'].timestamp()
+
+    def _head(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+
+def create_storage(url: Optional[str], root: str, namespace: str) -> Storage:
+    """
+    Build a storage backend. With an 's3://bucket[/prefix]' URL objects go
+    under '<prefix>/<namespace>/' in the bucket; otherwise files are kept
+    in the local `root` directory.
+    """
+    if url and url.startswith('s3://'):
+        return S3Storage.from_url(url.rstrip('/') + '/' + namespace)
+    return LocalStorage(root)
+
+
+def get_storage(app, name: str) -> Storage:
+    """Return the app's storage for 'uploads' or 'reports'"""
+    backends = app.extensions.setdefault('storage', {})
+    if name not in backends:
+        folder = {'uploads': 'UPLOAD_FOLDER', 'reports': 'REPORT_FOLDER'}[name]
+        backends[name] = create_storage(app.config.get('STORAGE_URL'), app.config[folder], name)
+    return backends[name]
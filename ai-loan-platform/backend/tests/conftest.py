@@ -4,6 +4,9 @@ from backend.models import db as _db
 import os
 import tempfile
 
+# PaymentGateway refuses to start without a key secret
+os.environ.setdefault('RAZORPAY_KEY_SECRET', 'test-key-secret')
+
 @pytest.fixture(scope='session')
 def app():
     """Create and configure a test Flask application"""
@@ -62,6 +65,15 @@ def session(db):
     connection.close()
     session.remove()
 
+@pytest.fixture
+def db_session(app):
+    """Provide a database session with fresh tables for each test"""
+    with app.app_context():
+        _db.create_all()
+        yield _db.session
+        _db.session.remove()
+        _db.drop_all()
+
 @pytest.fixture
 def client(app):
     """Provide a test client"""
@@ -220,4 +220,186 @@ def test_payment_verification_invalid_signature(client, auth_headers):
     )
     
     assert response.status_code == 400
-    assert 'error' in response.json
\ No newline at end of file
+    assert 'error' in response.json
+
+
+@pytest.fixture
+def payer(app, db_session):
+    """Provide a user with a loan application and their auth headers"""
+    from flask_jwt_extended import create_access_token
+    from backend.models import LoanApplication, User
+
+    user = User(email='payer@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.flush()
+    application = LoanApplication(user_id=user.id, full_name='Test User')
+    db_session.add(application)
+    db_session.commit()
+    headers = {
+        'Authorization': f'Bearer {create_access_token(identity=str(user.id))}',
+        'Content-Type': 'application/json'
+    }
+    return application.id, headers
+
+@pytest.fixture
+def order_calls(monkeypatch):
+    """Count orders created at the provider"""
+    from backend import routes
+
+    calls = []
+    def create_order(user_id, application_id):
+        calls.append(application_id)
+        return True, {'order_id': f'order_{len(calls)}', 'amount': 120, 'currency': 'INR',
+                      'receipt': f'REPORT-{application_id}'}
+    monkeypatch.setattr(routes.payment_gateway.get(), 'create_order', create_order)
+    return calls
+
+def test_create_order_reuses_open_order(client, payer, order_calls):
+    """Test repeated clicks on pay get the same order"""
+    application_id, headers = payer
+    data = json.dumps({'application_id': application_id})
+
+    first = client.post('/api/payment/create-order', data=data, headers=headers)
+    second = client.post('/api/payment/create-order', data=data, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json == second.json
+    assert first.json['receipt'] == f'REPORT-{application_id}'
+    assert len(order_calls) == 1
+
+def test_create_order_expired_order_is_replaced(app, client, payer, order_calls, monkeypatch):
+    """Test an order past PAYMENT_ORDER_TTL is not reused"""
+    application_id, headers = payer
+    data = json.dumps({'application_id': application_id})
+    monkeypatch.setitem(app.config, 'PAYMENT_ORDER_TTL', 0)
+
+    first = client.post('/api/payment/create-order', data=data, headers=headers)
+    second = client.post('/api/payment/create-order', data=data, headers=headers)
+
+    assert first.json['order_id'] != second.json['order_id']
+    assert len(order_calls) == 2
+
+def test_create_order_idempotency_key(app, client, payer, order_calls, db_session, monkeypatch):
+    """Test a repeated Idempotency-Key returns the cached order without a provider call"""
+    from backend.models import LoanApplication
+
+    application_id, headers = payer
+    other_application = LoanApplication(user_id=1, full_name='Test User')
+    db_session.add(other_application)
+    db_session.commit()
+    data = json.dumps({'application_id': application_id})
+    headers = {**headers, 'Idempotency-Key': 'click-1'}
+    monkeypatch.setitem(app.config, 'PAYMENT_ORDER_TTL', 0)
+
+    first = client.post('/api/payment/create-order', data=data, headers=headers)
+    second = client.post('/api/payment/create-order', data=data, headers=headers)
+    as_string = client.post('/api/payment/create-order', data=json.dumps({'application_id': str(application_id)}),
+                            headers=headers)
+    other = client.post('/api/payment/create-order', data=json.dumps({'application_id': other_application.id}),
+                        headers=headers)
+
+    assert first.json == second.json == as_string.json
+    assert len(order_calls) == 1
+    assert other.status_code == 422
+
+def test_receipt_is_rendered_once(app, client, payer, db_session, monkeypatch, tmp_path):
+    """Test the first receipt request stores a rendered receipt that later requests stream"""
+    from backend import routes
+    from backend.models import Payment
+    from backend.storage import LocalStorage
+
+    application_id, headers = payer
+    storage = LocalStorage(str(tmp_path))
+    monkeypatch.setitem(app.extensions.setdefault('storage', {}), 'reports', storage)
+    gateway = routes.payment_gateway.get()
+    renders = []
+    render = gateway.render_payment_receipt
+    monkeypatch.setattr(gateway, 'render_payment_receipt', lambda receipt: renders.append(receipt) or render(receipt))
+    db_session.add_all([
+        Payment(user_id=1, application_id=application_id, order_id='order_paid', payment_id='pay_0000receipt1',
+                amount=120.0, status='captured', payment_method='upi'),
+        Payment(user_id=1, application_id=application_id, order_id='order_failed', payment_id='pay_0000receipt2',
+                amount=120.0, status='failed'),
+    ])
+    db_session.commit()
+
+    first = client.get('/api/payment/pay_0000receipt1/receipt', headers=headers)
+    second = client.get('/api/payment/pay_0000receipt1/receipt', headers=headers)
+    failed = client.get('/api/payment/pay_0000receipt2/receipt', headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.mimetype == 'text/html'
+    assert first.data == second.data
+    assert b'RCP-receipt1' in first.data and b'120.00' in first.data
+    assert len(renders) == 1
+    assert b'Paid' in first.data
+    assert storage.exists('receipts/pay_0000receipt1-paid.html')
+    assert db_session.get(Payment, 1).receipt_path == 'receipts/pay_0000receipt1-paid.html'
+    assert failed.status_code == 404
+
+def test_receipt_is_rendered_again_after_refund(app, client, payer, db_session, monkeypatch, tmp_path):
+    """Test a stored receipt is replaced once the payment is refunded"""
+    from backend.models import Payment
+    from backend.payment_events import apply_payment_status
+    from backend.storage import LocalStorage
+
+    application_id, headers = payer
+    storage = LocalStorage(str(tmp_path))
+    monkeypatch.setitem(app.extensions.setdefault('storage', {}), 'reports', storage)
+    payment = Payment(user_id=1, application_id=application_id, order_id='order_paid',
+                      payment_id='pay_0000receipt1', amount=120.0, status='captured')
+    db_session.add(payment)
+    db_session.commit()
+
+    paid = client.get('/api/payment/pay_0000receipt1/receipt', headers=headers)
+    apply_payment_status(payment, 'refunded')
+    db_session.commit()
+    refunded = client.get('/api/payment/pay_0000receipt1/receipt', headers=headers)
+
+    assert b'Paid' in paid.data
+    assert refunded.status_code == 200
+    assert b'Refunded' in refunded.data
+    assert payment.receipt_path == 'receipts/pay_0000receipt1-refunded.html'
+    assert not storage.exists('receipts/pay_0000receipt1-paid.html')
+
+def test_download_digilocker_document_is_not_found(client, payer, db_session):
+    """Test documents fetched from DigiLocker have no file to download"""
+    from backend.models import UserDocument
+
+    _, headers = payer
+    document = UserDocument(user_id=1, document_type='pan', verification_method='digilocker',
+                            verification_details={'pan_number': 'ABCDE1234F'}, is_verified=True)
+    db_session.add(document)
+    db_session.commit()
+
+    response = client.get(f'/api/document/{document.id}/download', headers=headers)
+
+    assert response.status_code == 404
+    assert response.json == {'error': 'Document has no file'}
+
+def test_download_etag_matches_served_content(app, client, payer, db_session, monkeypatch, tmp_path):
+    """Test a normalized image is served with the hash of its stored bytes as ETag, not the upload's"""
+    import hashlib
+    from backend.content_store import LocalContentStore
+    from backend.models import UserDocument
+
+    _, headers = payer
+    store = LocalContentStore(str(tmp_path))
+    monkeypatch.setitem(app.extensions, 'content_store', store)
+    normalized = tmp_path / 'image.jpg'
+    normalized.write_bytes(b'normalized jpeg')
+    normalized_hash = hashlib.sha256(b'normalized jpeg').hexdigest()
+    document = UserDocument(user_id=1, document_type='aadhaar', file_name='aadhaar.jpg', mime_type='image/jpeg',
+                            content_hash=hashlib.sha256(b'uploaded png').hexdigest(),
+                            file_path=store.put_file(str(normalized), normalized_hash))
+    db_session.add(document)
+    db_session.commit()
+
+    response = client.get(f'/api/document/{document.id}/download', headers=headers)
+    cached = client.get(f'/api/document/{document.id}/download',
+                        headers={**headers, 'If-None-Match': f'"{normalized_hash}"'})
+
+    assert response.data == b'normalized jpeg'
+    assert response.get_etag() == (normalized_hash, False)
+    assert cached.status_code == 304
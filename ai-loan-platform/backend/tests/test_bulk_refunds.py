@@ -0,0 +1,133 @@
+from datetime import timedelta
+from types import SimpleNamespace
+import time
+import pytest
+from backend.benchmarks.fake_razorpay import FakeRazorpay
+from backend.bulk_refunds import RateLimiter, RefundRunner, create_refund_job, job_progress
+from backend.models import LoanApplication, Payment, RefundItem, User, db
+from backend.razorpay_client import RazorpaySession, create_client
+
+@pytest.fixture
+def fake():
+    """Provide a running fake Razorpay server"""
+    with FakeRazorpay() as server:
+        yield server
+
+@pytest.fixture
+def gateway(fake):
+    """Provide a gateway stand-in whose client talks to the fake server"""
+    session = RazorpaySession(timeout=(1, 1), max_retries=0, backoff_factor=0)
+    yield SimpleNamespace(client=create_client('key', fake.key_secret, base_url=fake.url, session=session))
+    session.close()
+
+@pytest.fixture
+def payments(db_session, fake, gateway):
+    """Provide three captured report fee payments, paid at the fake server"""
+    user = User(email='refunds@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.flush()
+    payments = []
+    for _ in range(3):
+        application = LoanApplication(user_id=user.id, payment_status='completed')
+        db_session.add(application)
+        db_session.flush()
+        order = gateway.client.order.create(data={'amount': 12000, 'currency': 'INR'})
+        payment_id = fake.pay(order['id'])['razorpay_payment_id']
+        payments.append(Payment(user_id=user.id, application_id=application.id, order_id=order['id'],
+                                payment_id=payment_id, amount=120.0, status='captured'))
+    db_session.add_all(payments)
+    db_session.commit()
+    return payments
+
+def _runner(app, gateway):
+    return RefundRunner(app, gateway, concurrency=2, rate=100, throttle_pause=0)
+
+def test_refunds_are_recorded_against_payments(app, db_session, fake, gateway, payments):
+    """Test every captured payment is refunded once and marked refunded"""
+    job = create_refund_job([payment.payment_id for payment in payments] + ['pay_unknown'], reason='Lender outage')
+
+    progress = _runner(app, gateway).run(job.id)
+
+    assert progress['refunded'] == 3
+    assert progress['total'] == 3
+    assert progress['eta_seconds'] == 0
+    for payment in payments:
+        payment = db_session.get(Payment, payment.id)
+        assert payment.status == 'refunded'
+        assert payment.amount_refunded == 120.0
+        assert payment.refund_id == fake.refunds[payment.payment_id][0]['id']
+        assert db_session.get(LoanApplication, payment.application_id).payment_status == 'refunded'
+
+def test_query_skips_payments_that_are_not_captured(app, db_session, gateway, payments):
+    """Test a query job records uncaptured payments as skipped"""
+    payments[0].status = 'failed'
+    db_session.commit()
+
+    job = create_refund_job(query=db.select(Payment).order_by(Payment.id))
+    progress = _runner(app, gateway).run(job.id)
+
+    assert (progress['refunded'], progress['skipped']) == (2, 1)
+    assert progress['status'] == 'completed'
+
+def test_transient_failures_are_retried(app, db_session, fake, gateway, payments):
+    """Test a provider error puts the item back for another attempt"""
+    job = create_refund_job([payments[0].payment_id])
+    fake.fail_next(1)
+
+    progress = _runner(app, gateway).run(job.id)
+
+    item = RefundItem.query.filter_by(job_id=job.id).one()
+    assert progress['refunded'] == 1
+    assert item.attempts == 2
+    assert len(fake.refunds[payments[0].payment_id]) == 1
+
+def test_timed_out_refund_is_not_issued_twice(app, db_session, fake, gateway, payments):
+    """Test a refund created by Razorpay whose response timed out is recorded, not retried"""
+    job = create_refund_job([payments[0].payment_id])
+    fake.slow_next(1, seconds=1.5)
+
+    progress = _runner(app, gateway).run(job.id)
+
+    item = RefundItem.query.filter_by(job_id=job.id).one()
+    assert progress['refunded'] == 1
+    assert item.attempts == 1
+    assert len(fake.refunds[payments[0].payment_id]) == 1
+    assert item.refund_id == fake.refunds[payments[0].payment_id][0]['id']
+
+def test_resume_does_not_refund_twice(app, db_session, fake, gateway, payments):
+    """Test items left processing by a crash are settled from the provider's refunds"""
+    job = create_refund_job([payment.payment_id for payment in payments])
+    items = RefundItem.query.filter_by(job_id=job.id).order_by(RefundItem.id).all()
+    # The first refund reached Razorpay but the run died before recording it
+    items[0].status = 'processing'
+    items[0].attempts = 1
+    db_session.commit()
+    gateway.client.payment.refund(payments[0].payment_id, {'amount': 12000, 'notes': {'refund_item': str(items[0].id)}})
+
+    progress = _runner(app, gateway).run(job.id)
+
+    assert progress['refunded'] == 3
+    assert all(len(fake.refunds[payment.payment_id]) == 1 for payment in payments)
+
+def test_progress_reports_throughput(db_session, payments):
+    """Test progress counts items per status and derives an ETA from the refund rate"""
+    job = create_refund_job([payment.payment_id for payment in payments])
+    item = RefundItem.query.filter_by(job_id=job.id).first()
+    item.status = 'refunded'
+    job.started_at = job.created_at
+    db_session.commit()
+
+    progress = job_progress(job, now=job.started_at + timedelta(seconds=2))
+
+    assert (progress['refunded'], progress['pending']) == (1, 2)
+    assert progress['refunds_per_second'] == 0.5
+    assert progress['eta_seconds'] == 4
+
+def test_rate_limiter_spaces_requests():
+    """Test the token bucket admits a burst, then `rate` requests per second"""
+    limiter = RateLimiter(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.09
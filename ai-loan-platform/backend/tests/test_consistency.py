@@ -0,0 +1,117 @@
+import pytest
+from datetime import date
+from backend.consistency import (
+    ConsistencyEngine,
+    normalize_address,
+    normalize_date,
+    normalize_name,
+    token_similarity
+)
+from backend.models import LoanApplication, UserDocument
+
+@pytest.fixture
+def engine():
+    """Provide a consistency engine"""
+    return ConsistencyEngine()
+
+@pytest.fixture
+def application():
+    """Provide a loan application matching the sample documents"""
+    return LoanApplication(
+        full_name='Rahul Kumar Sharma',
+        date_of_birth=date(1990, 1, 1),
+        pan_number='ABCDE1234F',
+        address_line1='12, MG Rd',
+        address_line2='Indiranagar',
+        city='Bengaluru',
+        state='Karnataka',
+        pincode='560038',
+        monthly_income=50000
+    )
+
+@pytest.fixture
+def documents():
+    """Provide eKYC, PAN and salary slip documents for the same person"""
+    return [
+        UserDocument(document_type='aadhaar', verification_details={
+            'name': 'Mr. Rahul K Sharma',
+            'dob': '01-01-1990',
+            'address': {
+                'street': '12 Mahatma Gandhi Road, Indiranagar',
+                'city': 'Bangalore',
+                'state': 'Karnataka',
+                'pincode': '560038'
+            }
+        }),
+        UserDocument(document_type='pan', verification_details={
+            'name': 'RAHUL KUMAR SHARMA',
+            'number': 'ABCDE1234F',
+            'dob': '1990-01-01'
+        }),
+        UserDocument(document_type='salary_slip', verification_details={
+            'gross_salary': 60000,
+            'net_salary': 49200,
+            'employer_name': 'Acme Technologies Pvt Ltd'
+        })
+    ]
+
+def test_normalization():
+    """Test names, dates and addresses are normalized"""
+    assert normalize_name('Mr. Rahul  K. Sharma') == ['rahul', 'k', 'sharma']
+    assert normalize_date('01/02/1990') == '1990-02-01'
+    assert normalize_date(date(1990, 2, 1)) == '1990-02-01'
+    assert normalize_date('not a date') is None
+
+    tokens, pincode = normalize_address('Flat 4, MG Rd, Bengaluru 560038')
+    assert pincode == '560038'
+    assert tokens == ['flat', '4', 'mahatma', 'gandhi', 'road', 'bangalore']
+
+def test_token_similarity():
+    """Test fuzzy token matching is order-insensitive and tolerates typos"""
+    assert token_similarity(['rahul', 'sharma'], ['sharma', 'rahul']) == 1.0
+    assert token_similarity(['rahul', 'sharma'], ['rahul', 'sharmaa']) > 0.9
+    assert token_similarity(['rahul', 'sharma'], ['priya', 'nair']) < 0.5
+    assert token_similarity([], ['rahul']) == 0.0
+
+def test_reconcile_matching_documents(engine, application, documents):
+    """Test consistent documents verify address and income"""
+    result = engine.reconcile(application, documents)
+
+    assert result['field_scores']['dob'] == 1.0
+    assert result['field_scores']['pan'] == 1.0
+    assert result['field_scores']['name'] >= engine.name_threshold
+    assert result['address_verified'] == True
+    assert result['income_verified'] == True
+    assert application.address_verified == True
+    assert application.consistency_score == result['consistency_score']
+    assert application.consistency_details['sources']['income'] == ['salary_slip']
+
+def test_reconcile_mismatched_documents(engine, application, documents):
+    """Test a different pincode and inflated income fail verification"""
+    documents[0].verification_details = dict(
+        documents[0].verification_details,
+        address={'street': '99 Park Street', 'city': 'Kolkata', 'pincode': '700016'}
+    )
+    application.monthly_income = 150000
+
+    result = engine.reconcile(application, documents)
+
+    assert result['address_verified'] == False
+    assert result['income_verified'] == False
+    assert result['field_scores']['address'] <= 0.5
+
+def test_normalized_fields_cached(engine, documents, monkeypatch):
+    """Test documents are only re-normalized when their details change"""
+    document = documents[1]
+    first = engine.normalize_document(document)
+
+    calls = []
+    original = engine._normalize_details
+    monkeypatch.setattr(engine, '_normalize_details', lambda *args: calls.append(args) or original(*args))
+
+    assert engine.normalize_document(document) == first
+    assert calls == []
+
+    document.verification_details = dict(document.verification_details, name='Priya Nair')
+    assert engine.normalize_document(document)['name'] == ['priya', 'nair']
+    assert len(calls) == 1
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import time
+import pytest
+from backend.content_store import LocalContentStore, collect_garbage, migrate_legacy_paths, reference_count
+from backend.models import User, UserDocument
+
+@pytest.fixture
+def store(tmp_path):
+    """Provide a content store in a temporary folder"""
+    return LocalContentStore(str(tmp_path / 'store'))
+
+def _stage(tmp_path, data, name='upload.tmp'):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path), hashlib.sha256(data).hexdigest()
+
+def _age(store, content_hash, seconds=7200):
+    past = time.time() - seconds
+    os.utime(store.storage.path(store.locate(content_hash)), (past, past))
+
+def test_identical_content_stored_once(store, tmp_path):
+    """Test a second copy of the same content is discarded"""
+    first, content_hash = _stage(tmp_path, b'statement', 'a.tmp')
+    second, _ = _stage(tmp_path, b'statement', 'b.tmp')
+
+    key = store.put_file(first, content_hash)
+    assert store.put_file(second, content_hash) == key
+    assert key == f'{content_hash[:2]}/{content_hash[2:4]}/{content_hash}'
+    assert not os.path.exists(first) and not os.path.exists(second)
+    assert list(store.iter_hashes()) == [content_hash]
+
+def test_duplicate_upload_renews_stored_content(db_session, store, tmp_path):
+    """Test re-uploading old content keeps it out of garbage collection until it is referenced"""
+    first, content_hash = _stage(tmp_path, b'statement', 'a.tmp')
+    store.put_file(first, content_hash)
+    _age(store, content_hash)
+
+    second, _ = _stage(tmp_path, b'statement', 'b.tmp')
+    store.put_file(second, content_hash)
+
+    assert collect_garbage(store) == []
+    assert store.exists(content_hash)
+
+def test_same_filename_different_content(store, tmp_path):
+    """Test uploads with the same name no longer overwrite each other"""
+    first, first_hash = _stage(tmp_path, b'one')
+    key_one = store.put_file(first, first_hash)
+    second, second_hash = _stage(tmp_path, b'two')
+    key_two = store.put_file(second, second_hash)
+
+    assert store.storage.get(key_one) == b'one'
+    assert store.storage.get(key_two) == b'two'
+
+def test_invalid_hash_rejected(store):
+    """Test paths cannot be built from arbitrary strings"""
+    with pytest.raises(ValueError):
+        store.locate('../../etc/passwd')
+
+def test_garbage_collection(db_session, store, tmp_path):
+    """Test only unreferenced content past the grace period is deleted"""
+    user = User(email='store@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.commit()
+
+    kept, kept_hash = _stage(tmp_path, b'kept', 'kept.tmp')
+    orphan, orphan_hash = _stage(tmp_path, b'orphan', 'orphan.tmp')
+    recent, recent_hash = _stage(tmp_path, b'recent', 'recent.tmp')
+    for path, content_hash in ((kept, kept_hash), (orphan, orphan_hash), (recent, recent_hash)):
+        store.put_file(path, content_hash)
+    _age(store, kept_hash)
+    _age(store, orphan_hash)
+
+    kept_key = store.locate(kept_hash)
+    db_session.add(UserDocument(user_id=user.id, document_type='pan', file_path=kept_key))
+    db_session.add(UserDocument(user_id=user.id, document_type='pan', thumbnail_path=kept_key))
+    db_session.commit()
+    assert reference_count(store, kept_hash) == 2
+
+    assert collect_garbage(store, batch_size=1) == [orphan_hash]
+    assert store.exists(kept_hash)
+    assert store.exists(recent_hash)
+    assert not store.exists(orphan_hash)
+
+def test_migrate_legacy_paths(db_session, store, tmp_path):
+    """Test filesystem paths from before storage keys are rewritten to content store keys"""
+    user = User(email='legacy@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.commit()
+
+    legacy = tmp_path / '12_statement.pdf'
+    legacy.write_bytes(b'%PDF-1.4 legacy')
+    legacy_hash = hashlib.sha256(b'%PDF-1.4 legacy').hexdigest()
+    current, current_hash = _stage(tmp_path, b'current')
+    current_key = store.put_file(current, current_hash)
+    documents = [
+        UserDocument(user_id=user.id, document_type='bank_statement', file_path=str(legacy)),
+        UserDocument(user_id=user.id, document_type='pan', file_path=current_key, content_hash=current_hash),
+        UserDocument(user_id=user.id, document_type='pan', file_path=str(tmp_path / 'missing.pdf')),
+    ]
+    db_session.add_all(documents)
+    db_session.commit()
+
+    assert migrate_legacy_paths(store, batch_size=1) == {'migrated': 1, 'missing': 1}
+    assert migrate_legacy_paths(store) == {'migrated': 0, 'missing': 1}
+
+    db_session.expire_all()
+    assert documents[0].file_path == store.locate(legacy_hash)
+    assert documents[0].content_hash == legacy_hash
+    assert store.storage.get(documents[0].file_path) == b'%PDF-1.4 legacy'
+    assert documents[1].file_path == current_key
+    assert documents[2].file_path == str(tmp_path / 'missing.pdf')
@@ -0,0 +1,88 @@
+import io
+import pytest
+from PIL import Image, ImageDraw
+from backend.document_index import (
+    DocumentIndex,
+    hamming_distance,
+    hash_bands,
+    perceptual_hash
+)
+from backend.models import User, UserDocument, DocumentFingerprint
+
+def _card_image(seed=0, size=(640, 400)):
+    """Draw a synthetic ID card"""
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([20, 20, 200, 240], fill=(90 + seed * 40, 90, 160))
+    draw.rectangle([240, 60, 600, 90], fill='black')
+    draw.rectangle([240, 140, 500 - seed * 60, 170], fill='black')
+    draw.ellipse([400 - seed * 150, 250, 600 - seed * 150, 380], fill=(200, 40, 40))
+    return image
+
+@pytest.fixture
+def index():
+    """Provide a document index"""
+    return DocumentIndex()
+
+@pytest.fixture
+def users(db_session):
+    """Provide two users"""
+    users = [User(email=f'user{i}@example.com') for i in range(2)]
+    for user in users:
+        user.set_password('Test@123')
+    db_session.add_all(users)
+    db_session.commit()
+    return users
+
+def _add_document(session, index, user, content_hash, phash=None):
+    document = UserDocument(user_id=user.id, document_type='aadhaar', content_hash=content_hash)
+    session.add(document)
+    session.flush()
+    index.register(document, phash)
+    session.commit()
+    return document
+
+def test_perceptual_hash_survives_reencoding():
+    """Test a resized JPEG copy hashes close to the original"""
+    original = _card_image()
+    buffer = io.BytesIO()
+    original.resize((320, 200)).save(buffer, 'JPEG', quality=60)
+    copy = Image.open(io.BytesIO(buffer.getvalue()))
+
+    assert hamming_distance(perceptual_hash(original), perceptual_hash(copy)) <= 3
+    assert hamming_distance(perceptual_hash(original), perceptual_hash(_card_image(seed=2))) > 10
+
+def test_hash_bands():
+    """Test hashes split into 16-bit bands"""
+    assert hash_bands(0x0001000200030004) == [4, 3, 2, 1]
+
+def test_exact_reuse_across_users(db_session, index, users):
+    """Test the same file uploaded by another account is flagged"""
+    original = _add_document(db_session, index, users[0], 'a' * 64)
+
+    reuse = index.find_reuse(users[1].id, 'a' * 64)
+    assert reuse['reuse_detected'] == True
+    assert reuse['exact_matches'] == [original.id]
+
+    # Re-uploading your own document is not reuse
+    assert index.find_reuse(users[0].id, 'a' * 64)['reuse_detected'] == False
+
+def test_near_duplicate_image_reuse(db_session, index, users, tmp_path):
+    """Test a re-encoded copy of another user's ID image is flagged"""
+    path = tmp_path / 'card.png'
+    _card_image().save(path)
+    phash = index.image_hash(str(path), 'image/png')
+    original = _add_document(db_session, index, users[0], 'b' * 64, phash)
+
+    assert db_session.query(DocumentFingerprint).count() == 1
+
+    copy_path = tmp_path / 'copy.jpg'
+    _card_image().resize((480, 300)).save(copy_path, 'JPEG', quality=70)
+    copy_hash = index.image_hash(str(copy_path), 'image/jpeg')
+
+    reuse = index.find_reuse(users[1].id, 'c' * 64, copy_hash)
+    assert reuse['exact_matches'] == []
+    assert [match['document_id'] for match in reuse['near_matches']] == [original.id]
+
+    different = index.image_hash(str(path), 'application/pdf')
+    assert different is None
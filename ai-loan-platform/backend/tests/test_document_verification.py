@@ -1,5 +1,6 @@
 import pytest
 from backend.document_verification import DocumentVerification
+from backend.benchmarks.corpus import write_salary_slip_bundle
 import os
 from datetime import datetime
 
@@ -66,10 +67,12 @@ def test_ekyc_otp_verification(doc_verifier, mock_ekyc):
 
 def test_bank_statement_verification(doc_verifier, tmp_path):
     """Test bank statement verification"""
-    # Create a sample PDF file
-    file_path = tmp_path / "bank_statement.pdf"
+    # Create a sample CSV statement
+    file_path = tmp_path / "bank_statement.csv"
     with open(file_path, 'w') as f:
-        f.write("Sample bank statement content")
+        f.write("Date,Narration,Debit,Credit,Balance\n")
+        f.write("01/01/2024,SALARY JAN,,60000.00,60000.00\n")
+        f.write("05/01/2024,RENT,15000.00,,45000.00\n")
     
     success, analysis = doc_verifier.verify_bank_statement(str(file_path))
     
@@ -82,11 +85,9 @@ def test_bank_statement_verification(doc_verifier, tmp_path):
 def test_salary_slip_verification(doc_verifier, tmp_path):
     """Test salary slip verification"""
     # Create a sample PDF file
-    file_path = tmp_path / "salary_slip.pdf"
-    with open(file_path, 'w') as f:
-        f.write("Sample salary slip content")
+    file_path = write_salary_slip_bundle(str(tmp_path / "salary_slip.pdf"))
     
-    success, analysis = doc_verifier.verify_salary_slip(str(file_path))
+    success, analysis = doc_verifier.verify_salary_slip(file_path)
     
     assert success == True
     assert 'verified' in analysis
@@ -181,4 +182,29 @@ def test_ekyc_data_processing(doc_verifier):
     assert processed_data['dob'] == sample_data['dob']
     assert processed_data['gender'] == sample_data['gender']
     assert 'address' in processed_data
-    assert 'verification_timestamp' in processed_data
\ No newline at end of file
+    assert 'verification_timestamp' in processed_data
+
+
+def test_digilocker_state_validation(doc_verifier, sample_auth_code, mock_digilocker):
+    """Test the callback only accepts states issued to the same user"""
+    from urllib.parse import parse_qs, urlparse
+    
+    auth_url = doc_verifier.generate_digilocker_auth_url(user_id=1)
+    state = parse_qs(urlparse(auth_url).query)['state'][0]
+    
+    # Unknown state and another user's state are rejected
+    success, response = doc_verifier.handle_digilocker_callback(sample_auth_code, 'forged', 1)
+    assert success == False
+    assert response['error'] == 'Invalid or expired state'
+    
+    success, response = doc_verifier.handle_digilocker_callback(sample_auth_code, state, 2)
+    assert success == False
+    
+    # States are single use, so a fresh one is needed after the failed attempt
+    auth_url = doc_verifier.generate_digilocker_auth_url(user_id=1)
+    state = parse_qs(urlparse(auth_url).query)['state'][0]
+    success, documents = doc_verifier.handle_digilocker_callback(sample_auth_code, state, 1)
+    assert success == True
+    
+    success, response = doc_verifier.handle_digilocker_callback(sample_auth_code, state, 1)
+    assert success == False
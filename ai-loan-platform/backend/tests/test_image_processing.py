@@ -0,0 +1,141 @@
+import hashlib
+import os
+import pytest
+import threading
+import time
+from PIL import Image, ImageDraw
+from backend.content_store import LocalContentStore, collect_garbage
+from backend import image_processing
+from backend.image_processing import ImageProcessor
+from backend.models import User, UserDocument
+
+def _photo(path, size=(4000, 3000), orientation=None):
+    """Write a large noisy JPEG with EXIF metadata"""
+    image = Image.effect_noise(size, 40).convert('RGB')
+    ImageDraw.Draw(image).rectangle([100, 100, 1500, 900], fill=(30, 60, 200))
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(path, 'JPEG', quality=95, exif=exif.tobytes())
+
+@pytest.fixture
+def processor():
+    """Provide an image processor"""
+    return ImageProcessor(max_dimension=1600, thumbnail_size=200)
+
+@pytest.fixture
+def store(app, tmp_path, monkeypatch):
+    """Point the app's content store at a temporary folder"""
+    store = LocalContentStore(str(tmp_path / 'store'))
+    monkeypatch.setitem(app.extensions, 'content_store', store)
+    return store
+
+def test_normalize_downscales_and_strips_exif(processor, tmp_path):
+    """Test photos are shrunk, rotated upright and lose their metadata"""
+    source = tmp_path / 'card.jpg'
+    _photo(source, orientation=6)
+
+    result = processor.normalize(str(source), str(tmp_path))
+
+    with Image.open(result['image_path']) as image:
+        # Orientation 6 means the camera was rotated; output is portrait
+        assert image.size == (1200, 1600)
+        assert not image.getexif()
+    with Image.open(result['thumbnail_path']) as thumbnail:
+        assert max(thumbnail.size) == 200
+    assert result['image_size'] * 5 < os.path.getsize(source)
+
+def test_png_with_transparency(processor, tmp_path):
+    """Test transparent PNG scans are flattened to JPEG"""
+    source = tmp_path / 'scan.png'
+    Image.new('RGBA', (800, 500), (0, 0, 0, 0)).save(source)
+
+    result = processor.normalize(str(source), str(tmp_path))
+
+    with Image.open(result['image_path']) as image:
+        assert image.mode == 'RGB'
+        assert image.getpixel((10, 10)) == (255, 255, 255)
+
+def test_process_document(app, db_session, processor, store, tmp_path):
+    """Test the stored document is replaced and the original collected"""
+    user = User(email='photo@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.commit()
+
+    source = tmp_path / 'aadhaar.jpg'
+    _photo(source, size=(2400, 1800))
+    original_hash = hashlib.sha256(source.read_bytes()).hexdigest()
+    original_key = store.put_file(str(source), original_hash)
+
+    document = UserDocument(user_id=user.id, document_type='aadhaar', file_path=original_key,
+                            file_name='aadhaar.jpeg', mime_type='image/jpeg', content_hash=original_hash)
+    db_session.add(document)
+    db_session.commit()
+
+    assert processor.submit(app, document.id).result() == True
+    processor.shutdown()
+
+    db_session.refresh(document)
+    assert document.file_path != original_key
+    assert document.thumbnail_path is not None
+    assert document.original_path is None
+    assert document.file_name == 'aadhaar.jpg'
+    assert document.file_size == store.storage.size(document.file_path)
+    # The upload hash is kept for reuse detection
+    assert document.content_hash == original_hash
+
+    assert collect_garbage(store, grace_period=-1) == [original_hash]
+    assert store.storage.exists(document.file_path)
+    assert store.storage.exists(document.thumbnail_path)
+
+def test_original_kept_by_policy(app, db_session, processor, store, tmp_path, monkeypatch):
+    """Test originals stay referenced for document types that require them"""
+    monkeypatch.setitem(app.config, 'KEEP_ORIGINAL_DOCUMENT_TYPES', {'pan'})
+    user = User(email='pan@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.commit()
+
+    source = tmp_path / 'pan.jpg'
+    _photo(source, size=(1000, 700))
+    content_hash = hashlib.sha256(source.read_bytes()).hexdigest()
+    key = store.put_file(str(source), content_hash)
+    document = UserDocument(user_id=user.id, document_type='pan', file_path=key,
+                            file_name='pan.jpg', mime_type='image/jpeg', content_hash=content_hash)
+    db_session.add(document)
+    db_session.commit()
+
+    assert processor.process_document(app, document.id) == True
+    db_session.refresh(document)
+    assert document.original_path == key
+
+def test_concurrent_submits_share_one_executor(processor, monkeypatch):
+    """Test requests submitting at once start a single thread pool"""
+    created = []
+
+    class SlowExecutor(image_processing.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(image_processing, 'ThreadPoolExecutor', SlowExecutor)
+    monkeypatch.setattr(processor, 'process_document', lambda app, document_id: True)
+    start = threading.Barrier(4)
+    futures = []
+
+    def submit(document_id):
+        start.wait()
+        futures.append(processor.submit(None, document_id))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    processor.shutdown()
+
+    assert len(created) == 1
+    assert all(future.result() for future in futures)
@@ -100,6 +100,28 @@ def test_custom_metrics_collection(metrics_collector):
     assert hasattr(metrics, 'active_users')
     assert hasattr(metrics, 'error_rate')
 
+def test_custom_metrics_include_payments(metrics_collector, tmp_path, monkeypatch):
+    """Test payment funnel metrics exported by the app workers are published with the custom metrics"""
+    from backend.payment_metrics import PaymentMetrics
+    monkeypatch.setenv('PAYMENT_METRICS_DIR', str(tmp_path / 'payments'))
+    payments = PaymentMetrics()
+    payments.observe('create_order', 0.2)
+    payments.observe('fetch', 3.0, 'error')
+    payments.export()
+    
+    metrics_collector.config['monitoring']['thresholds'].update({
+        'api_response_time': {'warning': 1.0, 'critical': 2.0},
+        'error_rate': {'warning': 0.01, 'critical': 0.05}
+    })
+    
+    with patch.object(metrics_collector.logger, 'critical') as mock_critical:
+        metrics = metrics_collector.collect_custom_metrics()
+        metrics_collector._check_payment_thresholds(metrics)
+    
+    assert metrics.error_rate == 0.5
+    assert metrics.payments['operations']['create_order']['count'] == 1
+    assert mock_critical.call_count == 2  # error rate and fetch p99
+
 def test_metrics_saving(metrics_collector):
     """Test metrics saving to file"""
     # Create test metrics
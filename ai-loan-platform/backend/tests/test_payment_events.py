@@ -0,0 +1,215 @@
+from datetime import date
+import hashlib
+import hmac
+import json
+import threading
+import pytest
+from backend import routes
+from backend.models import LoanApplication, Payment, PaymentEvent, ReportJob, User
+from backend.payment_events import PaymentEventProcessor, apply_payment_status, record_event
+
+WEBHOOK_SECRET = 'test-webhook-secret'
+
+def _event(event, order_id='order_1', payment_id='pay_1', status='captured', **notes):
+    return {
+        'entity': 'event',
+        'event': event,
+        'payload': {
+            'payment': {
+                'entity': {
+                    'id': payment_id,
+                    'order_id': order_id,
+                    'amount': 12000,
+                    'currency': 'INR',
+                    'status': status,
+                    'method': 'upi',
+                    'notes': notes
+                }
+            }
+        }
+    }
+
+def _record(payload, event_id=None):
+    body = json.dumps(payload).encode()
+    return record_event(body, payload, event_id)
+
+@pytest.fixture
+def application(db_session):
+    """Provide a loan application with a created payment order"""
+    user = User(email='payer@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.flush()
+    application = LoanApplication(user_id=user.id, full_name='Test User',
+                                  date_of_birth=date(1990, 1, 1), loan_amount=500000)
+    db_session.add(application)
+    db_session.flush()
+    db_session.add(Payment(user_id=user.id, application_id=application.id,
+                           order_id='order_1', amount=120.0, status='created'))
+    db_session.commit()
+    return application
+
+@pytest.fixture
+def processor(app):
+    """Provide a payment event processor"""
+    return PaymentEventProcessor(app, batch_size=10)
+
+def test_record_event_deduplicates(db_session):
+    """Test redelivered events are stored once"""
+    payload = _event('payment.captured')
+
+    assert _record(payload, 'evt_1')
+    assert not _record(payload, 'evt_1')
+    assert _record(payload)
+    assert not _record(payload)
+    assert PaymentEvent.query.count() == 2
+
+def test_captured_event_completes_payment(db_session, application, processor):
+    """Test a capture marks the payment and application paid and queues the report"""
+    _record(_event('payment.captured'), 'evt_1')
+
+    assert processor.process_batch() == 1
+
+    payment = Payment.query.one()
+    application = db_session.get(LoanApplication, application.id)
+    assert payment.status == 'captured'
+    assert payment.payment_id == 'pay_1'
+    assert payment.payment_method == 'upi'
+    assert application.payment_status == 'completed'
+    assert application.payment_amount == 120.0
+    assert application.report_status == 'pending'
+    assert PaymentEvent.query.one().status == 'processed'
+    assert processor.process_batch() == 0
+
+def test_replayed_and_stale_events_are_idempotent(db_session, application, processor):
+    """Test duplicates and out-of-order events leave the final state unchanged"""
+    _record(_event('payment.captured'), 'evt_1')
+    _record(_event('order.paid'), 'evt_2')
+    _record(_event('payment.authorized', status='authorized'), 'evt_3')
+    _record(_event('payment.failed', payment_id='pay_0', status='failed'), 'evt_4')
+
+    assert processor.process_batch() == 4
+
+    assert Payment.query.one().status == 'captured'
+    assert db_session.get(LoanApplication, application.id).payment_status == 'completed'
+    assert ReportJob.query.count() == 1
+    assert {event.status for event in PaymentEvent.query} == {'processed'}
+
+def test_failed_attempt_then_capture(db_session, application, processor):
+    """Test a retry that succeeds after a failed attempt on the same order"""
+    _record(_event('payment.failed', payment_id='pay_0', status='failed'), 'evt_1')
+    processor.process_batch()
+    assert db_session.get(LoanApplication, application.id).payment_status == 'failed'
+
+    _record(_event('payment.captured'), 'evt_2')
+    processor.process_batch()
+
+    assert Payment.query.one().status == 'captured'
+    assert db_session.get(LoanApplication, application.id).payment_status == 'completed'
+
+def test_unknown_and_malformed_events(db_session, application, processor):
+    """Test events that cannot be applied are marked without blocking the batch"""
+    _record({'event': 'invoice.paid', 'payload': {}}, 'evt_1')
+    _record({'event': 'payment.captured', 'payload': {}}, 'evt_2')
+    _record(_event('payment.captured', order_id='order_missing'), 'evt_3')
+    _record(_event('payment.captured'), 'evt_4')
+
+    assert processor.process_batch() == 4
+
+    statuses = {event.event_id: event.status for event in PaymentEvent.query}
+    assert statuses == {'evt_1': 'ignored', 'evt_2': 'failed', 'evt_3': 'failed', 'evt_4': 'processed'}
+    assert Payment.query.one().status == 'captured'
+
+def test_order_without_payment_row_uses_notes(db_session, application, processor):
+    """Test orders placed before payments were recorded are created from their notes"""
+    _record(_event('payment.captured', order_id='order_old', payment_id='pay_old',
+                   user_id=str(application.user_id), application_id=str(application.id)), 'evt_1')
+
+    processor.process_batch()
+
+    payment = Payment.query.filter_by(order_id='order_old').one()
+    assert payment.status == 'captured'
+    assert payment.amount == 120.0
+
+def test_apply_payment_status_rejects_regressions(db_session, application):
+    """Test a refunded payment cannot be captured again"""
+    payment = Payment.query.one()
+
+    assert apply_payment_status(payment, 'captured', 'pay_1')
+    assert apply_payment_status(payment, 'refunded')
+    assert not apply_payment_status(payment, 'captured', 'pay_1')
+    assert db_session.get(LoanApplication, application.id).payment_status == 'refunded'
+
+def test_late_failure_of_earlier_attempt_is_ignored(db_session, application, processor):
+    """Test a failed event for another payment on the order does not undo an authorization"""
+    _record(_event('payment.authorized', payment_id='pay_2', status='authorized'), 'evt_1')
+    processor.process_batch()
+    _record(_event('payment.failed', payment_id='pay_1', status='failed'), 'evt_2')
+    processor.process_batch()
+
+    payment = Payment.query.one()
+    assert (payment.status, payment.payment_id) == ('authorized', 'pay_2')
+    assert db_session.get(LoanApplication, application.id).payment_status == 'completed'
+
+    # The authorized payment itself can still fail
+    assert apply_payment_status(payment, 'failed', 'pay_2')
+
+def test_poison_events_do_not_block_the_batch(db_session, application, processor):
+    """Test events that raise are marked failed while the rest of the batch applies"""
+    db_session.add(Payment(user_id=application.user_id, application_id=application.id,
+                           order_id='order_2', amount=120.0, status='created'))
+    db_session.commit()
+    _record(_event('payment.captured'), 'evt_1')
+    processor.process_batch()
+
+    _record(_event('payment.captured', order_id='order_bad', payment_id='pay_bad',
+                   user_id='not-a-number', application_id=str(application.id)), 'evt_2')
+    # Reuses order_1's payment id: violates the unique constraint
+    _record(_event('payment.captured', order_id='order_2', payment_id='pay_1'), 'evt_3')
+    _record(_event('refund.processed', status='refunded'), 'evt_4')
+
+    assert processor.process_batch() == 3
+
+    events = {event.event_id: event for event in PaymentEvent.query}
+    assert {key: event.status for key, event in events.items()} == {
+        'evt_1': 'processed', 'evt_2': 'failed', 'evt_3': 'failed', 'evt_4': 'processed'}
+    assert 'invalid literal' in events['evt_2'].error
+    assert 'UNIQUE' in events['evt_3'].error
+    assert events['evt_3'].attempts == 1
+    assert Payment.query.filter_by(order_id='order_1').one().status == 'refunded'
+    assert Payment.query.filter_by(order_id='order_2').one().status == 'created'
+
+def test_run_survives_batch_errors(app, db_session, processor, monkeypatch):
+    """Test the worker loop logs a failed batch and keeps polling"""
+    stop = threading.Event()
+    calls = []
+
+    def process_batch():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('database unavailable')
+        stop.set()
+        return 0
+
+    monkeypatch.setattr(processor, 'process_batch', process_batch)
+    processor.run(poll_interval=0, stop=stop)
+
+    assert len(calls) == 2
+
+def test_webhook_endpoint(client, db_session, monkeypatch):
+    """Test the webhook checks the signature and acknowledges duplicates"""
+    monkeypatch.setattr(routes.payment_gateway.get(), 'webhook_secret', WEBHOOK_SECRET)
+    body = json.dumps(_event('payment.captured')).encode()
+    signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    headers = {'Content-Type': 'application/json', 'X-Razorpay-Event-Id': 'evt_1'}
+
+    response = client.post('/api/payment/webhook', data=body,
+                           headers={**headers, 'X-Razorpay-Signature': 'forged'})
+    assert response.status_code == 400
+
+    for _ in range(2):
+        response = client.post('/api/payment/webhook', data=body,
+                               headers={**headers, 'X-Razorpay-Signature': signature})
+        assert response.status_code == 200
+
+    assert PaymentEvent.query.count() == 1
@@ -1,6 +1,10 @@
 import pytest
-from backend.payment_gateway import PaymentGateway
+from backend.payment_gateway import PaymentConfigurationError, PaymentGateway, PaymentStatusCache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
+import hmac
+import threading
 
 @pytest.fixture
 def payment_gateway():
@@ -178,4 +182,102 @@ def test_concurrent_refund_requests(payment_gateway, mock_razorpay):
     # Second refund (should fail)
     success2, refund2 = payment_gateway.refund_payment(payment_id)
     assert success2 == False
-    assert 'error' in refund2
\ No newline at end of file
+    assert 'error' in refund2
+
+def _sign(secret, message):
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+def test_missing_key_secret_fails_at_startup(monkeypatch):
+    """Test the gateway refuses to start without a key secret"""
+    monkeypatch.delenv('RAZORPAY_KEY_SECRET')
+
+    with pytest.raises(PaymentConfigurationError):
+        PaymentGateway()
+
+def test_checkout_signature_uses_cached_key(payment_gateway, monkeypatch):
+    """Test checkout signatures are checked with the key read at startup"""
+    signature = _sign('test-key-secret', b'order_1|pay_1')
+    monkeypatch.setenv('RAZORPAY_KEY_SECRET', 'rotated-secret')
+
+    assert payment_gateway._verify_signature('order_1', 'pay_1', signature)
+    assert not payment_gateway._verify_signature('order_1', 'pay_2', signature)
+    assert not payment_gateway._verify_signature('order_1', 'pay_1', None)
+    assert not payment_gateway._verify_signature('order_1', 'pay_1', 'ünïcode')
+
+def test_webhook_signatures_are_verified_in_batches(payment_gateway):
+    """Test a burst of webhook deliveries is verified in order"""
+    payment_gateway.webhook_secret = 'webhook-secret'
+    bodies = [f'{{"event": "payment.captured", "n": {n}}}'.encode() for n in range(3)]
+    deliveries = [(body, _sign('webhook-secret', body)) for body in bodies]
+    deliveries[1] = (bodies[1], _sign('other-secret', bodies[1]))
+
+    assert payment_gateway.verify_webhook_signatures(deliveries) == [True, False, True]
+    assert payment_gateway.verify_webhook_signature(*deliveries[0])
+
+    payment_gateway.webhook_secret = None
+    assert payment_gateway.verify_webhook_signatures(deliveries) == [False, False, False]
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_status_lookups_share_one_fetch():
+    """Test concurrent lookups of one payment wait for a single upstream call"""
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch(payment_id):
+        calls.append(payment_id)
+        started.set()
+        release.wait(1)
+        return {'id': payment_id, 'status': 'captured'}
+
+    cache = PaymentStatusCache(ttl=5)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(cache.get, 'pay_1', fetch) for _ in range(8)]
+        started.wait(1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert calls == ['pay_1']
+    assert all(result['status'] == 'captured' for result in results)
+
+def test_status_cache_expiry():
+    """Test open statuses expire after the TTL and terminal ones are kept"""
+    clock = _Clock()
+    statuses = {'pay_open': 'authorized', 'pay_done': 'refunded'}
+    calls = []
+
+    def fetch(payment_id):
+        calls.append(payment_id)
+        return {'id': payment_id, 'status': statuses[payment_id]}
+
+    cache = PaymentStatusCache(ttl=5, clock=clock)
+    cache.get('pay_open', fetch)
+    cache.get('pay_done', fetch)
+    clock.now = 4
+    cache.get('pay_open', fetch)
+    clock.now = 3600
+    cache.get('pay_open', fetch)
+    cache.get('pay_done', fetch)
+
+    assert calls == ['pay_open', 'pay_done', 'pay_open']
+
+def test_status_cache_does_not_keep_errors():
+    """Test a failed fetch is raised to every waiter and retried on the next lookup"""
+    cache = PaymentStatusCache(ttl=5)
+    outcomes = [RuntimeError('provider down'), {'id': 'pay_1', 'status': 'captured'}]
+
+    def fetch(payment_id):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with pytest.raises(RuntimeError):
+        cache.get('pay_1', fetch)
+    assert cache.get('pay_1', fetch)['status'] == 'captured'
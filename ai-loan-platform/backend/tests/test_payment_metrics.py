@@ -0,0 +1,87 @@
+import multiprocessing
+import pytest
+from backend import payment_gateway as gateway_module
+from backend.benchmarks.fake_razorpay import FakeRazorpay
+from backend.payment_gateway import PaymentGateway
+from backend.payment_metrics import PaymentMetrics
+from backend.razorpay_client import RazorpaySession, create_client
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """Provide fresh payment metrics recorded by PaymentGateway"""
+    metrics = PaymentMetrics()
+    monkeypatch.setattr(gateway_module, 'payment_metrics', metrics)
+    return metrics
+
+@pytest.fixture
+def fake():
+    """Provide a running fake Razorpay server"""
+    with FakeRazorpay() as server:
+        yield server
+
+@pytest.fixture
+def gateway(fake, monkeypatch):
+    """Provide a payment gateway talking to the fake server"""
+    monkeypatch.setenv('RAZORPAY_KEY_SECRET', fake.key_secret)
+    gateway = PaymentGateway()
+    session = RazorpaySession(timeout=(1, 1), max_retries=0, backoff_factor=0)
+    gateway.client = create_client('key', fake.key_secret, base_url=fake.url, session=session)
+    yield gateway
+    session.close()
+
+def test_timed_records_latency_and_errors():
+    """Test timed blocks are counted as ok or error and raised errors propagate"""
+    metrics = PaymentMetrics()
+    with metrics.timed('fetch'):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.timed('fetch'):
+            raise RuntimeError('timeout')
+
+    fetch = metrics.snapshot()['operations']['fetch']
+    assert fetch['count'] == 2
+    assert fetch['errors'] == 1
+    assert fetch['outcomes'] == {'ok': 1, 'declined': 0, 'error': 1}
+    assert metrics.snapshot()['provider_error_rate'] == 0.5
+
+def _record_in_worker(directory):
+    metrics = PaymentMetrics()
+    metrics.observe('create_order', 0.2)
+    metrics.observe('verify_payment', 0.1)
+    metrics.export(directory)
+
+def test_metrics_are_merged_across_processes(tmp_path):
+    """Test counts recorded and exported by worker processes are read back by another process"""
+    context = multiprocessing.get_context('fork')
+    for _ in range(2):
+        worker = context.Process(target=_record_in_worker, args=(str(tmp_path),))
+        worker.start()
+        worker.join(10)
+        assert worker.exitcode == 0
+
+    snapshot = PaymentMetrics.load(str(tmp_path)).snapshot()
+
+    assert len(list(tmp_path.glob('payments-*.json'))) == 2
+    assert snapshot['operations']['create_order']['outcomes']['ok'] == 2
+    assert snapshot['operations']['create_order']['p50'] == 0.25
+    assert snapshot['capture_rate'] == 1.0
+
+def test_gateway_reports_the_payment_funnel(fake, gateway, metrics):
+    """Test orders, verifications, fetches and refunds are measured per operation"""
+    for _ in range(2):
+        _, order = gateway.create_order(1, 1)
+    checkout = fake.pay(order['order_id'])
+    gateway.verify_checkout(checkout)
+    gateway.verify_checkout({**checkout, 'razorpay_signature': '0' * 64})
+    gateway.get_payment_status(checkout['razorpay_payment_id'])
+    gateway.get_payment_status('pay_missing')
+    gateway.refund_payment(checkout['razorpay_payment_id'])
+
+    snapshot = metrics.snapshot()
+    operations = snapshot['operations']
+    assert operations['create_order']['outcomes']['ok'] == 2
+    assert operations['verify_payment']['outcomes'] == {'ok': 1, 'declined': 1, 'error': 0}
+    assert operations['fetch']['outcomes'] == {'ok': 1, 'declined': 0, 'error': 1}
+    assert operations['refund']['count'] == 1
+    assert operations['create_order']['p50'] is not None
+    assert snapshot['capture_rate'] == 0.5
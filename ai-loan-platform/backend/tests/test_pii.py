@@ -0,0 +1,51 @@
+import pytest
+from backend.models import AuditLog, User
+from backend.pii import mask_aadhaar, mask_fields, mask_pan, mask_pii
+
+APPLICATION = {
+    'full_name': 'Test User',
+    'pan_number': 'ABCDE1234F',
+    'aadhaar_number': '123456789012',
+    'loan_amount': 500000
+}
+
+def test_masks_are_idempotent():
+    """Test masking an already masked value changes nothing"""
+    assert mask_aadhaar(mask_aadhaar('123456789012')) == 'XXXX-XXXX-9012'
+    assert mask_pan(mask_pan('ABCDE1234F')) == 'AB****234F'
+    assert mask_aadhaar(123456789012) == 'XXXX-XXXX-9012'
+
+def test_mask_pii_nested():
+    """Test declared fields are masked at any depth without touching the input"""
+    data = {'application_data': APPLICATION, 'history': [{'pan': 'ABCDE1234F'}], 'pan_number': None}
+
+    masked = mask_pii(data)
+
+    assert masked['application_data']['pan_number'] == 'AB****234F'
+    assert masked['application_data']['aadhaar_number'] == 'XXXX-XXXX-9012'
+    assert masked['application_data']['loan_amount'] == 500000
+    assert masked['history'] == [{'pan': 'AB****234F'}]
+    assert masked['pan_number'] is None
+    assert data['application_data']['pan_number'] == 'ABCDE1234F'
+
+def test_mask_fields_flat():
+    """Test flat records are masked in place"""
+    record = dict(APPLICATION)
+    assert mask_fields(record) is record
+    assert record['aadhaar_number'] == 'XXXX-XXXX-9012'
+
+def test_audit_details_masked_on_write(db_session):
+    """Test audit logs never store raw Aadhaar or PAN"""
+    user = User(email='audit@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.commit()
+
+    db_session.add(AuditLog(user_id=user.id, action='application_submitted',
+                            details={'application_data': APPLICATION}))
+    db_session.commit()
+    db_session.expire_all()
+
+    stored = db_session.query(AuditLog).one().details['application_data']
+    assert stored['pan_number'] == 'AB****234F'
+    assert stored['aadhaar_number'] == 'XXXX-XXXX-9012'
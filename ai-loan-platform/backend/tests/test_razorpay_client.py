@@ -0,0 +1,93 @@
+import pytest
+import requests
+from backend.benchmarks.fake_razorpay import FakeRazorpay
+from backend.razorpay_client import LatencyHistogram, RazorpaySession, create_client
+
+@pytest.fixture
+def fake():
+    """Provide a running fake Razorpay server"""
+    with FakeRazorpay() as server:
+        yield server
+
+@pytest.fixture
+def session():
+    """Provide a Razorpay session with short timeouts and no backoff"""
+    session = RazorpaySession(timeout=(1, 0.2), max_retries=2, backoff_factor=0)
+    yield session
+    session.close()
+
+@pytest.fixture
+def client(fake, session):
+    """Provide a Razorpay client pointed at the fake server"""
+    return create_client('key', fake.key_secret, base_url=fake.url, session=session)
+
+def _order(client):
+    return client.order.create(data={'amount': 12000, 'currency': 'INR', 'receipt': 'REPORT-1'})
+
+def test_connections_are_reused(fake, client):
+    """Test sequential calls share one keep-alive connection"""
+    for _ in range(5):
+        order = _order(client)
+        payment_id = fake.pay(order['id'])['razorpay_payment_id']
+        assert client.payment.fetch(payment_id)['status'] == 'captured'
+
+    assert fake.requests == 10
+    assert fake.connections == 1
+
+def test_fetch_is_retried(fake, client):
+    """Test idempotent GETs are retried on server errors"""
+    payment_id = fake.pay(_order(client)['id'])['razorpay_payment_id']
+    fake.fail_next(2)
+
+    assert client.payment.fetch(payment_id)['id'] == payment_id
+    assert fake.requests == 4
+
+def test_retries_are_bounded(fake, client):
+    """Test a GET fails once retries are used up"""
+    payment_id = fake.pay(_order(client)['id'])['razorpay_payment_id']
+    fake.fail_next(3)
+
+    with pytest.raises(Exception):
+        client.payment.fetch(payment_id)
+    assert fake.requests == 4
+
+def test_order_creation_is_not_retried(fake, client):
+    """Test non-idempotent POSTs are sent once"""
+    fake.fail_next(1)
+
+    with pytest.raises(Exception):
+        _order(client)
+    assert fake.requests == 1
+    assert fake.orders == {}
+
+def test_slow_provider_times_out(fake, client, session):
+    """Test a stalled response is cut off by the read timeout"""
+    order = _order(client)
+    fake.latency = 0.5
+
+    with pytest.raises(requests.Timeout):
+        client.order.fetch(order['id'])
+
+    histogram = session.histograms['GET /v1/orders/{id}']
+    assert histogram.snapshot()['errors'] == 1
+
+def test_latency_is_recorded_per_endpoint(fake, client, session):
+    """Test histograms are keyed by endpoint with ids collapsed"""
+    for _ in range(3):
+        fake.pay(_order(client)['id'])
+
+    snapshot = session.latency_snapshot()
+    assert snapshot['POST /v1/orders']['count'] == 3
+    assert snapshot['POST /v1/orders']['buckets']['+Inf'] == 3
+
+def test_latency_histogram_quantiles():
+    """Test quantiles report bucket upper bounds"""
+    histogram = LatencyHistogram(buckets=(0.1, 0.5, 1.0))
+    for seconds in (0.05, 0.05, 0.2, 0.7, 3.0):
+        histogram.observe(seconds)
+
+    assert histogram.quantile(0.4) == 0.1
+    assert histogram.quantile(0.6) == 0.5
+    assert histogram.quantile(1.0) == float('inf')
+    assert histogram.snapshot()['buckets'] == {0.1: 2, 0.5: 3, 1.0: 4, '+Inf': 5}
+    assert LatencyHistogram().quantile(0.5) is None
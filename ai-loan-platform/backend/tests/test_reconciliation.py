@@ -0,0 +1,120 @@
+from datetime import datetime
+import csv
+import json
+import time
+import pytest
+from backend.models import Payment
+from backend.reconciliation import _binary_order, iter_fixture, iter_provider_payments, reconcile, write_report
+from backend.storage import LocalStorage
+
+START = datetime(2024, 5, 1)
+END = datetime(2024, 6, 1)
+
+def _payment(number, status='captured', amount=120.0, payment_id=True):
+    return Payment(user_id=1, application_id=number, order_id=f'order_{number:06d}',
+                   payment_id=f'pay_{number:06d}' if payment_id else None,
+                   amount=amount, status=status, created_at=datetime(2024, 5, 10))
+
+def _record(number, status='captured', amount=12000, **extra):
+    return {'id': f'pay_{number:06d}', 'order_id': f'order_{number:06d}',
+            'amount': amount, 'status': status, **extra}
+
+def test_reconcile_reports_mismatches(db_session):
+    """Test each kind of mismatch is found and matching payments are not reported"""
+    db_session.add_all([
+        _payment(1),
+        _payment(2, status='authorized'),
+        _payment(3, amount=100.0),
+        _payment(4),
+        _payment(5, status='created', payment_id=False),
+        _payment(6, status='created', payment_id=False),
+        _payment(7, status='created', payment_id=False),
+    ])
+    db_session.commit()
+    provider = [
+        _record(1),
+        _record(2),                     # captured at the provider, authorized locally
+        _record(3),                     # amount differs
+        _record(5),                     # callback never reached us
+        _record(6, status='failed'),    # failed attempt, nothing owed
+        _record(9),                     # unknown order
+    ]
+
+    mismatches = reconcile(reversed(provider), START, END)
+
+    kinds = {(row['kind'], row['payment_id']) for row in mismatches}
+    assert kinds == {
+        ('status_mismatch', 'pay_000002'),
+        ('amount_mismatch', 'pay_000003'),
+        ('missing_at_provider', 'pay_000004'),
+        ('status_mismatch', 'pay_000005'),
+        ('missing_locally', 'pay_000009'),
+    }
+
+def test_local_rows_are_ordered_like_python_strings(db_session):
+    """Test mixed-case ids merge without false mismatches and Postgres orders them by code point"""
+    from sqlalchemy.dialects import postgresql
+    ids = ['pay_Zeta', 'pay_alpha', 'pay_ALPHA', 'pay__x', 'pay_9']
+    for number, payment_id in enumerate(ids, 1):
+        payment = _payment(number)
+        payment.payment_id = payment_id
+        db_session.add(payment)
+    db_session.commit()
+    provider = [{**_record(number), 'id': payment_id} for number, payment_id in enumerate(ids, 1)]
+
+    assert reconcile(provider, START, END) == []
+    order = _binary_order(Payment.payment_id, 'postgresql').compile(dialect=postgresql.dialect())
+    assert 'COLLATE "C"' in str(order)
+
+def test_provider_window_is_utc(monkeypatch):
+    """Test day boundaries from the command line are read as UTC whatever the server timezone"""
+    monkeypatch.setenv('TZ', 'Asia/Kolkata')
+    time.tzset()
+    calls = []
+
+    class Payments:
+        def all(self, params):
+            calls.append(params)
+            return {'items': []}
+
+    try:
+        list(iter_provider_payments(type('Client', (), {'payment': Payments()})(), START, END))
+    finally:
+        monkeypatch.delenv('TZ')
+        time.tzset()
+    assert calls[0]['from'] == 1714521600
+    assert calls[0]['to'] == 1717199999
+
+def test_partial_refund_counts_as_refunded(db_session):
+    """Test captured payments with refunds match locally refunded rows"""
+    db_session.add(_payment(1, status='refunded'))
+    db_session.commit()
+
+    assert reconcile([_record(1, amount_refunded=6000)], START, END) == []
+
+def test_fixture_and_report(db_session, tmp_path):
+    """Test exports are read from JSON lines and CSV and the report is stored"""
+    jsonl = tmp_path / 'payments.jsonl'
+    jsonl.write_text(json.dumps(_record(1)) + '\n\n')
+    export = tmp_path / 'payments.csv'
+    export.write_text('id,order_id,amount,status\npay_000001,order_000001,12000,captured\n')
+
+    assert list(iter_fixture(str(jsonl))) == [_record(1)]
+    assert list(iter_fixture(str(export))) == [_record(1)]
+
+    storage = LocalStorage(str(tmp_path / 'reports'))
+    key = write_report(reconcile(iter_fixture(str(export)), START, END), storage, 'recon.csv')
+    with open(storage.path(key)) as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]['kind'] == 'missing_locally'
+
+def test_reconcile_month_of_payments(db_session):
+    """Test a month of payments reconciles without per-row queries"""
+    count = 20000
+    db_session.bulk_save_objects([_payment(number) for number in range(count)])
+    db_session.commit()
+    provider = [_record(number) for number in range(count)]
+
+    start = time.perf_counter()
+    assert reconcile(provider, START, END) == []
+    assert time.perf_counter() - start < 10
@@ -1,14 +1,15 @@
 import pytest
 from backend.report_generator import ReportGenerator
+from backend.storage import LocalStorage
 import os
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
 from PyPDF2 import PdfReader
 
 @pytest.fixture
-def report_generator():
-    """Provide a report generator instance"""
-    return ReportGenerator()
+def report_generator(tmp_path):
+    """Provide a report generator storing reports in a temporary folder"""
+    return ReportGenerator(storage=LocalStorage(str(tmp_path / 'reports')))
 
 @pytest.fixture
 def sample_application_data():
@@ -61,6 +62,7 @@ def test_report_generation(report_generator, sample_application_data, sample_ass
         sample_application_data,
         sample_assessment_data
     )
+    report_path = report_generator.storage.path(report_path)
     
     # Check if file was created
     assert os.path.exists(report_path)
@@ -118,6 +120,7 @@ def test_report_formatting(report_generator, sample_application_data, sample_ass
         sample_application_data,
         sample_assessment_data
     )
+    report_path = report_generator.storage.path(report_path)
     
     # Check PDF metadata and formatting
     pdf = PdfReader(report_path)
@@ -147,6 +150,7 @@ def test_report_with_missing_data(report_generator):
         incomplete_application,
         incomplete_assessment
     )
+    report_path = report_generator.storage.path(report_path)
     
     # Check if file was created despite missing data
     assert os.path.exists(report_path)
@@ -160,6 +164,7 @@ def test_report_file_naming(report_generator, sample_application_data, sample_as
         sample_application_data,
         sample_assessment_data
     )
+    report_path = report_generator.storage.path(report_path)
     
     # Check filename format
     filename = os.path.basename(report_path)
@@ -172,23 +177,19 @@ def test_report_file_naming(report_generator, sample_application_data, sample_as
 
 def test_report_directory_creation(report_generator):
     """Test report directory creation"""
-    # Remove reports directory if it exists
-    if os.path.exists(report_generator.report_folder):
-        os.rmdir(report_generator.report_folder)
+    report_folder = report_generator.storage.root
+    assert not os.path.exists(report_folder)
     
     # Generate a report (should create directory)
     report_path = report_generator.generate_report(
         {'id': 1, 'full_name': 'Test'},
         {'credit_score': 750}
     )
+    report_path = report_generator.storage.path(report_path)
     
     # Check if directory was created
-    assert os.path.exists(report_generator.report_folder)
-    assert os.path.isdir(report_generator.report_folder)
-    
-    # Clean up
-    os.remove(report_path)
-    os.rmdir(report_generator.report_folder)
+    assert os.path.isdir(report_folder)
+    assert os.path.dirname(report_path) == os.path.abspath(report_folder)
 
 def test_report_content_security(report_generator, sample_application_data, sample_assessment_data):
     """Test sensitive data handling in report"""
@@ -196,6 +197,7 @@ def test_report_content_security(report_generator, sample_application_data, samp
         sample_application_data,
         sample_assessment_data
     )
+    report_path = report_generator.storage.path(report_path)
     
     # Read PDF content
     pdf = PdfReader(report_path)
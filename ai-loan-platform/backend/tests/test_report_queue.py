@@ -0,0 +1,139 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+import os
+import pytest
+from backend.models import LoanApplication, ReportJob, User
+from backend.report_queue import ReportWorker, enqueue_report
+
+@pytest.fixture
+def application(db_session):
+    """Provide a saved loan application"""
+    user = User(email='report@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.flush()
+    application = LoanApplication(
+        user_id=user.id,
+        full_name='Test User',
+        date_of_birth=date(1990, 1, 1),
+        pan_number='ABCDE1234F',
+        aadhaar_number='123456789012',
+        employment_type='full_time',
+        monthly_income=50000,
+        loan_amount=500000,
+        loan_purpose='personal',
+        loan_tenure=24
+    )
+    db_session.add(application)
+    db_session.commit()
+    return application
+
+@pytest.fixture
+def threaded_worker(app, tmp_path):
+    """Provide a worker running jobs on threads"""
+    worker = ReportWorker(app, processes=2, retry_delay=0, report_folder=str(tmp_path),
+                          executor=ThreadPoolExecutor(max_workers=2))
+    yield worker
+    worker.shutdown()
+
+def test_enqueue_marks_report_pending(db_session, application):
+    """Test queueing a report leaves the job pending"""
+    job = enqueue_report(application)
+    db_session.commit()
+
+    assert job.status == 'pending'
+    assert application.report_status == 'pending'
+    assert not application.report_generated
+
+def test_claim_is_exclusive(app, db_session, application, threaded_worker):
+    """Test a job is handed to one claimer only"""
+    enqueue_report(application)
+    db_session.commit()
+
+    first = threaded_worker.claim(10)
+    second = threaded_worker.claim(10)
+
+    assert [job.application_id for job in first] == [application.id]
+    assert second == []
+    assert first[0].status == 'running'
+    assert first[0].attempts == 1
+    assert db_session.get(LoanApplication, application.id).report_status == 'generating'
+
+def test_worker_generates_report_in_process_pool(app, db_session, application, tmp_path):
+    """Test a queued report is rendered by a pool process and recorded"""
+    enqueue_report(application)
+    db_session.commit()
+    worker = ReportWorker(app, processes=1, report_folder=str(tmp_path))
+
+    try:
+        assert worker.run_once() == 1
+    finally:
+        worker.shutdown()
+
+    db_session.expire_all()
+    application = db_session.get(LoanApplication, application.id)
+    job = ReportJob.query.one()
+    assert job.status == 'completed'
+    assert application.report_status == 'completed'
+    assert application.report_generated
+    assert application.report_path == job.report_path
+    assert os.path.getsize(tmp_path / application.report_path) > 0
+    assert worker.run_once() == 0
+
+def test_failed_jobs_are_retried_then_failed(app, db_session, application, threaded_worker, monkeypatch):
+    """Test rendering errors are retried up to max_attempts"""
+    def broken_render(*args):
+        raise RuntimeError('renderer crashed')
+
+    monkeypatch.setattr('backend.report_queue.render_report', broken_render)
+    enqueue_report(application)
+    db_session.commit()
+
+    for _ in range(threaded_worker.max_attempts):
+        assert threaded_worker.run_once() == 1
+
+    db_session.expire_all()
+    job = ReportJob.query.one()
+    assert job.status == 'failed'
+    assert job.attempts == 3
+    assert job.last_error == 'renderer crashed'
+    assert db_session.get(LoanApplication, application.id).report_status == 'failed'
+    assert threaded_worker.run_once() == 0
+
+def test_broken_pool_is_replaced(app, db_session, application, tmp_path):
+    """Test a broken process pool puts the batch back for retry and is replaced"""
+    class BrokenExecutor(Executor):
+        def submit(self, fn, *args, **kwargs):
+            raise BrokenProcessPool('A child process terminated abruptly')
+
+    enqueue_report(application)
+    db_session.commit()
+    worker = ReportWorker(app, processes=1, retry_delay=0, report_folder=str(tmp_path),
+                          executor=BrokenExecutor())
+
+    assert worker.run_once() == 1
+
+    job = ReportJob.query.one()
+    assert job.status == 'pending'
+    assert 'Report pool broken' in job.last_error
+    assert worker._executor is None
+
+    worker._executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        assert worker.run_once() == 1
+    finally:
+        worker.shutdown()
+    db_session.expire_all()
+    assert ReportJob.query.one().status == 'completed'
+
+def test_stale_jobs_are_requeued(app, db_session, application, threaded_worker):
+    """Test jobs abandoned by a crashed worker become claimable again"""
+    enqueue_report(application)
+    db_session.commit()
+    threaded_worker.claim(10)
+
+    later = datetime.utcnow() + timedelta(seconds=threaded_worker.stale_after + 1)
+
+    assert threaded_worker.requeue_stale(now=later) == 1
+    assert len(threaded_worker.claim(10, now=later)) == 1
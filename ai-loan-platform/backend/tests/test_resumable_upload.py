@@ -0,0 +1,148 @@
+import hashlib
+import io
+import os
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.orm.attributes import set_committed_value
+from backend.error_handlers import ValidationError
+from backend.models import User, UploadSession
+from backend.resumable_upload import (
+    ResumableUploadManager,
+    UploadConflictError,
+    UploadOffsetError,
+    parse_content_range
+)
+
+PDF_DATA = b'%PDF-1.4\n' + os.urandom(300000)
+
+@pytest.fixture
+def manager():
+    """Provide an upload manager with small chunks"""
+    return ResumableUploadManager(max_chunk_size=128 * 1024, max_file_size=1024 * 1024)
+
+@pytest.fixture
+def user(db_session):
+    """Provide a user"""
+    user = User(email='uploader@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+@pytest.fixture
+def upload_session(manager, user, tmp_path):
+    """Provide an open upload session for PDF_DATA"""
+    return manager.create_session(
+        user.id, 'bank_statement', 'statement.pdf', len(PDF_DATA), str(tmp_path), {'pdf'}
+    )
+
+def _send(manager, session, start, end):
+    return manager.write_chunk(session, start, io.BytesIO(PDF_DATA[start:end]), end - start)
+
+def test_chunked_upload_and_finalize(manager, upload_session, tmp_path):
+    """Test chunks are appended and finalized into the upload folder"""
+    chunk = manager.max_chunk_size
+    for start in range(0, len(PDF_DATA), chunk):
+        _send(manager, upload_session, start, min(start + chunk, len(PDF_DATA)))
+
+    upload = manager.finalize(upload_session, str(tmp_path))
+
+    assert upload['file_size'] == len(PDF_DATA)
+    assert upload['mime_type'] == 'application/pdf'
+    assert upload['content_hash'] == hashlib.sha256(PDF_DATA).hexdigest()
+    assert open(upload['file_path'], 'rb').read() == PDF_DATA
+    assert upload_session.status == 'completed'
+    assert not os.path.exists(upload_session.staging_path)
+
+def test_resume_after_interruption(manager, upload_session, db_session):
+    """Test a client resumes from the stored offset after a failed chunk"""
+    _send(manager, upload_session, 0, 100000)
+
+    # A retry of an old chunk or a gap is refused with the offset to resume from
+    with pytest.raises(UploadOffsetError) as error:
+        _send(manager, upload_session, 50000, 150000)
+    assert error.value.expected_offset == 100000
+
+    session = db_session.get(UploadSession, upload_session.id)
+    assert session.received_size == 100000
+
+    _send(manager, session, 100000, 200000)
+    assert session.received_size == 200000
+
+def test_stale_offset_is_refused_before_writing(manager, upload_session):
+    """Test a chunk for an offset another worker already advanced leaves the staged bytes alone"""
+    _send(manager, upload_session, 0, 100000)
+    # This worker loaded the session before the chunk above was recorded
+    set_committed_value(upload_session, 'received_size', 0)
+
+    with pytest.raises(UploadOffsetError) as error:
+        manager.write_chunk(upload_session, 0, io.BytesIO(b'%PDF-1.4\n' + b'\x00' * 1000), 1009)
+
+    assert error.value.expected_offset == 100000
+    with open(upload_session.staging_path, 'rb') as f:
+        assert f.read() == PDF_DATA[:100000]
+
+def test_concurrent_finalize_is_refused(manager, upload_session, db_session, tmp_path):
+    """Test only one request completes an upload; the other gets a conflict instead of a missing file"""
+    chunk = manager.max_chunk_size
+    for start in range(0, len(PDF_DATA), chunk):
+        _send(manager, upload_session, start, min(start + chunk, len(PDF_DATA)))
+    # Another request has claimed completion and is reading the staged file
+    UploadSession.query.filter_by(id=upload_session.id).update({'status': 'finalizing'})
+    db_session.commit()
+    set_committed_value(upload_session, 'status', 'open')
+
+    with pytest.raises(UploadConflictError):
+        manager.finalize(upload_session, str(tmp_path))
+
+    assert os.path.exists(upload_session.staging_path)
+
+def test_finalize_requires_all_bytes(manager, upload_session, tmp_path):
+    """Test incomplete uploads cannot be finalized"""
+    _send(manager, upload_session, 0, 1000)
+
+    with pytest.raises(ValidationError):
+        manager.finalize(upload_session, str(tmp_path))
+
+def test_disallowed_content_rejected_on_first_chunk(manager, user, tmp_path):
+    """Test non-PDF content is rejected before more data is accepted"""
+    data = b'MZ' + b'\x00' * 5000
+    session = manager.create_session(user.id, 'bank_statement', 'statement.pdf', len(data), str(tmp_path), {'pdf'})
+
+    with pytest.raises(ValidationError):
+        manager.write_chunk(session, 0, io.BytesIO(data), len(data))
+
+    assert session.status == 'aborted'
+    assert not os.path.exists(session.staging_path)
+
+def test_session_limits(manager, user, upload_session, tmp_path):
+    """Test oversized files, chunks and bad extensions are refused"""
+    with pytest.raises(ValidationError):
+        manager.create_session(user.id, 'pan', 'card.exe', 100, str(tmp_path), {'pdf'})
+    with pytest.raises(ValidationError):
+        manager.create_session(user.id, 'pan', 'card.pdf', 10 * 1024 * 1024, str(tmp_path), {'pdf'})
+    with pytest.raises(ValidationError):
+        _send(manager, upload_session, 0, manager.max_chunk_size + 1)
+
+def test_expire_sessions(manager, upload_session):
+    """Test expired sessions release their staged data"""
+    assert manager.expire_sessions(datetime.utcnow() + timedelta(days=2)) == 1
+    assert upload_session.status == 'expired'
+    assert not os.path.exists(upload_session.staging_path)
+
+def test_expire_uploads_command(app, upload_session, db_session):
+    """Test the CLI command expires sessions past their expiry"""
+    upload_session.expires_at = datetime.utcnow() - timedelta(minutes=1)
+    db_session.commit()
+
+    result = app.test_cli_runner().invoke(args=['expire-uploads'])
+
+    assert 'Expired 1 upload sessions' in result.output
+    assert db_session.get(UploadSession, upload_session.id).status == 'expired'
+
+def test_parse_content_range():
+    """Test Content-Range parsing"""
+    assert parse_content_range('bytes 0-99/1000') == {'offset': 0, 'length': 100, 'total': 1000}
+    assert parse_content_range('bytes 100-50/1000') is None
+    assert parse_content_range('items 0-1/2') is None
+    assert parse_content_range(None) is None
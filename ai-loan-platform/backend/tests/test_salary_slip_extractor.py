@@ -0,0 +1,114 @@
+import pytest
+from PIL import Image
+from backend.salary_slip_extractor import (
+    SalarySlipExtractor,
+    SalarySlipExtractionError,
+    get_pool,
+    parse_salary_text,
+    preprocess_image
+)
+from backend.benchmarks.corpus import build_salary_slip_corpus, write_salary_slip_bundle
+
+@pytest.fixture
+def extractor():
+    """Provide a single-process salary slip extractor"""
+    return SalarySlipExtractor(max_workers=1)
+
+def test_parse_salary_text():
+    """Test salary fields are read from slip text"""
+    text = (
+        'Acme Technologies Pvt Ltd\n'
+        'Pay Slip for the month of March 2024\n'
+        'Gross Earnings: Rs. 1,20,000.00\n'
+        'Net Pay: 98,400.00\n'
+    )
+
+    fields = parse_salary_text(text)
+
+    assert fields['gross_salary'] == 120000.0
+    assert fields['net_salary'] == 98400.0
+    assert fields['employer_name'] == 'Acme Technologies Pvt Ltd'
+    assert fields['pay_period'] == '2024-03'
+
+def test_employer_label_takes_precedence():
+    """Test an explicit employer label is preferred over heuristics"""
+    fields = parse_salary_text('Payslip\nCompany Name: Indus Software\nNet Salary 40000')
+
+    assert fields['employer_name'] == 'Indus Software'
+    assert fields['gross_salary'] is None
+
+def test_multi_month_bundle(extractor, tmp_path):
+    """Test each page of a bundle is extracted as its own slip"""
+    path = write_salary_slip_bundle(
+        str(tmp_path / 'bundle.pdf'), months=3,
+        employer='Acme Technologies Pvt Ltd', gross=100000
+    )
+
+    slips = extractor.extract(path)
+    summary = extractor.summarize(slips)
+
+    assert [slip['pay_period'] for slip in slips] == ['2024-01', '2024-02', '2024-03']
+    assert summary['gross_salary'] == 100000
+    assert summary['net_salary'] == 82000
+    assert summary['employer_verified'] == True
+    assert summary['slip_count'] == 3
+
+def test_parallel_page_processing(tmp_path):
+    """Test large bundles are split across a process pool in page order"""
+    path = write_salary_slip_bundle(str(tmp_path / 'bundle.pdf'), months=12, gross=50000)
+    extractor = SalarySlipExtractor(max_workers=3, parallel_page_threshold=4)
+
+    slips = extractor.extract(path)
+
+    assert len(slips) == 12
+    assert slips[-1]['pay_period'] == '2024-12'
+
+def test_pool_is_reused_across_calls(tmp_path):
+    """Test extractions share one long-lived process pool"""
+    path = write_salary_slip_bundle(str(tmp_path / 'bundle.pdf'), months=4, gross=50000)
+    extractor = SalarySlipExtractor(max_workers=2, parallel_page_threshold=4)
+
+    extractor.extract(path)
+    pool = get_pool()
+    extractor.extract(path)
+
+    assert get_pool() is pool
+
+def test_extract_many(tmp_path):
+    """Test a corpus of files is extracted in parallel"""
+    paths = build_salary_slip_corpus(str(tmp_path), 6)
+    extractor = SalarySlipExtractor(max_workers=2)
+
+    results = extractor.extract_many(paths)
+
+    assert set(results) == set(paths)
+    assert all(len(slips) == 1 for slips in results.values())
+
+def test_mixed_employers_not_verified(extractor):
+    """Test slips from different employers fail employer verification"""
+    slips = [
+        {'gross_salary': 50000, 'net_salary': 41000, 'employer_name': 'A Ltd', 'pay_period': None},
+        {'gross_salary': 50000, 'net_salary': 41000, 'employer_name': 'B Ltd', 'pay_period': None}
+    ]
+
+    assert extractor.summarize(slips)['employer_verified'] == False
+
+def test_invalid_salary_slips(extractor, tmp_path):
+    """Test unsupported formats and slips without figures are rejected"""
+    text_file = tmp_path / 'slip.txt'
+    text_file.write_text('Net Pay: 1000')
+    with pytest.raises(SalarySlipExtractionError):
+        extractor.extract(str(text_file))
+
+    with pytest.raises(SalarySlipExtractionError):
+        extractor.summarize([])
+
+def test_image_preprocessing():
+    """Test phone photos are converted to high-resolution binary images"""
+    image = Image.new('RGB', (800, 600), color=(200, 180, 160))
+
+    processed = preprocess_image(image)
+
+    assert processed.mode == 'L'
+    assert max(processed.size) == 2000
+    assert set(processed.getdata()) <= {0, 255}
@@ -0,0 +1,79 @@
+import json
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Flask
+from backend.models import AuditLog, LoanApplication, Payment, User, UserDocument
+from backend.serialization import (
+    OrjsonProvider,
+    StdlibJSONProvider,
+    serialize_application,
+    serialize_document,
+    serialize_payment
+)
+
+SAMPLE = {
+    'created': datetime(2024, 5, 1, 10, 30, 15),
+    'due': date(2024, 6, 1),
+    'fee': Decimal('120.50'),
+    1: 'numeric key'
+}
+
+@pytest.fixture(params=[OrjsonProvider, StdlibJSONProvider])
+def provider(request):
+    """Provide each JSON provider on a bare app"""
+    if request.param is OrjsonProvider:
+        pytest.importorskip('orjson')
+    return request.param(Flask(__name__))
+
+def test_providers_encode_dates_and_decimals(provider):
+    """Test both providers produce the same ISO 8601 output"""
+    assert json.loads(provider.dumps(SAMPLE)) == {
+        'created': '2024-05-01T10:30:15',
+        'due': '2024-06-01',
+        'fee': '120.50',
+        '1': 'numeric key'
+    }
+    assert provider.loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+
+def test_response_is_json(app):
+    """Test jsonify goes through the configured provider"""
+    with app.test_request_context():
+        response = app.json.response({'due': date(2024, 6, 1)})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == {'due': '2024-06-01'}
+
+def test_typed_serializers():
+    """Test models encode through their serializers without internal state"""
+    application = LoanApplication(id=3, status='submitted', loan_amount=500000.0,
+                                  pan_verified=True, pan_number='ABCDE1234F', aadhaar_number='123456789012',
+                                  full_name='Asha Rao',
+                                  submitted_at=datetime(2024, 5, 1))
+    document = UserDocument(id=4, document_type='pan', file_name='pan.jpg',
+                            file_path='ab/cd/abcd', fraud_flags={'reuse_detected': True})
+    payment = Payment(id=5, application_id=3, order_id='order_1', amount=120.0, currency='INR')
+
+    assert serialize_application(application)['documents_verified']['pan'] == True
+    assert serialize_application(application)['pan_number'] == 'AB****234F'
+    assert serialize_application(application)['aadhaar_number'] == 'XXXX-XXXX-9012'
+    assert 'full_name' not in serialize_application(application)
+    assert serialize_document(document)['reuse_detected'] == True
+    assert 'file_path' not in serialize_document(document)
+    assert serialize_payment(payment)['order_id'] == 'order_1'
+
+    encoded = json.loads(OrjsonProvider(Flask(__name__)).dumps([application, document, payment]))
+    assert encoded[0]['submitted_at'] == '2024-05-01T00:00:00'
+    assert [item['id'] for item in encoded] == [3, 4, 5]
+
+def test_json_columns_use_provider_encoder(db_session):
+    """Test JSON columns accept dates through the shared encoder"""
+    user = User(email='json@example.com')
+    user.set_password('Test@123')
+    db_session.add(user)
+    db_session.commit()
+
+    db_session.add(AuditLog(user_id=user.id, action='test', details={'at': date(2024, 6, 1)}))
+    db_session.commit()
+    db_session.expire_all()
+
+    assert db_session.query(AuditLog).one().details == {'at': '2024-06-01'}
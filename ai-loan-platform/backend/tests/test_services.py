@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from backend.services import LazyService, warm_services
+
+class Counter:
+    created = 0
+
+    def __init__(self, start=0):
+        Counter.created += 1
+        self.value = start
+
+    def increment(self):
+        self.value += 1
+        return self.value
+
+@pytest.fixture
+def counter_module(monkeypatch):
+    """Expose Counter as an importable module"""
+    module = type(sys)('lazy_counter')
+    module.Counter = Counter
+    monkeypatch.setitem(sys.modules, 'lazy_counter', module)
+    Counter.created = 0
+    return module
+
+def test_lazy_service_constructs_on_first_use(counter_module):
+    """Test the instance is created once, on first attribute access"""
+    service = LazyService('lazy_counter', 'Counter', start=5)
+
+    assert Counter.created == 0
+    assert 'deferred' in repr(service)
+
+    assert service.increment() == 6
+    assert service.increment() == 7
+    assert Counter.created == 1
+    assert service.get() is service.get()
+    assert 'loaded' in repr(service)
+
+def test_lazy_service_is_thread_safe(counter_module):
+    """Test concurrent first use constructs a single instance"""
+    service = LazyService('lazy_counter', 'Counter')
+    barrier = threading.Barrier(8)
+    instances = []
+
+    def use():
+        barrier.wait()
+        instances.append(service.get())
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Counter.created == 1
+    assert all(instance is instances[0] for instance in instances)
+
+def test_warm_services(counter_module):
+    """Test warming constructs declared services ahead of use"""
+    service = LazyService('lazy_counter', 'Counter')
+
+    warm_services()
+
+    assert service._instance is not None
+
+def test_routes_import_defers_heavy_modules():
+    """Test building the app does not import report, payment or image libraries"""
+    code = (
+        'import sys\n'
+        'from backend import create_app\n'
+        'create_app()\n'
+        "print(','.join(m for m in ('reportlab', 'razorpay', 'PIL', 'backend.document_verification')"
+        ' if m in sys.modules))\n'
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-c', code], cwd=root,
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ''
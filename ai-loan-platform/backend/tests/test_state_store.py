@@ -0,0 +1,122 @@
+import pytest
+from backend.state_store import (
+    InMemoryStateStore,
+    RedisStateStore,
+    StateStore,
+    StateStoreConfigurationError,
+    create_state_store,
+    require_shared_store
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control time.monotonic for the state store"""
+    clock = FakeClock()
+    monkeypatch.setattr('backend.state_store.time.monotonic', clock)
+    return clock
+
+class FakeRedis:
+    """Minimal stand-in for the redis client"""
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, ex)
+
+    def getdel(self, key):
+        value = self.data.pop(key, None)
+        return value[0] if value else None
+
+def test_state_is_single_use(clock):
+    """Test a state value can only be consumed once"""
+    store = InMemoryStateStore()
+    store.put('state1', {'user_id': 1}, ttl=60)
+
+    assert store.pop('state1') == {'user_id': 1}
+    assert store.pop('state1') is None
+    assert store.pop('unknown') is None
+
+def test_state_expires(clock):
+    """Test expired states are rejected and cleaned up by the wheel"""
+    store = InMemoryStateStore(max_ttl=600, resolution=10)
+    store.put('short', 1, ttl=30)
+    store.put('long', 2, ttl=300)
+
+    clock.now += 45
+    store.put('other', 3, ttl=60)
+
+    # The slot holding 'short' has passed and was dropped without a lookup
+    assert len(store) == 2
+    assert store.pop('short') is None
+
+    clock.now += 200
+    assert store.pop('long') == 2
+
+def test_expiry_within_current_slot(clock):
+    """Test entries expiring inside the current wheel slot are rejected"""
+    store = InMemoryStateStore(resolution=10)
+    store.put('state', 1, ttl=2)
+
+    clock.now += 3
+    assert store.pop('state') is None
+
+def test_memory_is_bounded(clock):
+    """Test the store evicts the soonest-expiring entries when full"""
+    store = InMemoryStateStore(max_entries=100, resolution=10)
+    for i in range(100):
+        store.put(f'old{i}', i, ttl=30)
+    store.put('new', 'value', ttl=300)
+
+    assert len(store) <= 100
+    assert store.pop('new') == 'value'
+    assert store.pop('old0') is None
+
+def test_renewed_state_keeps_latest_expiry(clock):
+    """Test re-putting a key moves it to its new wheel slot"""
+    store = InMemoryStateStore(resolution=10)
+    store.put('state', 1, ttl=20)
+    store.put('state', 2, ttl=200)
+
+    clock.now += 60
+    store.put('tick', 0, ttl=10)
+    assert store.pop('state') == 2
+
+def test_redis_state_store():
+    """Test the redis backend stores JSON with a TTL and consumes atomically"""
+    client = FakeRedis()
+    store = RedisStateStore(client)
+
+    store.put('state1', {'user_id': 7}, ttl=600)
+    assert client.data['oauth_state:state1'][1] == 600
+
+    assert store.pop('state1') == {'user_id': 7}
+    assert store.pop('state1') is None
+
+def test_incomplete_store_cannot_be_created():
+    """Test a store missing part of the interface fails at construction"""
+    class WriteOnlyStateStore(StateStore):
+        def put(self, key, value, ttl):
+            pass
+
+    with pytest.raises(TypeError):
+        WriteOnlyStateStore()
+
+def test_default_store_is_in_memory(monkeypatch):
+    """Test the in-memory store is used when no URL is configured"""
+    monkeypatch.delenv('STATE_STORE_URL', raising=False)
+    assert isinstance(create_state_store(), InMemoryStateStore)
+
+def test_several_workers_require_a_shared_store(monkeypatch):
+    """Test serving with several workers and no shared store is refused"""
+    monkeypatch.delenv('STATE_STORE_URL', raising=False)
+    require_shared_store(1)
+    with pytest.raises(StateStoreConfigurationError):
+        require_shared_store(4)
+    require_shared_store(4, 'redis://redis:6379/1')
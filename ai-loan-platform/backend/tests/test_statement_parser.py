@@ -0,0 +1,122 @@
+import pytest
+import time
+from datetime import date, timedelta
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from backend.statement_parser import (
+    BankStatementParser,
+    StatementParseError,
+    TransactionColumns
+)
+
+def _write_csv_statement(path, months=24, daily_spends=30):
+    """Write a synthetic statement with monthly salary and daily UPI spends"""
+    balance = 10000.0
+    lines = ['Account Number,XXXX1234', 'Date,Narration,Withdrawal Amt.,Deposit Amt.,Closing Balance']
+    start = date(2022, 1, 1)
+    for month in range(months):
+        month_start = date(start.year + (start.month - 1 + month) // 12, (start.month - 1 + month) % 12 + 1, 1)
+        balance += 60000
+        lines.append(f'{month_start:%d/%m/%Y},NEFT CR-ACME CORP SALARY,,60000.00,{balance:.2f}')
+        for i in range(daily_spends):
+            balance -= 100
+            day = month_start + timedelta(days=i % 28)
+            lines.append(f'{day:%d/%m/%Y},UPI-GROCERY-{i},100.00,,{balance:.2f}')
+    path.write_text('\n'.join(lines) + '\n')
+    return path
+
+@pytest.fixture
+def parser():
+    """Provide a bank statement parser"""
+    return BankStatementParser()
+
+def test_csv_statement_analysis(parser, tmp_path):
+    """Test analytics computed from a CSV statement"""
+    path = _write_csv_statement(tmp_path / 'statement.csv', months=6)
+
+    analysis = parser.analyze(parser.parse(str(path)))
+
+    assert analysis['transaction_count'] == 6 * 31
+    assert analysis['months_covered'] == 6
+    assert analysis['monthly_credits'] == 60000
+    assert analysis['total_debits'] == 6 * 30 * 100
+    assert analysis['salary_credits_found'] == True
+    assert analysis['salary_months'] == 6
+    assert analysis['average_salary'] == 60000
+    assert analysis['regular_income'] == True
+    assert analysis['bounce_count'] == 0
+    assert analysis['monthly_credit_breakdown']['2022-01'] == 60000
+
+def test_bounce_detection(parser, tmp_path):
+    """Test bounced instruments are counted"""
+    path = tmp_path / 'statement.csv'
+    path.write_text(
+        'Txn Date,Description,Debit,Credit,Balance\n'
+        '01-Jan-2023,Opening,,1000.00,1000.00\n'
+        '05-Jan-2023,ECS RTN INSUFFICIENT FUNDS,500.00,,500.00\n'
+        '06-Jan-2023,NACH RETURN CHARGES,100.00,,400.00\n'
+    )
+
+    analysis = parser.analyze(parser.parse(str(path)))
+
+    assert analysis['bounce_count'] == 2
+    assert analysis['salary_credits_found'] == False
+
+def test_average_daily_balance(parser):
+    """Test average balance is weighted by the days each balance was held"""
+    columns = TransactionColumns()
+    start = date(2023, 1, 1).toordinal()
+    columns.append(start, 1000.0, 1000.0, 'DEPOSIT')
+    columns.append(start + 9, 9000.0, 10000.0, 'DEPOSIT')
+
+    analysis = parser.analyze(columns)
+
+    # 9 days at 1,000 and 1 day at 10,000
+    assert analysis['average_balance'] == 1900.0
+
+def test_pdf_statement_parsing(parser, tmp_path):
+    """Test transactions are read from a PDF text layer"""
+    path = tmp_path / 'statement.pdf'
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    rows = [
+        '01/03/2023 Opening Balance 5,000.00',
+        '02/03/2023 SALARY MARCH ACME 50,000.00 55,000.00',
+        '03/03/2023 ATM WDL 2,000.00 53,000.00',
+        '04/03/2023 CHQ RETURNED 1,000.00 52,000.00',
+    ]
+    for i, row in enumerate(rows):
+        pdf.drawString(40, 800 - i * 14, row)
+    pdf.showPage()
+    pdf.save()
+
+    columns = parser.parse(str(path))
+    analysis = parser.analyze(columns)
+
+    assert list(columns.amounts) == [50000.0, -2000.0, -1000.0]
+    assert analysis['salary_credits_found'] == True
+    assert analysis['bounce_count'] == 1
+
+def test_unsupported_statement(parser, tmp_path):
+    """Test unsupported and empty statements are rejected"""
+    text_file = tmp_path / 'statement.txt'
+    text_file.write_text('not a statement')
+    with pytest.raises(StatementParseError):
+        parser.parse(str(text_file))
+
+    csv_file = tmp_path / 'statement.csv'
+    csv_file.write_text('foo,bar\n1,2\n')
+    with pytest.raises(StatementParseError):
+        parser.parse(str(csv_file))
+
+def test_large_statement_performance(parser, tmp_path):
+    """Test a 24-month statement with tens of thousands of lines parses under a second"""
+    path = _write_csv_statement(tmp_path / 'statement.csv', months=24, daily_spends=1500)
+
+    start = time.perf_counter()
+    columns = parser.parse(str(path))
+    analysis = parser.analyze(columns)
+    elapsed = time.perf_counter() - start
+
+    assert len(columns) == 24 * 1501
+    assert analysis['months_covered'] == 24
+    assert elapsed < 1.0
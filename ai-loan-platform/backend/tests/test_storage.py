@@ -0,0 +1,128 @@
+import io
+import os
+import time
+import pytest
+from backend.storage import LocalStorage, S3Storage, Storage, create_storage
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    """Provide S3 storage backed by moto's in-process S3"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='loan-platform')
+        yield S3Storage('loan-platform', 'uploads', client=client)
+
+@pytest.fixture(params=['local', 's3'])
+def storage(request, tmp_path):
+    """Provide each storage backend"""
+    if request.param == 'local':
+        return LocalStorage(str(tmp_path / 'storage'))
+    return request.getfixturevalue('s3_storage')
+
+def test_put_get_stream_delete(storage, tmp_path):
+    """Test the storage contract on every backend"""
+    data = os.urandom(200000)
+    source = tmp_path / 'source.bin'
+    source.write_bytes(data)
+
+    storage.put('ab/cd/object', str(source), move=True)
+    assert not source.exists()
+    storage.put('reports/report.pdf', io.BytesIO(b'%PDF-1.4'))
+
+    assert storage.exists('ab/cd/object')
+    assert storage.size('ab/cd/object') == len(data)
+    assert storage.get('ab/cd/object') == data
+    chunks = list(storage.stream('ab/cd/object', chunk_size=65536))
+    assert len(chunks) > 1 and b''.join(chunks) == data
+    assert sorted(key for key, _ in storage.list()) == ['ab/cd/object', 'reports/report.pdf']
+    assert [key for key, _ in storage.list('reports/')] == ['reports/report.pdf']
+
+    with storage.local_path('reports/report.pdf') as path:
+        assert open(path, 'rb').read() == b'%PDF-1.4'
+
+    storage.delete('ab/cd/object')
+    storage.delete('ab/cd/object')
+    assert not storage.exists('ab/cd/object')
+
+def test_touch(storage):
+    """Test touching renews an object's modified time and fails for missing objects"""
+    storage.put('ab/cd/object', io.BytesIO(b'statement'))
+    if isinstance(storage, LocalStorage):
+        os.utime(storage.path('ab/cd/object'), (0, 0))
+    before = time.time() - 60
+
+    storage.touch('ab/cd/object')
+
+    assert dict(storage.list())['ab/cd/object'] > before
+    assert storage.get('ab/cd/object') == b'statement'
+    with pytest.raises(FileNotFoundError):
+        storage.touch('ab/cd/missing')
+
+def test_s3_touch_keeps_content_type_and_metadata(s3_storage):
+    """Test touching an S3 object does not reset its content type or user metadata"""
+    s3_storage.client.put_object(
+        Bucket='loan-platform', Key='uploads/report.pdf', Body=b'%PDF-1.4',
+        ContentType='application/pdf', Metadata={'application-id': '7'}
+    )
+
+    s3_storage.touch('report.pdf')
+
+    head = s3_storage.client.head_object(Bucket='loan-platform', Key='uploads/report.pdf')
+    assert head['ContentType'] == 'application/pdf'
+    assert head['Metadata'] == {'application-id': '7'}
+
+def test_incomplete_backend_cannot_be_created():
+    """Test a backend missing part of the interface fails at construction"""
+    class ReadOnlyStorage(Storage):
+        def get(self, key):
+            return b''
+
+    with pytest.raises(TypeError):
+        ReadOnlyStorage()
+
+def test_presign(storage):
+    """Test S3 objects get presigned URLs and local files do not"""
+    storage.put('report.pdf', io.BytesIO(b'%PDF-1.4'))
+    url = storage.presign('report.pdf', expires_in=60)
+
+    if isinstance(storage, S3Storage):
+        assert 'loan-platform' in url and 'uploads/report.pdf' in url and 'Expires=' in url
+    else:
+        assert url is None
+
+def test_local_put_never_exposes_a_partial_file(tmp_path, monkeypatch):
+    """Test a copy that fails midway leaves neither the target nor a temp file behind"""
+    storage = LocalStorage(str(tmp_path / 'storage'))
+    source = tmp_path / 'source.bin'
+    source.write_bytes(b'statement')
+
+    def fail(src, dst, length):
+        dst.write(src.read(4))
+        raise OSError('disk full')
+    monkeypatch.setattr('backend.storage.shutil.copyfileobj', fail)
+
+    with pytest.raises(OSError):
+        storage.put('ab/cd/object', str(source))
+
+    assert os.listdir(tmp_path / 'storage' / 'ab' / 'cd') == []
+    assert source.read_bytes() == b'statement'
+
+def test_local_keys_stay_inside_root(tmp_path):
+    """Test keys cannot escape the storage folder"""
+    storage = LocalStorage(str(tmp_path))
+    with pytest.raises(ValueError):
+        storage.put('../escape', io.BytesIO(b'x'))
+
+def test_create_storage(tmp_path):
+    """Test the backend is chosen from the storage URL"""
+    assert isinstance(create_storage(None, str(tmp_path), 'uploads'), LocalStorage)
+
+    s3 = create_storage('s3://bucket/loans', str(tmp_path), 'reports')
+    assert isinstance(s3, S3Storage)
+    assert (s3.bucket, s3.prefix) == ('bucket', 'loans/reports/')
@@ -3,8 +3,14 @@ from datetime import date, datetime
 from backend.utils import (
     validate_email, validate_phone, validate_aadhaar, validate_pan,
     validate_pincode, calculate_age, format_currency, calculate_emi,
-    allowed_file, validate_loan_application, mask_aadhaar, mask_pan
+    allowed_file, validate_loan_application, mask_aadhaar, mask_pan,
+    stream_uploaded_file
 )
+from backend.error_handlers import ValidationError
+from werkzeug.datastructures import FileStorage
+import hashlib
+import io
+import os
 
 def test_email_validation():
     """Test email validation"""
@@ -147,4 +153,92 @@ def test_masking_functions():
     
     # Test PAN masking
     assert mask_pan('ABCDE1234F') == 'AB****234F'
-    assert len(mask_pan('ABCDE1234F')) == 10
\ No newline at end of file
+    assert len(mask_pan('ABCDE1234F')) == 10
+
+def test_stream_uploaded_file(tmp_path):
+    """Test uploads are sniffed, hashed and written in one pass"""
+    data = b'%PDF-1.4\n' + b'0' * 200000
+    upload = FileStorage(stream=io.BytesIO(data), filename='../statement.pdf')
+    
+    result = stream_uploaded_file(upload, str(tmp_path), {'pdf'}, chunk_size=4096)
+    
+    assert result['file_path'] == os.path.join(str(tmp_path), 'statement.pdf')
+    assert result['mime_type'] == 'application/pdf'
+    assert result['file_size'] == len(data)
+    assert result['content_hash'] == hashlib.sha256(data).hexdigest()
+    assert open(result['file_path'], 'rb').read() == data
+    
+    # No temporary files are left behind
+    assert os.listdir(tmp_path) == ['statement.pdf']
+
+def test_stream_uploaded_file_rejects_bad_content(tmp_path):
+    """Test disguised files are rejected before anything is written"""
+    upload = FileStorage(stream=io.BytesIO(b'#!/bin/sh\nrm -rf /\n'), filename='statement.pdf')
+    
+    with pytest.raises(ValidationError):
+        stream_uploaded_file(upload, str(tmp_path), {'pdf'})
+    
+    upload = FileStorage(stream=io.BytesIO(b'%PDF-1.4'), filename='statement.exe')
+    with pytest.raises(ValidationError):
+        stream_uploaded_file(upload, str(tmp_path), {'pdf'})
+    
+    assert os.listdir(tmp_path) == []
+
+def test_stream_uploaded_file_to_content_store(tmp_path):
+    """Test uploads are stored under their content hash when a store is given"""
+    from backend.content_store import LocalContentStore
+    store = LocalContentStore(str(tmp_path))
+    data = b'%PDF-1.4\n' + b'1' * 5000
+    
+    first = stream_uploaded_file(FileStorage(stream=io.BytesIO(data), filename='a.pdf'),
+                                 str(tmp_path), {'pdf'}, content_store=store)
+    second = stream_uploaded_file(FileStorage(stream=io.BytesIO(data), filename='b.pdf'),
+                                  str(tmp_path), {'pdf'}, content_store=store)
+    
+    assert first['file_path'] == second['file_path'] == store.locate(first['content_hash'])
+    assert second['file_name'] == 'b.pdf'
+    assert sorted(os.listdir(tmp_path)) == [first['content_hash'][:2]]
+
+def test_send_stored_file_ranges_and_etags(app, tmp_path):
+    """Test local downloads answer Range and conditional requests"""
+    from backend.storage import LocalStorage
+    from backend.utils import send_stored_file
+    storage = LocalStorage(str(tmp_path))
+    storage.put('reports/report.pdf', io.BytesIO(b'%PDF-1.4' + b'x' * 1000))
+    
+    def download(**headers):
+        with app.test_request_context(headers=headers):
+            response = send_stored_file(storage, 'reports/report.pdf', 'report.pdf',
+                                        'application/pdf', etag='abc123')
+            response.direct_passthrough = False
+            return response
+    
+    full = download()
+    assert full.status_code == 200
+    assert full.headers['ETag'] == '"abc123"'
+    assert 'Last-Modified' in full.headers
+    assert 'attachment; filename=report.pdf' == full.headers['Content-Disposition']
+    
+    partial = download(Range='bytes=0-7')
+    assert partial.status_code == 206
+    assert partial.get_data() == b'%PDF-1.4'
+    assert partial.headers['Content-Range'] == 'bytes 0-7/1008'
+    
+    assert download(**{'If-None-Match': '"abc123"'}).status_code == 304
+
+def test_send_stored_file_accel_redirect(app, tmp_path):
+    """Test nginx is asked to serve the file instead of the app"""
+    from backend.storage import LocalStorage
+    from backend.utils import send_stored_file
+    from werkzeug.exceptions import NotFound
+    storage = LocalStorage(str(tmp_path))
+    storage.put('ab/cd/abcd', io.BytesIO(b'data'))
+    
+    with app.test_request_context():
+        response = send_stored_file(storage, 'ab/cd/abcd', 'pan.pdf', 'application/pdf',
+                                    accel_prefix='/uploads/')
+        assert response.headers['X-Accel-Redirect'] == '/uploads/ab/cd/abcd'
+        assert response.get_data() == b''
+        
+        with pytest.raises(NotFound):
+            send_stored_file(storage, 'ab/cd/missing', 'pan.pdf')
@@ -0,0 +1,77 @@
+import pytest
+from datetime import date
+from backend.validation import Field, SchemaValidator, loan_application_validator
+from backend.benchmarks.validation import VALID_APPLICATION
+
+def test_valid_application_is_coerced():
+    """Test values come back typed for the model columns"""
+    values, errors = loan_application_validator.validate(VALID_APPLICATION)
+
+    assert errors == []
+    assert values['date_of_birth'] == date(1990, 4, 12)
+    assert values['monthly_income'] == 85000.0
+    assert values['loan_tenure'] == 36
+    assert values['existing_loans'] is False
+    assert values['pincode'] == '560001'
+
+def test_all_errors_reported_at_once():
+    """Test every problem is returned in a single pass"""
+    data = dict(VALID_APPLICATION, pan_number='abcde1234f', monthly_income=0,
+                date_of_birth='1990-02-30', loan_tenure='three', status='approved')
+    del data['city']
+
+    values, errors = loan_application_validator.validate(data)
+
+    assert set(errors) == {
+        'Invalid PAN number format',
+        'Monthly income must be greater than 0',
+        'Invalid date of birth format',
+        'Invalid loan tenure value',
+        'city is required',
+        'Unknown field: status'
+    }
+    assert 'status' not in values
+
+def test_age_limits():
+    """Test applicants must be between 18 and 65"""
+    today = date(2024, 6, 1)
+    young = dict(VALID_APPLICATION, date_of_birth='2006-06-02')
+    old = dict(VALID_APPLICATION, date_of_birth='1958-01-01')
+
+    assert loan_application_validator.validate(young, today=today)[1] == ['Applicant must be at least 18 years old']
+    assert loan_application_validator.validate(old, today=today)[1] == ['Applicant must be under 65 years old']
+
+def test_patterns_match_whole_value():
+    """Test patterns must match the whole value"""
+    errors = loan_application_validator.validate(dict(VALID_APPLICATION, aadhaar_number='123456789012\n'))[1]
+    assert errors == []  # surrounding whitespace is stripped
+
+    errors = loan_application_validator.validate(dict(VALID_APPLICATION, pincode='560001\n1'))[1]
+    assert errors == ['Invalid pincode format']
+
+def test_custom_schema():
+    """Test fields, limits and batch validation on a custom schema"""
+    validator = SchemaValidator([
+        Field('name', required=True, max_length=5),
+        Field('count', 'int', minimum=1)
+    ])
+
+    results = validator.validate_many([{'name': 'abc', 'count': '2'}, {'name': 'abcdef', 'count': 0}, []])
+
+    assert results[0] == ({'name': 'abc', 'count': 2}, [])
+    assert results[1][1] == ['Name must be at most 5 characters', 'Count must be at least 1']
+    assert results[2][1] == ['Request body must be a JSON object']
+
+@pytest.mark.parametrize('field, value', [
+    ('loan_tenure', '--5'),
+    ('loan_tenure', '²'),
+    ('monthly_income', 'nan'),
+    ('monthly_income', 'inf'),
+    ('monthly_income', float('-inf')),
+])
+def test_malformed_numbers_are_rejected(field, value):
+    """Test numbers that parse oddly are reported instead of raising or passing range checks"""
+    values, errors = loan_application_validator.validate(dict(VALID_APPLICATION, **{field: value}))
+
+    assert len(errors) == 1
+    assert field not in values
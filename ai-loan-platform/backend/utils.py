@@ -1,36 +1,38 @@
-import re
 from datetime import datetime, date
 import json
 from typing import Dict, Any, Union, List
 import os
+import hashlib
+import tempfile
 import magic
+from flask import current_app, redirect, send_file
+from werkzeug.exceptions import NotFound
 from werkzeug.utils import secure_filename
 from .error_handlers import ValidationError
+from .storage import LocalStorage
+from .pii import mask_aadhaar, mask_pan
+from .serialization import SERIALIZERS
+from .validation import AADHAAR_RE, EMAIL_RE, PAN_RE, PHONE_RE, PINCODE_RE, loan_application_validator
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(EMAIL_RE.fullmatch(email))
 
 def validate_phone(phone: str) -> bool:
     """Validate phone number format"""
-    pattern = r'^\+?[1-9]\d{9,14}$'
-    return bool(re.match(pattern, phone))
+    return bool(PHONE_RE.fullmatch(phone))
 
 def validate_aadhaar(aadhaar: str) -> bool:
     """Validate Aadhaar number format"""
-    pattern = r'^\d{12}$'
-    return bool(re.match(pattern, aadhaar))
+    return bool(AADHAAR_RE.fullmatch(aadhaar))
 
 def validate_pan(pan: str) -> bool:
     """Validate PAN number format"""
-    pattern = r'^[A-Z]{5}[0-9]{4}[A-Z]$'
-    return bool(re.match(pattern, pan))
+    return bool(PAN_RE.fullmatch(pan))
 
 def validate_pincode(pincode: str) -> bool:
     """Validate pincode format"""
-    pattern = r'^\d{6}$'
-    return bool(re.match(pattern, pincode))
+    return bool(PINCODE_RE.fullmatch(pincode))
 
 def calculate_age(dob: date) -> int:
     """Calculate age from date of birth"""
@@ -62,16 +64,27 @@ def get_file_mime_type(file_path: str) -> str:
     mime = magic.Magic(mime=True)
     return mime.from_file(file_path)
 
-def save_uploaded_file(file, upload_folder: str, allowed_extensions: set) -> str:
-    """Save uploaded file and return file path
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def stream_uploaded_file(file, upload_folder: str, allowed_extensions: set,
+                         chunk_size: int = UPLOAD_CHUNK_SIZE,
+                         content_store=None) -> Dict[str, Any]:
+    """Stream an uploaded file to disk in a single pass
+    
+    The first chunk is used to sniff the MIME type, so disallowed content is
+    rejected before anything is written. Size and SHA-256 are computed while
+    copying, and the file is moved into place with an atomic rename.
     
     Args:
         file: FileStorage object
         upload_folder: Path to upload folder
         allowed_extensions: Set of allowed file extensions
+        chunk_size: Bytes read from the request stream per iteration
+        content_store: Optional ContentStore; when given the file is stored
+            under its content hash instead of its filename
     
     Returns:
-        str: Path to saved file
+        dict: file_path, file_name, file_size, mime_type and content_hash
     
     Raises:
         ValidationError: If file type is not allowed
@@ -79,21 +92,119 @@ def save_uploaded_file(file, upload_folder: str, allowed_extensions: set) -> str
     if not allowed_file(file.filename, allowed_extensions):
         raise ValidationError('File type not allowed')
     
+    stream = file.stream
+    first_chunk = stream.read(chunk_size)
+    mime_type = magic.from_buffer(first_chunk, mime=True)
+    if not is_safe_mime_type(mime_type):
+        raise ValidationError('File type not allowed')
+    
     filename = secure_filename(file.filename)
     file_path = os.path.join(upload_folder, filename)
     
     # Create directory if it doesn't exist
     os.makedirs(upload_folder, exist_ok=True)
     
-    file.save(file_path)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=upload_folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            chunk = first_chunk
+            while chunk:
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+                chunk = stream.read(chunk_size)
+        if content_store is not None:
+            file_path = content_store.put_file(temp_path, digest.hexdigest())
+        else:
+            os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    
+    return {
+        'file_path': file_path,
+        'file_name': filename,
+        'file_size': size,
+        'mime_type': mime_type,
+        'content_hash': digest.hexdigest()
+    }
+
+def save_uploaded_file(file, upload_folder: str, allowed_extensions: set) -> str:
+    """Save uploaded file and return file path
     
-    # Verify file type
-    mime_type = get_file_mime_type(file_path)
-    if not is_safe_mime_type(mime_type):
-        os.remove(file_path)
-        raise ValidationError('File type not allowed')
+    Args:
+        file: FileStorage object
+        upload_folder: Path to upload folder
+        allowed_extensions: Set of allowed file extensions
+    
+    Returns:
+        str: Path to saved file
     
-    return file_path
+    Raises:
+        ValidationError: If file type is not allowed
+    """
+    return stream_uploaded_file(file, upload_folder, allowed_extensions)['file_path']
+
+def send_stored_file(storage, key: str, download_name: str, mime_type: str = None,
+                     etag: str = None, accel_prefix: str = None):
+    """Serve a stored file without reading it into Python memory
+    
+    Local files go through send_file, which answers Range and conditional
+    requests (ETag, Last-Modified) and hands the file to the server's
+    sendfile support. With `accel_prefix`, nginx serves the file from that
+    internal location via X-Accel-Redirect. Remote storage redirects to a
+    presigned URL.
+    
+    Args:
+        storage: Storage holding the file
+        key: Storage key of the file
+        download_name: Filename offered to the client
+        mime_type: Content type; guessed from download_name if omitted
+        etag: Strong ETag such as the content hash; derived from the file if omitted
+        accel_prefix: nginx internal location mapped to the storage root
+    
+    Raises:
+        NotFound: If the file is missing
+    """
+    if isinstance(storage, LocalStorage):
+        path = storage.path(key)
+        if not os.path.isfile(path):
+            raise NotFound()
+        
+        if accel_prefix:
+            response = current_app.response_class(mimetype=mime_type or 'application/octet-stream')
+            response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + key
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+            response.cache_control.private = True
+            return response
+        
+        response = send_file(
+            path,
+            mimetype=mime_type,
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=etag or True
+        )
+        response.cache_control.private = True
+        return response
+    
+    url = storage.presign(key)
+    if url:
+        return redirect(url)
+    
+    if not storage.exists(key):
+        raise NotFound()
+    return send_file(
+        storage.open(key),
+        mimetype=mime_type,
+        as_attachment=True,
+        download_name=download_name,
+        etag=etag or False
+    )
 
 def is_safe_mime_type(mime_type: str) -> bool:
     """Check if MIME type is safe"""
@@ -111,73 +222,7 @@ def validate_loan_application(data: Dict[str, Any]) -> List[str]:
     Returns:
         List of validation error messages
     """
-    errors = []
-    
-    # Required fields
-    required_fields = [
-        'full_name', 'date_of_birth', 'pan_number', 'aadhaar_number',
-        'phone', 'address_line1', 'city', 'state', 'pincode',
-        'employment_type', 'monthly_income', 'loan_amount', 'loan_tenure'
-    ]
-    
-    for field in required_fields:
-        if not data.get(field):
-            errors.append(f'{field} is required')
-    
-    # Validate formats
-    if data.get('email') and not validate_email(data['email']):
-        errors.append('Invalid email format')
-    
-    if data.get('phone') and not validate_phone(data['phone']):
-        errors.append('Invalid phone number format')
-    
-    if data.get('aadhaar_number') and not validate_aadhaar(data['aadhaar_number']):
-        errors.append('Invalid Aadhaar number format')
-    
-    if data.get('pan_number') and not validate_pan(data['pan_number']):
-        errors.append('Invalid PAN number format')
-    
-    if data.get('pincode') and not validate_pincode(data['pincode']):
-        errors.append('Invalid pincode format')
-    
-    # Validate amounts
-    if data.get('monthly_income'):
-        try:
-            income = float(data['monthly_income'])
-            if income <= 0:
-                errors.append('Monthly income must be greater than 0')
-        except ValueError:
-            errors.append('Invalid monthly income value')
-    
-    if data.get('loan_amount'):
-        try:
-            loan_amount = float(data['loan_amount'])
-            if loan_amount <= 0:
-                errors.append('Loan amount must be greater than 0')
-        except ValueError:
-            errors.append('Invalid loan amount value')
-    
-    # Validate age
-    if data.get('date_of_birth'):
-        try:
-            dob = datetime.strptime(data['date_of_birth'], '%Y-%m-%d').date()
-            age = calculate_age(dob)
-            if age < 18:
-                errors.append('Applicant must be at least 18 years old')
-            if age > 65:
-                errors.append('Applicant must be under 65 years old')
-        except ValueError:
-            errors.append('Invalid date of birth format')
-    
-    return errors
-
-def mask_aadhaar(aadhaar: str) -> str:
-    """Mask Aadhaar number for display"""
-    return 'XXXX-XXXX-' + aadhaar[-4:]
-
-def mask_pan(pan: str) -> str:
-    """Mask PAN number for display"""
-    return pan[:2] + 'XXXX' + pan[-4:]
+    return loan_application_validator.validate(data, allow_unknown=True)[1]
 
 def format_date(date_obj: Union[date, datetime]) -> str:
     """Format date for display"""
@@ -185,6 +230,9 @@ def format_date(date_obj: Union[date, datetime]) -> str:
 
 def to_json_serializable(obj: Any) -> Any:
     """Convert object to JSON serializable format"""
+    serializer = SERIALIZERS.get(type(obj))
+    if serializer is not None:
+        return to_json_serializable(serializer(obj))
     if isinstance(obj, (datetime, date)):
         return obj.isoformat()
     elif isinstance(obj, (list, tuple)):
@@ -0,0 +1,248 @@
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+import math
+import re
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_RE = re.compile(r'^\+?[1-9]\d{9,14}$')
+AADHAAR_RE = re.compile(r'^\d{12}$')
+PAN_RE = re.compile(r'^[A-Z]{5}[0-9]{4}[A-Z]$')
+PINCODE_RE = re.compile(r'^\d{6}$')
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+MIN_APPLICANT_AGE = 18
+MAX_APPLICANT_AGE = 65
+
+_TRUE_VALUES = {'true', '1', 'yes'}
+_FALSE_VALUES = {'false', '0', 'no'}
+
+
+class Field:
+    """
+    Declarative description of one input field
+    """
+    __slots__ = ('name', 'kind', 'required', 'label', 'pattern', 'message',
+                 'max_length', 'minimum', 'exclusive_minimum')
+
+    def __init__(self, name: str, kind: str = 'str', required: bool = False,
+                 label: Optional[str] = None, pattern: Optional[Pattern] = None,
+                 message: Optional[str] = None, max_length: Optional[int] = None,
+                 minimum: Optional[float] = None, exclusive_minimum: bool = False):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.label = label or name.replace('_', ' ')
+        self.pattern = pattern
+        self.message = message
+        self.max_length = max_length
+        self.minimum = minimum
+        self.exclusive_minimum = exclusive_minimum
+
+
+class SchemaValidator:
+    """
+    Validates and coerces a dict against a list of Fields in one pass.
+    Each field is compiled once into a checker closure; validating a record
+    is a single loop over the schema that returns the typed values and every
+    error found. Keys not in the schema are reported unless `allow_unknown`.
+    """
+    def __init__(self, fields: Iterable[Field], checks: Iterable[Callable] = ()):
+        self.fields = list(fields)
+        self.names = frozenset(field.name for field in self.fields)
+        self.checks = list(checks)
+        self._compiled = [(field.name, field.required, _compile(field)) for field in self.fields]
+
+    def validate(self, data: Dict[str, Any], allow_unknown: bool = False,
+                 today: Optional[date] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Return (coerced values, error messages) for a record
+        """
+        if not isinstance(data, dict):
+            return {}, ['Request body must be a JSON object']
+
+        values = {}
+        errors = []
+        for name, required, checker in self._compiled:
+            raw = data.get(name)
+            if raw is None or raw == '':
+                if required:
+                    errors.append(f'{name} is required')
+                continue
+            value, error = checker(raw)
+            if error:
+                errors.append(error)
+            else:
+                values[name] = value
+
+        if not allow_unknown and len(data) > len(values):
+            errors.extend(f'Unknown field: {name}' for name in data if name not in self.names)
+
+        context = {'today': today or date.today()}
+        for check in self.checks:
+            error = check(values, context)
+            if error:
+                errors.append(error)
+
+        return values, errors
+
+    def validate_many(self, records: Iterable[Dict[str, Any]],
+                      allow_unknown: bool = False) -> List[Tuple[Dict[str, Any], List[str]]]:
+        """
+        Validate a batch of records, e.g. for bulk imports
+        """
+        today = date.today()
+        return [self.validate(record, allow_unknown, today) for record in records]
+
+
+def _compile(field: Field) -> Callable[[Any], Tuple[Any, Optional[str]]]:
+    """Build the coercion and checks for a field"""
+    coerce = _COERCERS[field.kind]
+    invalid = field.message or f'Invalid {field.label} value'
+    pattern = field.pattern
+    max_length = field.max_length
+    minimum = field.minimum
+    exclusive = field.exclusive_minimum
+    label = field.label[0].upper() + field.label[1:]
+    if minimum is not None:
+        too_small = (f'{label} must be greater than {minimum:g}' if exclusive
+                     else f'{label} must be at least {minimum:g}')
+
+    def check(raw):
+        value = coerce(raw)
+        if value is None:
+            return None, invalid
+        if pattern is not None and not pattern.fullmatch(value):
+            return None, invalid
+        if max_length is not None and len(value) > max_length:
+            return None, f'{label} must be at most {max_length} characters'
+        if minimum is not None and (value <= minimum if exclusive else value < minimum):
+            return None, too_small
+        return value, None
+
+    return check
+
+
+def _coerce_str(raw):
+    if isinstance(raw, str):
+        return raw.strip()
+    if isinstance(raw, int) and not isinstance(raw, bool):
+        return str(raw)
+    return None
+
+
+def _coerce_float(raw):
+    if isinstance(raw, bool):
+        return None
+    if isinstance(raw, (int, float)):
+        value = float(raw)
+    elif isinstance(raw, str):
+        try:
+            value = float(raw)
+        except ValueError:
+            return None
+    else:
+        return None
+    # 'nan' and 'inf' parse but slip past range checks
+    return value if math.isfinite(value) else None
+
+
+def _coerce_int(raw):
+    if isinstance(raw, bool):
+        return None
+    if isinstance(raw, int):
+        return raw
+    if isinstance(raw, float) and raw.is_integer():
+        return int(raw)
+    if isinstance(raw, str) and raw.strip().lstrip('-').isdigit():
+        # isdigit() also accepts '--5' and superscripts such as '²'
+        try:
+            return int(raw)
+        except ValueError:
+            return None
+    return None
+
+
+def _coerce_bool(raw):
+    if isinstance(raw, bool):
+        return raw
+    if isinstance(raw, str):
+        lowered = raw.lower()
+        if lowered in _TRUE_VALUES:
+            return True
+        if lowered in _FALSE_VALUES:
+            return False
+    return None
+
+
+def _coerce_date(raw):
+    if isinstance(raw, date):
+        return raw
+    if isinstance(raw, str) and _ISO_DATE_RE.fullmatch(raw):
+        try:
+            return date.fromisoformat(raw)
+        except ValueError:
+            return None
+    return None
+
+
+_COERCERS = {
+    'str': _coerce_str,
+    'float': _coerce_float,
+    'int': _coerce_int,
+    'bool': _coerce_bool,
+    'date': _coerce_date,
+}
+
+
+def _check_applicant_age(values: Dict[str, Any], context: Dict) -> Optional[str]:
+    dob = values.get('date_of_birth')
+    if dob is None:
+        return None
+    today = context['today']
+    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+    if age < MIN_APPLICANT_AGE:
+        return f'Applicant must be at least {MIN_APPLICANT_AGE} years old'
+    if age > MAX_APPLICANT_AGE:
+        return f'Applicant must be under {MAX_APPLICANT_AGE} years old'
+    return None
+
+
+# Fields a client may set on a LoanApplication
+LOAN_APPLICATION_FIELDS = [
+    # Personal Details
+    Field('full_name', required=True, max_length=100),
+    Field('date_of_birth', 'date', required=True, message='Invalid date of birth format'),
+    Field('pan_number', required=True, pattern=PAN_RE, message='Invalid PAN number format'),
+    Field('aadhaar_number', required=True, pattern=AADHAAR_RE, message='Invalid Aadhaar number format'),
+    Field('gender', max_length=10),
+    Field('marital_status', max_length=20),
+    # Contact Details
+    Field('email', pattern=EMAIL_RE, message='Invalid email format', max_length=120),
+    Field('phone', required=True, pattern=PHONE_RE, message='Invalid phone number format'),
+    Field('alternate_phone', pattern=PHONE_RE, message='Invalid alternate phone number format'),
+    # Address
+    Field('address_line1', required=True, max_length=255),
+    Field('address_line2', max_length=255),
+    Field('city', required=True, max_length=100),
+    Field('state', required=True, max_length=100),
+    Field('pincode', required=True, pattern=PINCODE_RE, message='Invalid pincode format'),
+    Field('residence_type', max_length=50),
+    Field('years_at_residence', 'int', minimum=0),
+    # Education & Employment
+    Field('education_level', max_length=50),
+    Field('employment_type', required=True, max_length=50),
+    Field('employer_name', max_length=100),
+    Field('industry', max_length=100),
+    Field('designation', max_length=100),
+    Field('work_experience', 'int', minimum=0),
+    Field('monthly_income', 'float', required=True, minimum=0, exclusive_minimum=True),
+    Field('other_income', 'float', minimum=0),
+    # Loan Details
+    Field('loan_amount', 'float', required=True, minimum=0, exclusive_minimum=True),
+    Field('loan_purpose', max_length=255),
+    Field('loan_tenure', 'int', required=True, minimum=0, exclusive_minimum=True),
+    Field('existing_loans', 'bool'),
+    Field('existing_emi', 'float', minimum=0),
+]
+
+loan_application_validator = SchemaValidator(LOAN_APPLICATION_FIELDS, checks=[_check_applicant_age])
@@ -0,0 +1,18 @@
+"""
+WSGI entry point for pre-forking servers.
+
+With gunicorn's preload_app the master imports this module once: the app is
+built, directories and tables are prepared and every service (reportlab,
+razorpay, Pillow, ...) is constructed before workers fork, so the heavy
+modules are shared copy-on-write instead of being imported per worker.
+"""
+from dotenv import load_dotenv
+
+from backend import create_app, prepare_app
+from backend.services import warm_services
+
+load_dotenv()
+
+app = create_app()
+prepare_app(app)
+warm_services()